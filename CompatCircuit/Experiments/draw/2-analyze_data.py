@@ -1,18 +1,211 @@
+import argparse
 import pickle
+import sys
 from typing import Dict, List
 import numpy as np
 
 import analyze_data
+from exp_data_store import EXP_DATA_DIR, save_exp_data
+from log_index import RawDataIndex
+from parse_cache import PARSE_CACHE_FILE, ParseCache
+
+
+def print_slowest_parties(
+    title: str,
+    party_timecosts_of_cells: Dict[str, Dict[str, List[float]]],
+    hosts: List[str],
+):
+    print(f"==== {title} ====", file=sys.stderr)
+    for setup_name, result in analyze_data.find_slowest_parties(
+        party_timecosts_of_cells
+    ).items():
+        slowest_party = result["slowest_party"]
+        if slowest_party is None:
+            print(f"{setup_name}: no run with a single slowest party", file=sys.stderr)
+            continue
+        party_index = int(slowest_party.removeprefix("party"))
+        node = f" ({hosts[party_index]})" if party_index < len(hosts) else ""
+        print(
+            f"{setup_name}: {slowest_party}{node} is the slowest in "
+            f"{result['slowest_counts'][slowest_party]}/{result['runs']} runs ({result['share']:.0%}), "
+            f"mean spread {result['spread']:.3f}s",
+            file=sys.stderr,
+        )
+
+
+def print_peak_rss(title: str, peak_rss_by_phase: Dict[str, Dict[str, Dict]]):
+    """
+    Prints, for each cell, the phase with the highest peak resident set size over all circuits, parties and runs.
+    """
+    print(f"==== {title} peak RSS ====", file=sys.stderr)
+    for cell_name, circuits in peak_rss_by_phase.items():
+        phase_peaks = {}
+        for party_phases in circuits.values():
+            for phases in party_phases.values():
+                for phase_name, values in phases.items():
+                    phase_peaks[phase_name] = max(
+                        [phase_peaks.get(phase_name, 0)] + values
+                    )
+        if not phase_peaks or max(phase_peaks.values()) == 0:
+            continue
+        peak_phase = max(phase_peaks, key=phase_peaks.get)
+        print(
+            f"{cell_name}: {phase_peaks[peak_phase] / 2**30:.2f} GiB in {peak_phase} ("
+            + ", ".join(
+                f"{phase_name} {peak / 2**30:.2f}"
+                for phase_name, peak in phase_peaks.items()
+            )
+            + ")",
+            file=sys.stderr,
+        )
+
 
 if __name__ == "__main__":
-    exp1_preprocess_data = analyze_data.get_exp1_preprocess_stage_data()
-    exp23_preprocess_data = analyze_data.get_exp23_preprocess_stage_data()
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--jobs",
+        metavar="N",
+        type=int,
+        default=1,
+        help="Number of worker processes used to parse log files",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Do not read or update the parse cache ({PARSE_CACHE_FILE})",
+    )
+    parser.add_argument(
+        "--pickle",
+        action="store_true",
+        help="Also write the legacy exp_data.pkl, which is not tracked",
+    )
+    parser.add_argument(
+        "--all-parties",
+        action="store_true",
+        help="Also read the logs of every party, and report the slowest party of each setup",
+    )
+    parser.add_argument(
+        "--resources",
+        action="store_true",
+        help="Also read the .resources files of every party, with their peak RSS, CPU utilization and I/O",
+    )
+    parser.add_argument(
+        "--raw-data",
+        metavar="PATH",
+        default=None,
+        help=f"The rawdata directory, or an archive of it made by archive_rawdata.py (default: {analyze_data.RAW_DATA_DIR}, or {analyze_data.RAW_DATA_ARCHIVE} if there is no {analyze_data.RAW_DATA_DIR} directory)",
+    )
+    parser.add_argument(
+        "--hosts",
+        metavar="FILE",
+        help="Hosts file of the MPC runs, to print the node of the slowest party (line i is party i)",
+    )
+    args = parser.parse_args()
+
+    # Walk rawdata/ once, and report every missing log file before parsing anything
+    index = RawDataIndex(args.raw_data or analyze_data.get_raw_data_dir())
+    missing = analyze_data.find_missing_log_files(index)
+    if missing:
+        raise analyze_data.MissingLogFilesError(missing)
+
+    cache = None if args.no_cache else ParseCache(PARSE_CACHE_FILE)
 
-    exp1_compute_data = analyze_data.get_exp1_compute_stage_data()
-    exp23_compute_data = analyze_data.get_exp23_compute_stage_data()
+    exp1_preprocess_data = analyze_data.get_exp1_preprocess_stage_data(
+        cache=cache, index=index
+    )
+    exp23_preprocess_data = analyze_data.get_exp23_preprocess_stage_data(
+        cache=cache, index=index
+    )
 
-    exp1_zkp_data = analyze_data.get_exp1_zkp_stage_data()
-    exp23_zkp_data = analyze_data.get_exp23_zkp_stage_data()
+    exp1_compute_data = analyze_data.get_exp1_compute_stage_data(
+        cache=cache, index=index
+    )
+    exp23_compute_data = analyze_data.get_exp23_compute_stage_data(
+        cache=cache, index=index
+    )
+
+    exp1_zkp_data = analyze_data.get_exp1_zkp_stage_data(
+        jobs=args.jobs, cache=cache, index=index
+    )
+    exp23_zkp_data = analyze_data.get_exp23_zkp_stage_data(
+        jobs=args.jobs, cache=cache, index=index
+    )
+
+    if args.all_parties:
+        party_data = {
+            "exp1_compute_party_data": analyze_data.get_exp1_compute_party_data(
+                jobs=args.jobs, cache=cache, index=index
+            ),
+            "exp23_compute_party_data": analyze_data.get_exp23_compute_party_data(
+                jobs=args.jobs, cache=cache, index=index
+            ),
+            "exp1_zkp_party_data": analyze_data.get_exp1_zkp_party_data(
+                jobs=args.jobs, cache=cache, index=index
+            ),
+            "exp23_zkp_party_data": analyze_data.get_exp23_zkp_party_data(
+                jobs=args.jobs, cache=cache, index=index
+            ),
+        }
+
+        hosts = []
+        if args.hosts is not None:
+            with open(args.hosts, "r") as file:
+                hosts = [line.strip() for line in file if line.strip()]
+
+        for dataset_name in ["exp1_compute_party_data", "exp23_compute_party_data"]:
+            print_slowest_parties(
+                f"{dataset_name} total timecost",
+                {
+                    cell_name: timecosts["total"]
+                    for cell_name, timecosts in party_data[dataset_name][
+                        "timecost"
+                    ].items()
+                },
+                hosts,
+            )
+        for dataset_name in ["exp1_zkp_party_data", "exp23_zkp_party_data"]:
+            print_slowest_parties(
+                f"{dataset_name} total timecost",
+                {
+                    f"{cell_name}.{circuit_name}": {
+                        party_name: timecosts["total"]
+                        for party_name, timecosts in party_timecosts.items()
+                    }
+                    for cell_name, circuits in party_data[dataset_name][
+                        "timecost"
+                    ].items()
+                    for circuit_name, party_timecosts in circuits.items()
+                },
+                hosts,
+            )
+
+    if args.resources:
+        resource_data = {
+            "exp1_compute_resource_data": analyze_data.get_exp1_compute_resource_data(
+                jobs=args.jobs, cache=cache, index=index
+            ),
+            "exp23_compute_resource_data": analyze_data.get_exp23_compute_resource_data(
+                jobs=args.jobs, cache=cache, index=index
+            ),
+            "exp1_zkp_resource_data": analyze_data.get_exp1_zkp_resource_data(
+                jobs=args.jobs, cache=cache, index=index
+            ),
+            "exp23_zkp_resource_data": analyze_data.get_exp23_zkp_resource_data(
+                jobs=args.jobs, cache=cache, index=index
+            ),
+        }
+        for dataset_name in ["exp1_zkp_resource_data", "exp23_zkp_resource_data"]:
+            print_peak_rss(
+                dataset_name, resource_data[dataset_name]["peak_rss_by_phase"]
+            )
+
+    if cache is not None:
+        evicted = cache.evict_missing()
+        print(
+            f"Parse cache: {cache.hits} hits, {cache.misses} misses, {evicted} evicted",
+            file=sys.stderr,
+        )
+        cache.close()
 
     exp_data = {
         "exp1_preprocess_data": exp1_preprocess_data,
@@ -22,9 +215,16 @@ if __name__ == "__main__":
         "exp1_zkp_data": exp1_zkp_data,
         "exp23_zkp_data": exp23_zkp_data,
     }
+    if args.all_parties:
+        exp_data.update(party_data)
+    if args.resources:
+        exp_data.update(resource_data)
+
+    save_exp_data(exp_data, EXP_DATA_DIR)
 
-    with open("exp_data.pkl", "wb") as file:
-        pickle.dump(exp_data, file)
+    if args.pickle:
+        with open("exp_data.pkl", "wb") as file:
+            pickle.dump(exp_data, file)
 
     # print("==== EXP 1 preprocess timecost ====")
     # for setup_name, value_dicts in exp1_preprocess_data["timecost"].items():
@@ -1,10 +1,10 @@
-import pickle
 import matplotlib
 import seaborn as sns
 import numpy as np
 import matplotlib.pyplot as plt
 
 from config import SAVE_FIG_FORMAT
+from exp_data_store import EXP_DATA_DIR, ExpDataStore
 
 EXP1_METHODS = {
     "Addition-100000": "Addition",
@@ -151,11 +151,7 @@ if __name__ == "__main__":
     x_values = ["Single", "2", "4", "8", "16"]
     stages = [STAGE_COMPUTE, STAGE_ZKP]
 
-    with open("exp_data.pkl", "rb") as file:
-        exp_data = pickle.load(file)
-
-    exp1_compute_data = exp_data["exp1_compute_data"]["timecost"]
-    exp1_zkp_data = exp_data["exp1_zkp_data"]["timecost"]
+    exp_data = ExpDataStore(EXP_DATA_DIR)
 
     y_values = {}
     # x_label_original_names = [
@@ -174,7 +170,7 @@ if __name__ == "__main__":
     # ]
     method_original_names = list(EXP1_METHODS.keys())
 
-    for stage, stage_data in zip(stages, [exp1_compute_data, exp1_zkp_data]):
+    for stage, stage_dataset in zip(stages, ["exp1_compute_data", "exp1_zkp_data"]):
         y_values[stage] = {}
         for x_value_original_name, x_value in zip(x_value_original_names, x_values):
             y_values[stage][x_value] = {}
@@ -184,13 +180,20 @@ if __name__ == "__main__":
                     continue
 
                 if stage == STAGE_COMPUTE:
-                    y_values[stage][x_value][method] = stage_data[
-                        x_value_original_name
-                    ][method_original_name]
+                    y_values[stage][x_value][method] = exp_data.get(
+                        stage_dataset,
+                        "timecost",
+                        x_value_original_name,
+                        method_original_name,
+                    )
                 elif stage == STAGE_ZKP:
-                    y_values[stage][x_value][method] = stage_data[
-                        x_value_original_name
-                    ][method_original_name]["prove"]
+                    y_values[stage][x_value][method] = exp_data.get(
+                        stage_dataset,
+                        "timecost",
+                        x_value_original_name,
+                        method_original_name,
+                        "prove",
+                    )
                 else:
                     assert False
 
@@ -1,10 +1,11 @@
-import pickle
 import matplotlib
 import seaborn as sns
 import numpy as np
 import matplotlib.pyplot as plt
 
 from config import SAVE_FIG_FORMAT
+from exp_data_store import EXP_DATA_DIR, ExpDataStore
+from measurements import MeasurementTable
 
 import analyze_data
 
@@ -54,11 +55,15 @@ if __name__ == "__main__":
     plt.rc("legend", fontsize=SMALL_SIZE)  # legend fontsize
     plt.rc("figure", titlesize=BIGGER_SIZE)  # fontsize of the figure title
 
-    with open("exp_data.pkl", "rb") as file:
-        exp_data = pickle.load(file)
+    exp_data = ExpDataStore(EXP_DATA_DIR)
 
-    exp23_compute_data = exp_data["exp23_compute_data"]["timecost"]
-    exp23_zkp_data = exp_data["exp23_zkp_data"]["timecost"]
+    # Sum up the step time costs of each run
+    step_timecost_sums = (
+        MeasurementTable.from_store(exp_data)
+        .where(stage="compute", metric="timecost", method=["IF", "MF", "IE"])
+        .group_by("setup", "instance", "method", "repeat")
+        .aggregate("sum")
+    )
 
     methods = [
         "Total",
@@ -106,30 +111,27 @@ if __name__ == "__main__":
                 y_values[subfig_index][x_value] = {}
                 for method_original_name, method in zip(method_original_names, methods):
                     if method_original_name == "total":
-                        y_values[subfig_index][x_value][method] = exp23_compute_data[
-                            f"{setup_original_name}.{x_value_original_name}"
-                        ][method_original_name]
+                        y_values[subfig_index][x_value][method] = exp_data.get(
+                            "exp23_compute_data",
+                            "timecost",
+                            f"{setup_original_name}.{x_value_original_name}",
+                            method_original_name,
+                        )
                     elif method_original_name in ["TV", "TS"]:
-                        y_values[subfig_index][x_value][method] = exp23_compute_data[
-                            f"{setup_original_name}.{x_value_original_name}"
-                        ][
-                            f"{method_original_name}-{analyze_data.EXP23_STEP_COUNTS[x_value_original_name]-1}"
-                        ]
+                        y_values[subfig_index][x_value][method] = exp_data.get(
+                            "exp23_compute_data",
+                            "timecost",
+                            f"{setup_original_name}.{x_value_original_name}",
+                            f"{method_original_name}-{analyze_data.EXP23_STEP_COUNTS[x_value_original_name]-1}",
+                        )
                     elif method_original_name in ["IF", "MF", "IE"]:
-                        values = None
-                        for i in range(
-                            analyze_data.EXP23_STEP_COUNTS[x_value_original_name]
-                        ):
-                            new_values = exp23_compute_data[
-                                f"{setup_original_name}.{x_value_original_name}"
-                            ][f"{method_original_name}-{i}"]
-                            if values == None:
-                                values = new_values
-                            else:
-                                assert len(values) == len(new_values)
-                                for j in range(len(values)):
-                                    values[j] += new_values[j]
-                        y_values[subfig_index][x_value][method] = values
+                        y_values[subfig_index][x_value][method] = (
+                            step_timecost_sums.where(
+                                setup=setup_original_name,
+                                instance=x_value_original_name,
+                                method=method_original_name,
+                            )["value"]
+                        )
                     else:
                         assert False
 
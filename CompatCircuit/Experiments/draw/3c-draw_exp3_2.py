@@ -1,10 +1,10 @@
-import pickle
 import matplotlib
 import seaborn as sns
 import numpy as np
 import matplotlib.pyplot as plt
 
 from config import SAVE_FIG_FORMAT
+from exp_data_store import EXP_DATA_DIR, ExpDataStore
 
 import numpy as np
 import matplotlib.pyplot as plt
@@ -58,12 +58,7 @@ if __name__ == "__main__":
     plt.rc("legend", fontsize=SMALL_SIZE)  # legend fontsize
     plt.rc("figure", titlesize=BIGGER_SIZE)  # fontsize of the figure title
 
-    with open("exp_data.pkl", "rb") as file:
-        exp_data = pickle.load(file)
-
-    exp23_preprocess_data = exp_data["exp23_preprocess_data"]["timecost"]
-    exp23_compute_data = exp_data["exp23_compute_data"]["timecost"]
-    exp23_zkp_data = exp_data["exp23_zkp_data"]["timecost"]
+    exp_data = ExpDataStore(EXP_DATA_DIR)
 
     parties = ["Single", "2", "4", "8"]
     party_original_names = ["single", "mpc-2t", "mpc-4t", "mpc-8t"]
@@ -86,16 +81,18 @@ if __name__ == "__main__":
                 methods = proof_methods
                 method_original_names = proof_method_original_names
 
-                zkp_data_sum = None
-                for k, v in exp23_zkp_data[
-                    f"{party_original_name}.{instance_name}"
-                ].items():
-                    if zkp_data_sum == None:
-                        zkp_data_sum = v
+                # Sum up the time costs of all circuits of each run
+                zkp_data_sum = {}
+                for key, values in exp_data.select(
+                    "exp23_zkp_data",
+                    "timecost",
+                    lambda key: key[0] == f"{party_original_name}.{instance_name}",
+                ).items():
+                    method = key[-1]
+                    if method not in zkp_data_sum:
+                        zkp_data_sum[method] = np.array(values)
                     else:
-                        for method, values in v.items():
-                            for i, value in enumerate(values):
-                                zkp_data_sum[method][i] += value
+                        zkp_data_sum[method] += values
 
             else:
                 assert False
@@ -105,13 +102,19 @@ if __name__ == "__main__":
                     if party_original_name == "single":
                         y_datas[party][method] = [0]
                     else:
-                        y_datas[party][method] = exp23_preprocess_data[
-                            f"{party_original_name}.{instance_name}"
-                        ]["total"]
+                        y_datas[party][method] = exp_data.get(
+                            "exp23_preprocess_data",
+                            "timecost",
+                            f"{party_original_name}.{instance_name}",
+                            "total",
+                        )
                 elif method_original_name == "compute":
-                    y_datas[party][method] = exp23_compute_data[
-                        f"{party_original_name}.{instance_name}"
-                    ]["total"]
+                    y_datas[party][method] = exp_data.get(
+                        "exp23_compute_data",
+                        "timecost",
+                        f"{party_original_name}.{instance_name}",
+                        "total",
+                    )
                 else:
                     y_datas[party][method] = zkp_data_sum[method_original_name]
     methods = computation_methods + proof_methods
@@ -1,14 +1,13 @@
-import pickle
 import numpy as np
 
+from exp_data_store import EXP_DATA_DIR, ExpDataStore
+
 if __name__ == "__main__":
-    with open("exp_data.pkl", "rb") as file:
-        exp_data = pickle.load(file)
+    exp_data = ExpDataStore(EXP_DATA_DIR)
 
-    exp1_compute_bandwidth_list = []
-    for case_name, values in exp_data["exp1_compute_data"]["bytes_per_second"].items():
-        for value in values:
-            exp1_compute_bandwidth_list.append(value)
+    exp1_compute_bandwidth_list = exp_data.values(
+        "exp1_compute_data", "bytes_per_second"
+    )
     print("==== EXP 1 compute bandwidth per (party - 1) ====")
     mean_value = np.mean(exp1_compute_bandwidth_list)
     max_value = np.max(exp1_compute_bandwidth_list)
@@ -20,11 +19,7 @@ if __name__ == "__main__":
     print("Standard Deviation: {0:.6f}".format(std_dev))
     print()
 
-    exp1_zkp_bandwidth_list = []
-    for case_name, values in exp_data["exp1_zkp_data"]["bytes_per_second"].items():
-        for inner_values in values.values():
-            for value in inner_values:
-                exp1_zkp_bandwidth_list.append(value)
+    exp1_zkp_bandwidth_list = exp_data.values("exp1_zkp_data", "bytes_per_second")
     print("==== EXP 1 zkp bandwidth per (party - 1) ====")
     mean_value = np.mean(exp1_zkp_bandwidth_list)
     max_value = np.max(exp1_zkp_bandwidth_list)
@@ -36,10 +31,9 @@ if __name__ == "__main__":
     print("Standard Deviation: {0:.6f}".format(std_dev))
     print()
 
-    exp23_compute_bandwidth_list = []
-    for case_name, values in exp_data["exp23_compute_data"]["bytes_per_second"].items():
-        for value in values:
-            exp23_compute_bandwidth_list.append(value)
+    exp23_compute_bandwidth_list = exp_data.values(
+        "exp23_compute_data", "bytes_per_second"
+    )
 
     print("==== EXP 23 compute bandwidth per (party - 1) ====")
     mean_value = np.mean(exp23_compute_bandwidth_list)
@@ -52,11 +46,7 @@ if __name__ == "__main__":
     print("Standard Deviation: {0:.6f}".format(std_dev))
     print()
 
-    exp23_zkp_bandwidth_list = []
-    for case_name, values in exp_data["exp23_zkp_data"]["bytes_per_second"].items():
-        for inner_values in values.values():
-            for value in inner_values:
-                exp23_zkp_bandwidth_list.append(value)
+    exp23_zkp_bandwidth_list = exp_data.values("exp23_zkp_data", "bytes_per_second")
     print("==== EXP 23 zkp bandwidth per (party - 1) ====")
     mean_value = np.mean(exp23_zkp_bandwidth_list)
     max_value = np.max(exp23_zkp_bandwidth_list)
@@ -68,11 +58,13 @@ if __name__ == "__main__":
     print("Standard Deviation: {0:.6f}".format(std_dev))
     print()
 
-    all_bandwidth_list = list(
-        exp1_compute_bandwidth_list
-        + exp1_zkp_bandwidth_list
-        + exp23_compute_bandwidth_list
-        + exp23_zkp_bandwidth_list
+    all_bandwidth_list = np.concatenate(
+        [
+            exp1_compute_bandwidth_list,
+            exp1_zkp_bandwidth_list,
+            exp23_compute_bandwidth_list,
+            exp23_zkp_bandwidth_list,
+        ]
     )
     print("==== all EXP all stages bandwidth per (party - 1) ====")
     mean_value = np.mean(all_bandwidth_list)
@@ -0,0 +1,122 @@
+import argparse
+from typing import Dict, List
+
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+
+import analyze_data
+from config import SAVE_FIG_FORMAT
+
+
+def get_setup_traffic(traffic_files: List[str], circuit_filter: str) -> Dict:
+    """
+    Sums up the bytes sent over each link in all runs of a setup, and averages the throughput of each link.
+    """
+    bytes_sent = None
+    bytes_per_second = []
+    unresolved_bytes = 0
+    for traffic_file in traffic_files:
+        if circuit_filter not in traffic_file:
+            continue
+        traffic = analyze_data.get_zkp_traffic_from_file(traffic_file)
+        run_bytes_sent = np.asarray(traffic.bytes_sent, dtype=np.float64)
+        if bytes_sent is None:
+            bytes_sent = np.zeros_like(run_bytes_sent)
+        bytes_sent += run_bytes_sent
+        bytes_per_second.append(np.asarray(traffic.bytes_per_second, dtype=np.float64))
+        unresolved_bytes += sum(traffic.unresolved_bytes)
+    if bytes_sent is None:
+        return {}
+    return {
+        "runs": len(bytes_per_second),
+        "bytes_sent": bytes_sent,
+        "bytes_per_second": np.mean(bytes_per_second, axis=0),
+        "unresolved_bytes": unresolved_bytes,
+    }
+
+
+def print_traffic_report(setup_name: str, setup_traffic: Dict):
+    bytes_sent = setup_traffic["bytes_sent"]
+    party_count = bytes_sent.shape[0]
+    total = bytes_sent.sum()
+    print(
+        f"==== {setup_name}: {setup_traffic['runs']} runs, {total / 2**20:.1f} MiB between parties, "
+        f"{setup_traffic['unresolved_bytes'] / 2**20:.1f} MiB to other peers ===="
+    )
+    print(f"{'party':<8} {'sent (MiB)':>12} {'received (MiB)':>15} {'share':>7}")
+    sent = bytes_sent.sum(axis=1)
+    received = bytes_sent.sum(axis=0)
+    for party_index in range(party_count):
+        share = (
+            (sent[party_index] + received[party_index]) / (2 * total) if total else 0
+        )
+        print(
+            f"party{party_index:<3} {sent[party_index] / 2**20:>12.1f} {received[party_index] / 2**20:>15.1f} "
+            f"{share:>7.1%}"
+        )
+
+    links = bytes_sent[~np.eye(party_count, dtype=bool)]
+    links = links[links > 0]
+    if len(links) > 0:
+        hottest = np.unravel_index(np.argmax(bytes_sent), bytes_sent.shape)
+        print(
+            f"Busiest link: party{hottest[0]} -> party{hottest[1]} "
+            f"({bytes_sent[hottest] / 2**20:.1f} MiB), "
+            f"busiest / quietest used link: {links.max() / links.min():.1f}x"
+        )
+    print()
+
+
+def draw_traffic_matrix(setup_name: str, setup_traffic: Dict, metric: str):
+    matrix = setup_traffic[metric] / 2**20
+    party_count = matrix.shape[0]
+    size = max(4, party_count * 0.5)
+    fig, ax = plt.subplots(figsize=(size + 1, size))
+    labels = [f"{party_index}" for party_index in range(party_count)]
+    sns.heatmap(
+        matrix,
+        ax=ax,
+        cmap="rocket_r",
+        square=True,
+        annot=party_count <= 8,
+        fmt=".1f",
+        xticklabels=labels,
+        yticklabels=labels,
+        cbar_kws={
+            "label": "MiB/s" if metric == "bytes_per_second" else "MiB (all runs)"
+        },
+    )
+    ax.set_xlabel("To party")
+    ax.set_ylabel("From party")
+    ax.set_title(setup_name)
+    plt.savefig(
+        f"traffic_matrix.{setup_name}.{metric}.{SAVE_FIG_FORMAT}", bbox_inches="tight"
+    )
+    plt.close(fig)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Report and draw the traffic between the parties of the ZKP runs, from the .all.traffic files"
+    )
+    parser.add_argument(
+        "--circuit",
+        default="",
+        help="Only use the runs whose file name contains this string, e.g. ZkVmCircuit",
+    )
+    parser.add_argument(
+        "--metric",
+        choices=["bytes_per_second", "bytes_sent"],
+        default="bytes_per_second",
+        help="Value drawn in the heatmaps",
+    )
+    args = parser.parse_args()
+
+    sns.set_style("white")
+    for setup_name, traffic_files in analyze_data.get_zkp_traffic_files().items():
+        setup_traffic = get_setup_traffic(traffic_files, args.circuit)
+        if not setup_traffic:
+            continue
+        print_traffic_report(setup_name, setup_traffic)
+        draw_traffic_matrix(setup_name, setup_traffic, args.metric)
@@ -1,10 +1,26 @@
 import re
 import os
-import glob
 import sys
-from typing import Dict, List
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from log_index import EXP1_INSTANCE_NAME, RawDataIndex
+from parse_cache import ParseCache
+from raw_data_archive import (
+    get_file_identity,
+    get_file_size,
+    open_raw_file,
+    open_raw_log,
+    path_exists,
+    read_raw_blocks_reversed,
+    resolve_raw_log_file,
+)
+from zkp_stdout import ZkpStdoutParser, classify_zkp_step_label
 
 RAW_DATA_DIR = "rawdata"
+# Read in place when there is no rawdata/ directory, see `raw_data_archive.py`
+RAW_DATA_ARCHIVE = "rawdata.zip"
 COMPUTE_DATA_DIR = os.path.join(RAW_DATA_DIR, "compute")
 PREPROCESS_DATA_DIR = os.path.join(RAW_DATA_DIR, "preprocess")
 ZKP_DATA_DIR = os.path.join(RAW_DATA_DIR, "zkp")
@@ -64,6 +80,9 @@ EXP1_METHODS = [
     "zkVM-IE",
 ]
 
+EXP23_INSTANCE_PATTERN = re.compile(r"^exp[23]_")
+
+# Expected step counts. The ones found in the ZKP logs take precedence, see get_exp23_step_count
 EXP23_STEP_COUNTS = {
     "exp2_1": 5,
     "exp2_2": 5,
@@ -92,206 +111,353 @@ EXP23_ZKP_METHODS = [
     "ZkVmCircuit",
 ]
 
+PRESHARE_KEYS = [
+    "FieldBeaverTripleShare",
+    "BoolBeaverTripleShare",
+    "EdaBitsKaiShare",
+    "DaBitPrioPlusShare",
+]
 
-def get_exp1_preprocess_stage_data() -> Dict[str, Dict[str, Dict[str, List[float]]]]:
-    ret = {}
-    ret["timecost"] = {}
+COMPUTE_SENT_PATTERN = re.compile(
+    r"Total sent \(all parties\): (\d+) bytes|Total sent: (\d+) bytes"
+)
 
-    # Fetch files
-    for setup_name, log_filename_prefix, party_count in EXP1_SETUPS:
-        if setup_name == "single":
-            continue
 
-        log_files = glob.glob(
-            os.path.join(
-                PREPROCESS_DATA_DIR,
-                f"log.preprocess.{setup_name}.exp1.*.txt",
-            )
+class MissingLogFilesError(Exception):
+    def __init__(self, patterns: List[str]):
+        super().__init__(
+            f"Missing files for {len(patterns)} pattern(s):\n" + "\n".join(patterns)
         )
-        if len(log_files) == 0:
-            raise Exception(
-                "Missing files for pattern "
-                + os.path.join(
-                    PREPROCESS_DATA_DIR,
-                    f"log.preprocess.{setup_name}.exp1.*.txt",
-                )
-            )
+        self.patterns = patterns
 
-        current_timecosts: Dict[str, List[float]] = {}
 
-        for log_file in log_files:
-            timecost_dicts = get_compute_timecost_from_log_file(log_file)
-            for method_name, value in timecost_dicts.items():
-                if method_name not in current_timecosts:
-                    current_timecosts[method_name] = []
-                current_timecosts[method_name].append(value)
+def get_raw_data_dir() -> str:
+    """
+    Returns `rawdata/`, or its archive if only the archive is there.
+    """
+    if not os.path.isdir(RAW_DATA_DIR) and os.path.isfile(RAW_DATA_ARCHIVE):
+        return RAW_DATA_ARCHIVE
+    return RAW_DATA_DIR
 
-        ret["timecost"][f"{setup_name}.exp1"] = current_timecosts
 
-    return ret
+def get_raw_data_index(index: Optional[RawDataIndex] = None) -> RawDataIndex:
+    return index if index is not None else RawDataIndex(get_raw_data_dir())
 
 
-def get_exp23_preprocess_stage_data() -> Dict[str, Dict[str, Dict[str, List[float]]]]:
-    ret = {}
-    ret["timecost"] = {}
+def get_exp23_instances(index: RawDataIndex) -> List[str]:
+    """
+    Returns the configured instances, followed by any other experiment 2/3 instance found in the raw data.
+    """
+    return EXP23_INSTANCES + sorted(
+        instance_name
+        for instance_name in index.get_instances()
+        if EXP23_INSTANCE_PATTERN.match(instance_name)
+        and instance_name not in EXP23_INSTANCES
+    )
 
-    # Fetch files
-    for setup_name, log_filename_prefix, party_count in EXP23_SETUPS:
+
+def get_exp23_step_count(index: RawDataIndex, instance_name: str) -> Optional[int]:
+    """
+    Returns the step count of an instance as found in the ZKP logs, falling back to `EXP23_STEP_COUNTS`.
+    """
+    return index.get_step_counts().get(
+        instance_name, EXP23_STEP_COUNTS.get(instance_name)
+    )
+
+
+def merge_timecosts(timecost_dicts: List[Dict[str, float]]) -> Dict[str, List[float]]:
+    current_timecosts: Dict[str, List[float]] = {}
+    for timecost_dict in timecost_dicts:
+        for method_name, value in timecost_dict.items():
+            if method_name not in current_timecosts:
+                current_timecosts[method_name] = []
+            current_timecosts[method_name].append(value)
+    return current_timecosts
+
+
+def get_exp1_preprocess_cells(
+    index: RawDataIndex, missing: List[str]
+) -> List[Tuple[str, List[str]]]:
+    cells = []
+    for setup_name, log_filename_prefix, party_count in EXP1_SETUPS:
         if setup_name == "single":
             continue
 
-        for instance_name in EXP23_INSTANCES:
-            log_files = glob.glob(
+        log_files = index.get_preprocess_logs(setup_name, EXP1_INSTANCE_NAME)
+        if len(log_files) == 0:
+            missing.append(
                 os.path.join(
                     PREPROCESS_DATA_DIR,
-                    f"log.preprocess.{setup_name}.{instance_name}.*.txt",
+                    f"log.preprocess.{setup_name}.exp1.*.txt",
                 )
             )
+        cells.append((f"{setup_name}.exp1", log_files))
+    return cells
+
+
+def get_exp23_preprocess_cells(
+    index: RawDataIndex, missing: List[str]
+) -> List[Tuple[str, List[str]]]:
+    cells = []
+    for setup_name, log_filename_prefix, party_count in EXP23_SETUPS:
+        if setup_name == "single":
+            continue
+
+        for instance_name in get_exp23_instances(index):
+            log_files = index.get_preprocess_logs(setup_name, instance_name)
             if len(log_files) == 0:
-                raise Exception(
-                    "Missing files for pattern "
-                    + os.path.join(
+                missing.append(
+                    os.path.join(
                         PREPROCESS_DATA_DIR,
                         f"log.preprocess.{setup_name}.{instance_name}.*.txt",
                     )
                 )
+            cells.append((f"{setup_name}.{instance_name}", log_files))
+    return cells
 
-            current_timecosts: Dict[str, List[float]] = {}
-
-            for log_file in log_files:
-                timecost_dicts = get_compute_timecost_from_log_file(log_file)
-                for method_name, value in timecost_dicts.items():
-                    if method_name not in current_timecosts:
-                        current_timecosts[method_name] = []
-                    current_timecosts[method_name].append(value)
-
-            ret["timecost"][f"{setup_name}.{instance_name}"] = current_timecosts
-
-    return ret
-
-
-def get_exp23_compute_stage_data() -> Dict[str, Dict[str, Dict[str, List[float]]]]:
-    ret = {}
-    ret["timecost"] = {}
-    ret["preshare_usage"] = {}
-    ret["bytes_per_second"] = {}
 
-    # Fetch files
-    for setup_name, log_filename_prefix, party_count in EXP23_SETUPS:
+def get_exp1_compute_cells(
+    index: RawDataIndex, missing: List[str]
+) -> List[Tuple[str, int, List[str]]]:
+    cells = []
+    for setup_name, log_filename_prefix, party_count in EXP1_SETUPS:
         # We only select time cost from party 0. This is because their time costs are almost same in the same MPC process.
         party_index = 0
 
-        for instance_name in EXP23_INSTANCES:
-            log_files = glob.glob(
+        log_files = index.get_compute_logs(
+            setup_name, party_index, log_filename_prefix, EXP1_INSTANCE_NAME
+        )
+        if len(log_files) == 0:
+            missing.append(
                 os.path.join(
                     COMPUTE_DATA_DIR,
                     f"log-{setup_name}",
                     f"{party_index}",
-                    f"log.{log_filename_prefix}.{instance_name}.*.txt",
+                    f"log.{log_filename_prefix}.*.txt",
                 )
             )
+        cells.append((f"{setup_name}.exp1", party_count, log_files))
+    return cells
+
 
+def get_exp23_compute_cells(
+    index: RawDataIndex, missing: List[str]
+) -> List[Tuple[str, int, List[str]]]:
+    cells = []
+    for setup_name, log_filename_prefix, party_count in EXP23_SETUPS:
+        # We only select time cost from party 0. This is because their time costs are almost same in the same MPC process.
+        party_index = 0
+
+        for instance_name in get_exp23_instances(index):
+            log_files = index.get_compute_logs(
+                setup_name, party_index, log_filename_prefix, instance_name
+            )
             if len(log_files) == 0:
-                raise Exception(
-                    "Missing files for pattern "
-                    + os.path.join(
+                missing.append(
+                    os.path.join(
                         COMPUTE_DATA_DIR,
                         f"log-{setup_name}",
                         f"{party_index}",
                         f"log.{log_filename_prefix}.{instance_name}.*.txt",
                     )
                 )
+            cells.append((f"{setup_name}.{instance_name}", party_count, log_files))
+    return cells
 
-            # process timecost
-            current_timecosts: Dict[str, List[float]] = {}
 
-            for log_file in log_files:
-                preshare_usage = get_preshare_value_usage_from_log_file(log_file)
-                # preshare usage should be same among each retries. Will not check for this
-                ret["preshare_usage"][f"{setup_name}.{instance_name}"] = preshare_usage
+def get_exp1_zkp_cells(
+    index: RawDataIndex, missing: List[str]
+) -> List[Tuple[str, str, int, List[str]]]:
+    cells = []
+    for setup_name, log_filename_prefix, party_count in EXP1_SETUPS:
+        # We only select time cost from party 0. This is because their time costs are almost same in the same MPC process.
+        party_name = "single" if setup_name == "single" else "party0"
 
-                timecost_dicts = get_compute_timecost_from_log_file(log_file)
-                for method_name, value in timecost_dicts.items():
-                    if method_name not in current_timecosts:
-                        current_timecosts[method_name] = []
-                    current_timecosts[method_name].append(value)
-
-            ret["timecost"][f"{setup_name}.{instance_name}"] = current_timecosts
-
-            # process bytes
-            if setup_name != "single":
-                bytes = []
-                for log_file in log_files:
-                    bytes.append(
-                        get_compute_total_bytes_sent_from_log_file(log_file)
-                        / (
-                            party_count * (party_count - 1)
-                        )  # for each party, compute the per-party bandwidth
+        for method_name in EXP1_METHODS:
+            log_files = index.get_zkp_logs(
+                setup_name,
+                log_filename_prefix,
+                EXP1_INSTANCE_NAME,
+                method_name,
+                party_name,
+            )
+            if len(log_files) == 0:
+                missing.append(
+                    os.path.join(
+                        ZKP_DATA_DIR,
+                        f"log-{setup_name}",
+                        f"{log_filename_prefix}.*.{method_name}.{party_name}.stderr",
+                    )
+                )
+            cells.append((f"{setup_name}.exp1", method_name, party_count, log_files))
+    return cells
+
+
+def get_exp23_zkp_cells(
+    index: RawDataIndex, missing: List[str]
+) -> List[Tuple[str, str, int, List[str]]]:
+    cells = []
+    for setup_name, log_filename_prefix, party_count in EXP23_SETUPS:
+        # We only select time cost from party 0. This is because their time costs are almost same in the same MPC process.
+        party_name = "single" if setup_name == "single" else "party0"
+
+        for instance_name in get_exp23_instances(index):
+            step_count = get_exp23_step_count(index, instance_name)
+            if step_count is None:
+                missing.append(
+                    os.path.join(
+                        ZKP_DATA_DIR,
+                        f"log-{setup_name}",
+                        f"{log_filename_prefix}.{instance_name}.*.{party_name}.stderr",
+                    )
+                )
+                continue
+
+            for method_name in EXP23_ZKP_METHODS:
+                if method_name == "MemoryTraceProverCircuit":
+                    circuit_names = [f"{method_name}-{step_count}"]
+                else:
+                    circuit_names = [
+                        f"{method_name}-Step-{i}" for i in range(step_count)
+                    ]
+
+                for circuit_name in circuit_names:
+                    log_files = index.get_zkp_logs(
+                        setup_name,
+                        log_filename_prefix,
+                        instance_name,
+                        circuit_name,
+                        party_name,
                     )
-                bytes_per_seconds = []
-                for log_file_i in range(len(log_files)):
-                    bytes_per_seconds.append(
-                        bytes[log_file_i] / current_timecosts["total"][log_file_i]
+                    if len(log_files) == 0:
+                        missing.append(
+                            os.path.join(
+                                ZKP_DATA_DIR,
+                                f"log-{setup_name}",
+                                f"{log_filename_prefix}.{instance_name}.*.{circuit_name}.{party_name}.stderr",
+                            )
+                        )
+                    cells.append(
+                        (
+                            f"{setup_name}.{instance_name}",
+                            circuit_name,
+                            party_count,
+                            log_files,
+                        )
                     )
-                ret["bytes_per_second"][
-                    f"{setup_name}.{instance_name}"
-                ] = bytes_per_seconds
+    return cells
+
+
+def find_missing_log_files(index: Optional[RawDataIndex] = None) -> List[str]:
+    """
+    Checks all stages at once and returns the patterns of every cell that has no log file.
+    """
+    index = get_raw_data_index(index)
+    missing: List[str] = []
+    for get_cells in [
+        get_exp1_preprocess_cells,
+        get_exp23_preprocess_cells,
+        get_exp1_compute_cells,
+        get_exp23_compute_cells,
+        get_exp1_zkp_cells,
+        get_exp23_zkp_cells,
+    ]:
+        get_cells(index, missing)
+    return missing
+
+
+def get_exp1_preprocess_stage_data(
+    cache: Optional[ParseCache] = None,
+    index: Optional[RawDataIndex] = None,
+) -> Dict[str, Dict[str, Dict[str, List[float]]]]:
+    missing: List[str] = []
+    cells = get_exp1_preprocess_cells(get_raw_data_index(index), missing)
+    if missing:
+        raise MissingLogFilesError(missing)
+
+    return get_preprocess_stage_data(cells, cache)
+
+
+def get_exp23_preprocess_stage_data(
+    cache: Optional[ParseCache] = None,
+    index: Optional[RawDataIndex] = None,
+) -> Dict[str, Dict[str, Dict[str, List[float]]]]:
+    missing: List[str] = []
+    cells = get_exp23_preprocess_cells(get_raw_data_index(index), missing)
+    if missing:
+        raise MissingLogFilesError(missing)
+
+    return get_preprocess_stage_data(cells, cache)
+
+
+def get_preprocess_stage_data(
+    cells: List[Tuple[str, List[str]]], cache: Optional[ParseCache] = None
+) -> Dict[str, Dict[str, Dict[str, List[float]]]]:
+    ret = {}
+    ret["timecost"] = {}
+
+    for cell_name, log_files in cells:
+        ret["timecost"][cell_name] = merge_timecosts(
+            parse_files(
+                get_compute_timecost_from_log_file,
+                [(f,) for f in log_files],
+                cache=cache,
+            )
+        )
 
     return ret
 
 
-def get_exp1_compute_stage_data() -> Dict[str, Dict[str, Dict[str, List[float]]]]:
+def get_exp1_compute_stage_data(
+    cache: Optional[ParseCache] = None,
+    index: Optional[RawDataIndex] = None,
+) -> Dict[str, Dict[str, Dict[str, List[float]]]]:
+    missing: List[str] = []
+    cells = get_exp1_compute_cells(get_raw_data_index(index), missing)
+    if missing:
+        raise MissingLogFilesError(missing)
+
+    return get_compute_stage_data(cells, cache)
+
+
+def get_exp23_compute_stage_data(
+    cache: Optional[ParseCache] = None,
+    index: Optional[RawDataIndex] = None,
+) -> Dict[str, Dict[str, Dict[str, List[float]]]]:
+    missing: List[str] = []
+    cells = get_exp23_compute_cells(get_raw_data_index(index), missing)
+    if missing:
+        raise MissingLogFilesError(missing)
+
+    return get_compute_stage_data(cells, cache)
+
+
+def get_compute_stage_data(
+    cells: List[Tuple[str, int, List[str]]], cache: Optional[ParseCache] = None
+) -> Dict[str, Dict[str, Dict[str, List[float]]]]:
     ret = {}
     ret["timecost"] = {}
     ret["preshare_usage"] = {}
     ret["bytes_per_second"] = {}
 
-    # Fetch files
-    for setup_name, log_filename_prefix, party_count in EXP1_SETUPS:
-        # We only select time cost from party 0. This is because their time costs are almost same in the same MPC process.
-        party_index = 0
-
-        log_files = glob.glob(
-            os.path.join(
-                COMPUTE_DATA_DIR,
-                f"log-{setup_name}",
-                f"{party_index}",
-                f"log.{log_filename_prefix}.*.txt",
-            )
+    for cell_name, party_count, log_files in cells:
+        records = parse_files(
+            get_compute_record_from_log_file, [(f,) for f in log_files], cache=cache
         )
-        if len(log_files) == 0:
-            raise Exception(
-                "Missing files for pattern "
-                + os.path.join(
-                    COMPUTE_DATA_DIR,
-                    f"log-{setup_name}",
-                    f"{party_index}",
-                    f"log.{log_filename_prefix}.*.txt",
-                )
-            )
 
         # process timecost
-        current_timecosts: Dict[str, List[float]] = {}
-
-        for log_file in log_files:
-            preshare_usage = get_preshare_value_usage_from_log_file(log_file)
+        for record in records:
             # preshare usage should be same among each retries. Will not check for this
-            ret["preshare_usage"][f"{setup_name}.exp1"] = preshare_usage
-
-            timecost_dicts = get_compute_timecost_from_log_file(log_file)
-            for method_name, value in timecost_dicts.items():
-                if method_name not in current_timecosts:
-                    current_timecosts[method_name] = []
-                current_timecosts[method_name].append(value)
-
-        ret["timecost"][f"{setup_name}.exp1"] = current_timecosts
+            ret["preshare_usage"][cell_name] = record.preshare_usage
+        current_timecosts = merge_timecosts([record.timecost for record in records])
+        ret["timecost"][cell_name] = current_timecosts
 
         # process bytes
-        if setup_name != "single":
+        if party_count > 1:
             bytes = []
-            for log_file in log_files:
+            for log_file, record in zip(log_files, records):
                 bytes.append(
-                    get_compute_total_bytes_sent_from_log_file(log_file)
+                    require_compute_total_bytes_sent(log_file, record)
                     / (
                         party_count * (party_count - 1)
                     )  # for each party, compute the per-party bandwidth
@@ -301,235 +467,862 @@ def get_exp1_compute_stage_data() -> Dict[str, Dict[str, Dict[str, List[float]]]
                 bytes_per_seconds.append(
                     bytes[log_file_i] / current_timecosts["total"][log_file_i]
                 )
-            ret["bytes_per_second"][f"{setup_name}.exp1"] = bytes_per_seconds
+            ret["bytes_per_second"][cell_name] = bytes_per_seconds
 
     return ret
 
 
-def get_exp1_zkp_stage_data() -> (
-    Dict[str, Dict[str, Dict[str, Dict[str, List[float]]]]]
-):
+def get_exp1_zkp_stage_data(
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+    index: Optional[RawDataIndex] = None,
+) -> Dict[str, Dict[str, Dict[str, Dict[str, List[float]]]]]:
+    missing: List[str] = []
+    cells = get_exp1_zkp_cells(get_raw_data_index(index), missing)
+    if missing:
+        raise MissingLogFilesError(missing)
+
+    return get_zkp_stage_data(cells, jobs, cache)
+
+
+def get_exp23_zkp_stage_data(
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+    index: Optional[RawDataIndex] = None,
+) -> Dict[str, Dict[str, Dict[str, Dict[str, List[float]]]]]:
+    missing: List[str] = []
+    cells = get_exp23_zkp_cells(get_raw_data_index(index), missing)
+    if missing:
+        raise MissingLogFilesError(missing)
+
+    return get_zkp_stage_data(cells, jobs, cache)
+
+
+def get_zkp_stage_data(
+    cells: List[Tuple[str, str, int, List[str]]],
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+) -> Dict[str, Dict[str, Dict[str, Dict[str, List[float]]]]]:
     ret = {}
     ret["timecost"] = {}
     ret["bytes_per_second"] = {}
 
-    # Fetch files
+    records = parse_zkp_log_files(
+        [(log_files, party_count > 1) for _, _, party_count, log_files in cells],
+        jobs,
+        cache,
+    )
+
+    for (cell_name, circuit_name, party_count, log_files), cell_records in zip(
+        cells, records
+    ):
+        current_timecosts, bytes_per_seconds = aggregate_zkp_records(
+            cell_records, party_count
+        )
+        if cell_name not in ret["timecost"]:
+            ret["timecost"][cell_name] = {}
+        ret["timecost"][cell_name][circuit_name] = current_timecosts
+        if party_count > 1:
+            if cell_name not in ret["bytes_per_second"]:
+                ret["bytes_per_second"][cell_name] = {}
+            ret["bytes_per_second"][cell_name][circuit_name] = bytes_per_seconds
+
+    return ret
+
+
+def get_party_runs(
+    index: RawDataIndex, party_log_files: List[List[str]]
+) -> List[List[str]]:
+    """
+    Pairs up the log files of the same run across parties.
+
+    Args:
+    - index (RawDataIndex): Index the log files were looked up in.
+    - party_log_files (list): For each party, its log files of a cell.
+
+    Returns:
+    - list: For each run that all parties have a log file of, the log file of each party, ordered by run.
+    """
+    party_runs: List[Dict[Tuple[str, int], str]] = []
+    for log_files in party_log_files:
+        runs: Dict[Tuple[str, int], str] = {}
+        # A run may have been repeated, e.g. after a crash. Pair those in the order of their names
+        for log_file in sorted(log_files):
+            run_name = index.get_run_name(log_file)
+            occurrence = 0
+            while (run_name, occurrence) in runs:
+                occurrence += 1
+            runs[(run_name, occurrence)] = log_file
+        party_runs.append(runs)
+
+    common_runs = set(party_runs[0]).intersection(*party_runs[1:])
+    skipped_runs = set().union(*party_runs) - common_runs
+    if skipped_runs:
+        sys.stderr.write(
+            f"get_party_runs: skipping runs missing for some parties: {sorted(skipped_runs)}\n"
+        )
+    return [
+        [runs[run] for runs in party_runs]
+        for run in sorted(common_runs, key=lambda run: (len(run[0]), run))
+    ]
+
+
+def get_exp1_compute_party_cells(
+    index: RawDataIndex,
+) -> List[Tuple[str, List[List[str]]]]:
+    cells = []
     for setup_name, log_filename_prefix, party_count in EXP1_SETUPS:
-        # We only select time cost from party 0. This is because their time costs are almost same in the same MPC process.
-        party_name = "single" if setup_name == "single" else "party0"
-        ret["timecost"][f"{setup_name}.exp1"] = {}
-        if setup_name != "single":
-            ret["bytes_per_second"][f"{setup_name}.exp1"] = {}
+        if party_count == 1:
+            continue
+        party_log_files = [
+            index.get_compute_logs(
+                setup_name, party_index, log_filename_prefix, EXP1_INSTANCE_NAME
+            )
+            for party_index in range(party_count)
+        ]
+        cells.append((f"{setup_name}.exp1", get_party_runs(index, party_log_files)))
+    return cells
 
-        for method_name in EXP1_METHODS:
-            log_files = glob.glob(
-                os.path.join(
-                    ZKP_DATA_DIR,
-                    f"log-{setup_name}",
-                    f"{log_filename_prefix}.*.{method_name}.{party_name}.stderr",
+
+def get_exp23_compute_party_cells(
+    index: RawDataIndex,
+) -> List[Tuple[str, List[List[str]]]]:
+    cells = []
+    for setup_name, log_filename_prefix, party_count in EXP23_SETUPS:
+        if party_count == 1:
+            continue
+        for instance_name in get_exp23_instances(index):
+            party_log_files = [
+                index.get_compute_logs(
+                    setup_name, party_index, log_filename_prefix, instance_name
                 )
-            )
-            if len(log_files) == 0:
-                raise Exception(
-                    "Missing files for pattern "
-                    + os.path.join(
-                        ZKP_DATA_DIR,
-                        f"log-{setup_name}",
-                        f"{log_filename_prefix}.*.{method_name}.{party_name}.stderr",
-                    )
+                for party_index in range(party_count)
+            ]
+            cells.append(
+                (
+                    f"{setup_name}.{instance_name}",
+                    get_party_runs(index, party_log_files),
                 )
+            )
+    return cells
 
-            # process timecost
-            current_timecosts = {
-                "total": [],
-                "setup": [],
-                "prove": [],
-                "verify": [],
-            }
-            for log_file in log_files:
-                current_timecosts["total"].append(
-                    get_zkp_total_timecost_from_stderr_file(log_file)
+
+def get_exp1_zkp_party_cells(
+    index: RawDataIndex,
+) -> List[Tuple[str, str, List[List[str]]]]:
+    cells = []
+    for setup_name, log_filename_prefix, party_count in EXP1_SETUPS:
+        if party_count == 1:
+            continue
+        for method_name in EXP1_METHODS:
+            party_log_files = [
+                index.get_zkp_logs(
+                    setup_name,
+                    log_filename_prefix,
+                    EXP1_INSTANCE_NAME,
+                    method_name,
+                    f"party{party_index}",
                 )
+                for party_index in range(party_count)
+            ]
+            cells.append(
+                (
+                    f"{setup_name}.exp1",
+                    method_name,
+                    get_party_runs(index, party_log_files),
+                )
+            )
+    return cells
 
-                for k, v in get_zkp_step_timecost_from_stdout_file(
-                    log_file.removesuffix(".stderr") + ".stdout"
-                ).items():
-                    current_timecosts[k].append(v)
-
-            ret["timecost"][f"{setup_name}.exp1"][method_name] = current_timecosts
-
-            # process bytes
-            if setup_name != "single":
-                bytes = []
-                for log_file in log_files:
-                    bytes.append(
-                        get_zkp_bytes_sent_from_stderr_file(log_file)
-                        / (
-                            party_count - 1
-                        )  # for each party, compute the per-party bandwidth
-                    )
-                bytes_per_seconds = []
-                for log_file_i in range(len(log_files)):
-                    bytes_per_seconds.append(
-                        bytes[log_file_i] / current_timecosts["total"][log_file_i]
+
+def get_exp23_zkp_party_cells(
+    index: RawDataIndex,
+) -> List[Tuple[str, str, List[List[str]]]]:
+    cells = []
+    for setup_name, log_filename_prefix, party_count in EXP23_SETUPS:
+        if party_count == 1:
+            continue
+        for instance_name in get_exp23_instances(index):
+            step_count = get_exp23_step_count(index, instance_name)
+            if step_count is None:
+                continue
+            for method_name in EXP23_ZKP_METHODS:
+                if method_name == "MemoryTraceProverCircuit":
+                    circuit_names = [f"{method_name}-{step_count}"]
+                else:
+                    circuit_names = [
+                        f"{method_name}-Step-{i}" for i in range(step_count)
+                    ]
+
+                for circuit_name in circuit_names:
+                    party_log_files = [
+                        index.get_zkp_logs(
+                            setup_name,
+                            log_filename_prefix,
+                            instance_name,
+                            circuit_name,
+                            f"party{party_index}",
+                        )
+                        for party_index in range(party_count)
+                    ]
+                    cells.append(
+                        (
+                            f"{setup_name}.{instance_name}",
+                            circuit_name,
+                            get_party_runs(index, party_log_files),
+                        )
                     )
-                ret["bytes_per_second"][f"{setup_name}.exp1"][
-                    method_name
-                ] = bytes_per_seconds
+    return cells
+
+
+def get_exp1_compute_party_data(
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+    index: Optional[RawDataIndex] = None,
+) -> Dict[str, Dict[str, Dict[str, Dict[str, List[float]]]]]:
+    return get_compute_party_data(
+        get_exp1_compute_party_cells(get_raw_data_index(index)), jobs, cache
+    )
+
+
+def get_exp23_compute_party_data(
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+    index: Optional[RawDataIndex] = None,
+) -> Dict[str, Dict[str, Dict[str, Dict[str, List[float]]]]]:
+    return get_compute_party_data(
+        get_exp23_compute_party_cells(get_raw_data_index(index)), jobs, cache
+    )
+
+
+def get_compute_party_data(
+    cells: List[Tuple[str, List[List[str]]]],
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+) -> Dict[str, Dict[str, Dict[str, Dict[str, List[float]]]]]:
+    """
+    Reads the compute logs of every party instead of only party 0.
+
+    Returns:
+    - dict: `ret["timecost"][cell][method]["party{i}"]` is the time cost of the method on party i in each run.
+      The lists of all parties of a cell are aligned by run.
+    """
+    ret = {}
+    ret["timecost"] = {}
+
+    records = parse_files(
+        get_compute_record_from_log_file,
+        [(log_file,) for _, runs in cells for run in runs for log_file in run],
+        jobs,
+        cache,
+    )
+
+    position = 0
+    for cell_name, runs in cells:
+        if len(runs) == 0:
+            continue
+        current_timecosts: Dict[str, Dict[str, List[float]]] = {}
+        for run in runs:
+            for party_index in range(len(run)):
+                for method_name, value in records[position].timecost.items():
+                    if method_name not in current_timecosts:
+                        current_timecosts[method_name] = {
+                            f"party{i}": [] for i in range(len(run))
+                        }
+                    current_timecosts[method_name][f"party{party_index}"].append(value)
+                position += 1
+        ret["timecost"][cell_name] = current_timecosts
 
     return ret
 
 
-def get_exp23_zkp_stage_data() -> (
-    Dict[str, Dict[str, Dict[str, Dict[str, List[float]]]]]
-):
+def get_exp1_zkp_party_data(
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+    index: Optional[RawDataIndex] = None,
+) -> Dict[str, Dict[str, Dict[str, Dict[str, Dict[str, Dict[str, List[float]]]]]]]:
+    return get_zkp_party_data(
+        get_exp1_zkp_party_cells(get_raw_data_index(index)), jobs, cache
+    )
+
+
+def get_exp23_zkp_party_data(
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+    index: Optional[RawDataIndex] = None,
+) -> Dict[str, Dict[str, Dict[str, Dict[str, Dict[str, Dict[str, List[float]]]]]]]:
+    return get_zkp_party_data(
+        get_exp23_zkp_party_cells(get_raw_data_index(index)), jobs, cache
+    )
+
+
+def get_zkp_party_data(
+    cells: List[Tuple[str, str, List[List[str]]]],
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+) -> Dict[str, Dict[str, Dict[str, Dict[str, Dict[str, Dict[str, List[float]]]]]]]:
+    """
+    Reads the ZKP logs of every party instead of only party 0.
+
+    Returns:
+    - dict: `ret["timecost"][cell][circuit]["party{i}"][phase]` is the total/setup/prove/verify time cost of
+      party i in each run. The lists of all parties of a cell are aligned by run.
+    """
     ret = {}
     ret["timecost"] = {}
-    ret["bytes_per_second"] = {}
 
-    # Fetch files
-    for setup_name, log_filename_prefix, party_count in EXP23_SETUPS:
-        # We only select time cost from party 0. This is because their time costs are almost same in the same MPC process.
-        party_name = "single" if setup_name == "single" else "party0"
+    records = parse_files(
+        get_zkp_record_from_stderr_file,
+        [(log_file, True) for _, _, runs in cells for run in runs for log_file in run],
+        jobs,
+        cache,
+    )
 
-        for instance_name in EXP23_INSTANCES:
-            current_timecosts = {}
-            if setup_name != "single":
-                ret["bytes_per_second"][f"{setup_name}.{instance_name}"] = {}
-            for method_name in EXP23_ZKP_METHODS:
-                if method_name == "MemoryTraceProverCircuit":
-                    log_files = glob.glob(
-                        os.path.join(
-                            ZKP_DATA_DIR,
-                            f"log-{setup_name}",
-                            f"{log_filename_prefix}.{instance_name}.*.{method_name}-{EXP23_STEP_COUNTS[instance_name]}.{party_name}.stderr",
-                        )
-                    )
-                    if len(log_files) == 0:
-                        raise Exception(
-                            "Missing files for pattern "
-                            + os.path.join(
-                                ZKP_DATA_DIR,
-                                f"log-{setup_name}",
-                                f"{log_filename_prefix}.{instance_name}.*.{method_name}-{EXP23_STEP_COUNTS[instance_name]}.{party_name}.stderr",
-                            )
-                        )
+    position = 0
+    for cell_name, circuit_name, runs in cells:
+        if len(runs) == 0:
+            continue
+        party_timecosts = {}
+        for party_index in range(len(runs[0])):
+            party_timecosts[f"party{party_index}"] = aggregate_zkp_records(
+                [
+                    records[position + i * len(run) + party_index]
+                    for i, run in enumerate(runs)
+                ],
+                1,
+            )[0]
+        position += sum(len(run) for run in runs)
+        if cell_name not in ret["timecost"]:
+            ret["timecost"][cell_name] = {}
+        ret["timecost"][cell_name][circuit_name] = party_timecosts
 
-                    # process timecosts
-                    current_timecosts[
-                        f"{method_name}-{EXP23_STEP_COUNTS[instance_name]}"
-                    ] = {
-                        "total": [],
-                        "setup": [],
-                        "prove": [],
-                        "verify": [],
-                    }
-                    for log_file in log_files:
-                        current_timecosts[
-                            f"{method_name}-{EXP23_STEP_COUNTS[instance_name]}"
-                        ]["total"].append(
-                            get_zkp_total_timecost_from_stderr_file(log_file)
-                        )
+    return ret
 
-                        for k, v in get_zkp_step_timecost_from_stdout_file(
-                            log_file.removesuffix(".stderr") + ".stdout"
-                        ).items():
-                            current_timecosts[
-                                f"{method_name}-{EXP23_STEP_COUNTS[instance_name]}"
-                            ][k].append(v)
-
-                    # process bytes
-                    if setup_name != "single":
-                        bytes = []
-                        for log_file in log_files:
-                            bytes.append(
-                                get_zkp_bytes_sent_from_stderr_file(log_file)
-                                / (
-                                    party_count - 1
-                                )  # for each party, compute the per-party bandwidth
-                            )
-                        bytes_per_seconds = []
-                        for log_file_i in range(len(log_files)):
-                            bytes_per_seconds.append(
-                                bytes[log_file_i]
-                                / current_timecosts[
-                                    f"{method_name}-{EXP23_STEP_COUNTS[instance_name]}"
-                                ]["total"][log_file_i]
-                            )
-                        ret["bytes_per_second"][f"{setup_name}.{instance_name}"][
-                            f"{method_name}-{EXP23_STEP_COUNTS[instance_name]}"
-                        ] = bytes_per_seconds
 
-                else:
-                    for i in range(EXP23_STEP_COUNTS[instance_name]):
-                        log_files = glob.glob(
-                            os.path.join(
-                                ZKP_DATA_DIR,
-                                f"log-{setup_name}",
-                                f"{log_filename_prefix}.{instance_name}.*.{method_name}-Step-{i}.{party_name}.stderr",
-                            )
-                        )
-                        if len(log_files) == 0:
-                            raise Exception(
-                                "Missing files for pattern "
-                                + os.path.join(
-                                    ZKP_DATA_DIR,
-                                    f"log-{setup_name}",
-                                    f"{log_filename_prefix}.{instance_name}.*.{method_name}-Step-{i}.{party_name}.stderr",
-                                )
-                            )
+def get_party_skew(party_timecosts: Dict[str, List[float]]) -> Dict[str, List]:
+    """
+    Compares the time costs of the parties in each run.
 
-                        current_timecosts[f"{method_name}-Step-{i}"] = {
-                            "total": [],
-                            "setup": [],
-                            "prove": [],
-                            "verify": [],
-                        }
-                        for log_file in log_files:
-                            current_timecosts[f"{method_name}-Step-{i}"][
-                                "total"
-                            ].append(get_zkp_total_timecost_from_stderr_file(log_file))
-
-                            for k, v in get_zkp_step_timecost_from_stdout_file(
-                                log_file.removesuffix(".stderr") + ".stdout"
-                            ).items():
-                                current_timecosts[f"{method_name}-Step-{i}"][k].append(
-                                    v
-                                )
-
-                        # process bytes
-                        if setup_name != "single":
-                            bytes = []
-                            for log_file in log_files:
-                                bytes.append(
-                                    get_zkp_bytes_sent_from_stderr_file(log_file)
-                                    / (
-                                        party_count - 1
-                                    )  # for each party, compute the per-party bandwidth
-                                )
-                            bytes_per_seconds = []
-                            for log_file_i in range(len(log_files)):
-                                bytes_per_seconds.append(
-                                    bytes[log_file_i]
-                                    / current_timecosts[f"{method_name}-Step-{i}"][
-                                        "total"
-                                    ][log_file_i]
-                                )
-                            ret["bytes_per_second"][f"{setup_name}.{instance_name}"][
-                                f"{method_name}-Step-{i}"
-                            ] = bytes_per_seconds
-
-            ret["timecost"][f"{setup_name}.{instance_name}"] = current_timecosts
+    Args:
+    - party_timecosts (dict): The time costs of each party, aligned by run, e.g.
+      `get_exp23_compute_party_data()["timecost"][cell]["total"]`.
+
+    Returns:
+    - dict: For each run, the `max` and `min` time cost over parties, their difference `spread`, and the
+      `slowest_party` (None if several parties share the maximum).
+    """
+    party_names = list(party_timecosts.keys())
+    ret = {"max": [], "min": [], "spread": [], "slowest_party": []}
+    for run_timecosts in zip(*party_timecosts.values()):
+        max_timecost = max(run_timecosts)
+        min_timecost = min(run_timecosts)
+        slowest = [
+            party_name
+            for party_name, timecost in zip(party_names, run_timecosts)
+            if timecost == max_timecost
+        ]
+        ret["max"].append(max_timecost)
+        ret["min"].append(min_timecost)
+        ret["spread"].append(max_timecost - min_timecost)
+        ret["slowest_party"].append(slowest[0] if len(slowest) == 1 else None)
+    return ret
+
+
+def find_slowest_parties(
+    party_timecosts_of_cells: Dict[str, Dict[str, List[float]]],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Finds the party that is the slowest most often, for each setup.
+
+    Args:
+    - party_timecosts_of_cells (dict): `{cell: {"party{i}": [time cost of each run]}}`, where a cell name starts
+      with its setup, e.g. `mpc-8t.exp3_16`.
+
+    Returns:
+    - dict: For each setup, the number of `runs` with a single slowest party, how often each party was the
+      slowest (`slowest_counts`), the most frequent one (`slowest_party`) and its `share` of the runs, and the
+      mean `spread` between the slowest and the fastest party.
+    """
+    ret: Dict[str, Dict[str, Any]] = {}
+    for cell_name, party_timecosts in party_timecosts_of_cells.items():
+        setup_name = cell_name.split(".")[0]
+        if setup_name not in ret:
+            ret[setup_name] = {"runs": 0, "slowest_counts": {}, "spreads": []}
+        skew = get_party_skew(party_timecosts)
+        ret[setup_name]["spreads"].extend(skew["spread"])
+        for slowest_party in skew["slowest_party"]:
+            if slowest_party is None:
+                continue
+            counts = ret[setup_name]["slowest_counts"]
+            counts[slowest_party] = counts.get(slowest_party, 0) + 1
+            ret[setup_name]["runs"] += 1
+
+    for setup_data in ret.values():
+        counts = setup_data["slowest_counts"]
+        spreads = setup_data.pop("spreads")
+        setup_data["slowest_party"] = max(counts, key=counts.get) if counts else None
+        setup_data["share"] = (
+            counts[setup_data["slowest_party"]] / setup_data["runs"] if counts else 0
+        )
+        setup_data["spread"] = sum(spreads) / len(spreads) if spreads else 0
+    return ret
+
+
+RESOURCE_METRICS = [
+    "peak_rss",
+    "cpu_seconds",
+    "cpu_utilization",
+    "read_bytes",
+    "write_bytes",
+]
+
+RESOURCE_PHASES = ["connect", "setup", "prove", "verify"]
+
+
+def get_exp1_compute_resource_data(
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+    index: Optional[RawDataIndex] = None,
+) -> Dict[str, Dict[str, Dict[str, List[float]]]]:
+    return get_compute_resource_data(
+        get_exp1_compute_party_cells(get_raw_data_index(index)), jobs, cache
+    )
+
+
+def get_exp23_compute_resource_data(
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+    index: Optional[RawDataIndex] = None,
+) -> Dict[str, Dict[str, Dict[str, List[float]]]]:
+    return get_compute_resource_data(
+        get_exp23_compute_party_cells(get_raw_data_index(index)), jobs, cache
+    )
+
+
+def get_resource_runs(
+    runs: List[List[str]], get_resources_file: Callable
+) -> List[List[str]]:
+    """
+    Returns the `.resources` files of the runs that have one for every party, e.g. not the runs of older
+    launchers.
+    """
+    ret = []
+    for run in runs:
+        resources_files = [get_resources_file(log_file) for log_file in run]
+        if all(path_exists(resources_file) for resources_file in resources_files):
+            ret.append(resources_files)
+    return ret
+
+
+def get_compute_resource_data(
+    cells: List[Tuple[str, List[List[str]]]],
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+) -> Dict[str, Dict[str, Dict[str, List[float]]]]:
+    """
+    Reads the `.resources` files written by `proc_sampler.py` next to the compute logs of every party.
+
+    Returns:
+    - dict: `ret[metric][cell]["party{i}"]` is the metric of party i in each run, for each metric of
+      `RESOURCE_METRICS`. Runs without a `.resources` file for every party are left out.
+    """
+    ret: Dict[str, Dict[str, Dict[str, List[float]]]] = {
+        metric_name: {} for metric_name in RESOURCE_METRICS
+    }
+    cells = [
+        (cell_name, get_resource_runs(runs, get_compute_resources_file))
+        for cell_name, runs in cells
+    ]
+    usages = parse_files(
+        get_compute_resource_usage_from_file,
+        [
+            (resources_file,)
+            for _, runs in cells
+            for run in runs
+            for resources_file in run
+        ],
+        jobs,
+        cache,
+    )
+
+    position = 0
+    for cell_name, runs in cells:
+        if len(runs) == 0:
+            continue
+        for metric_name in RESOURCE_METRICS:
+            ret[metric_name][cell_name] = {
+                f"party{party_index}": [
+                    getattr(usages[position + i * len(run) + party_index], metric_name)
+                    for i, run in enumerate(runs)
+                ]
+                for party_index in range(len(runs[0]))
+            }
+        position += sum(len(run) for run in runs)
+
+    return ret
+
+
+def get_exp1_zkp_resource_data(
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+    index: Optional[RawDataIndex] = None,
+) -> Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]:
+    return get_zkp_resource_data(
+        get_exp1_zkp_party_cells(get_raw_data_index(index)), jobs, cache
+    )
+
+
+def get_exp23_zkp_resource_data(
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+    index: Optional[RawDataIndex] = None,
+) -> Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]:
+    return get_zkp_resource_data(
+        get_exp23_zkp_party_cells(get_raw_data_index(index)), jobs, cache
+    )
+
+
+def get_zkp_resource_data(
+    cells: List[Tuple[str, str, List[List[str]]]],
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+) -> Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]:
+    """
+    Reads the `.resources` files written by `prove-r1cs-multiparty-inner.py` next to the ZKP logs of every party.
+
+    Returns:
+    - dict: `ret[metric][cell][circuit]["party{i}"]` is the metric of party i in each run, for each metric of
+      `RESOURCE_METRICS`. `ret["peak_rss_by_phase"][cell][circuit]["party{i}"][phase]` is the highest resident
+      set size sampled during each phase of `RESOURCE_PHASES`, 0 if no sample was taken in it. Runs without a
+      `.resources` file for every party are left out.
+    """
+    ret: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]] = {
+        metric_name: {} for metric_name in RESOURCE_METRICS + ["peak_rss_by_phase"]
+    }
+    cells = [
+        (cell_name, circuit_name, get_resource_runs(runs, get_zkp_resources_file))
+        for cell_name, circuit_name, runs in cells
+    ]
+    usages = parse_files(
+        get_zkp_resource_usage_from_file,
+        [
+            (resources_file,)
+            for _, _, runs in cells
+            for run in runs
+            for resources_file in run
+        ],
+        jobs,
+        cache,
+    )
+
+    position = 0
+    for cell_name, circuit_name, runs in cells:
+        if len(runs) == 0:
+            continue
+        party_usages = {
+            f"party{party_index}": [
+                usages[position + i * len(run) + party_index]
+                for i, run in enumerate(runs)
+            ]
+            for party_index in range(len(runs[0]))
+        }
+        position += sum(len(run) for run in runs)
+
+        for metric_name in RESOURCE_METRICS:
+            ret[metric_name].setdefault(cell_name, {})[circuit_name] = {
+                party_name: [getattr(usage, metric_name) for usage in usages_of_party]
+                for party_name, usages_of_party in party_usages.items()
+            }
+        ret["peak_rss_by_phase"].setdefault(cell_name, {})[circuit_name] = {
+            party_name: {
+                phase: [
+                    usage.peak_rss_by_phase.get(phase, 0) for usage in usages_of_party
+                ]
+                for phase in RESOURCE_PHASES
+            }
+            for party_name, usages_of_party in party_usages.items()
+        }
 
     return ret
 
 
+class ZkpTraffic(NamedTuple):
+    """
+    The bytes sent over each link between the parties of a ZKP run, as written by the prove scripts to the
+    `.all.traffic` file.
+    """
+
+    parties: int
+    # Seconds all parties were connected, from the last `End: Connecting` to the last exit
+    seconds: float
+    # `bytes_sent[i][j]` is the number of bytes party i sent to party j
+    bytes_sent: List[List[int]]
+    bytes_per_second: List[List[float]]
+    # Bytes each party sent to peers that are not parties
+    unresolved_bytes: List[int]
+
+
+def get_zkp_traffic_from_file(filename: str) -> ZkpTraffic:
+    with open_raw_file(filename) as file:
+        traffic = json.load(file)
+    return ZkpTraffic(
+        traffic["parties"],
+        traffic["seconds"],
+        traffic["bytes_sent"],
+        traffic["bytes_per_second"],
+        traffic["unresolved_bytes"],
+    )
+
+
+def get_zkp_traffic_files(index: Optional[RawDataIndex] = None) -> Dict[str, List[str]]:
+    """
+    Returns the `.all.traffic` files of each setup, sorted by name.
+    """
+    ret: Dict[str, List[str]] = {}
+    for key, paths in get_raw_data_index(index).zkp_logs.items():
+        if key.stream == "traffic":
+            ret.setdefault(key.setup, []).extend(paths)
+    return {setup_name: sorted(paths) for setup_name, paths in ret.items()}
+
+
+class ZkpLogRecord(NamedTuple):
+    total: float
+    step_timecost: Dict[str, float]
+    bytes_sent: Optional[int]
+
+
+def get_zkp_stdout_file(stderr_file: str) -> str:
+    return stderr_file.removesuffix(".stderr") + ".stdout"
+
+
+def get_zkp_resources_file(stderr_file: str) -> str:
+    return stderr_file.removesuffix(".stderr") + ".resources"
+
+
+def get_compute_resources_file(log_file: str) -> str:
+    return log_file.removesuffix(".txt") + ".resources"
+
+
+def get_zkp_timing_file(stderr_file: str) -> str:
+    return stderr_file.removesuffix(".stderr") + ".timing"
+
+
+class ZkpTiming(NamedTuple):
+    """
+    Timestamps of a prover process, in nanoseconds, as written by the prove scripts to the `.timing` file.
+    """
+
+    clock: str
+    start_ns: int
+    ready_ns: Optional[int]
+    end_ns: Optional[int]
+
+    def total(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e9
+
+
+def get_zkp_timing_from_file(filename: str) -> Optional[ZkpTiming]:
+    """
+    Reads a `.timing` file. Returns None if it does not exist, e.g. for logs of older runs.
+    """
+    try:
+        with open_raw_file(filename) as file:
+            timing = json.load(file)
+    except FileNotFoundError:
+        return None
+    return ZkpTiming(
+        timing["clock"], timing["start_ns"], timing["ready_ns"], timing["end_ns"]
+    )
+
+
+def get_zkp_record_from_stderr_file(
+    filename: str, with_bytes_sent: bool
+) -> ZkpLogRecord:
+    """
+    Parses a ZKP `.stderr` file and its `.stdout` sibling.
+
+    Args:
+    - filename (str): Path to the `.stderr` file.
+    - with_bytes_sent (bool): Whether to also extract the bytes sent, which only MPC runs report.
+
+    Returns:
+    - ZkpLogRecord: The total time cost, the setup/prove/verify time costs and the bytes sent
+      (None if not requested). The total comes from the `.timing` sibling if there is one, and from
+      the timestamps in the `.stderr` file, which only have a resolution of one second, otherwise.
+    """
+    timing = get_zkp_timing_from_file(get_zkp_timing_file(filename))
+    total = timing.total() if timing is not None else None
+    return ZkpLogRecord(
+        (
+            total
+            if total is not None
+            else get_zkp_total_timecost_from_stderr_file(filename)
+        ),
+        get_zkp_step_timecost_from_stdout_file(get_zkp_stdout_file(filename)),
+        get_zkp_bytes_sent_from_stderr_file(filename) if with_bytes_sent else None,
+    )
+
+
+# Bump the version of a parser whenever its output changes, so that cached results get re-parsed
+PARSER_VERSIONS = {
+    "get_compute_timecost_from_log_file": 1,
+    "get_compute_record_from_log_file": 2,
+    "get_zkp_record_from_stderr_file": 2,
+    "get_compute_resource_usage_from_file": 1,
+    "get_zkp_resource_usage_from_file": 1,
+}
+
+
+def get_parser_input_files(parser: Callable, args: Tuple) -> List[str]:
+    if parser is get_zkp_record_from_stderr_file:
+        files = [args[0], get_zkp_stdout_file(args[0])]
+        # The .timing file is optional. Once it appears the file list changes, so the entry is parsed again
+        if path_exists(get_zkp_timing_file(args[0])):
+            files.append(get_zkp_timing_file(args[0]))
+        return files
+    if parser is get_zkp_resource_usage_from_file:
+        # The phases of the samples come from the spans in metrics.jsonl, checked against the stdout file
+        stdout_file = get_zkp_stdout_file(
+            args[0].removesuffix(".resources") + ".stderr"
+        )
+        files = [args[0], stdout_file]
+        metrics_file = os.path.join(os.path.dirname(args[0]), ZKP_METRICS_FILE)
+        if path_exists(metrics_file):
+            files.append(metrics_file)
+        return files
+    return [args[0]]
+
+
+def parse_files(
+    parser: Callable,
+    tasks: List[Tuple],
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+) -> List:
+    """
+    Calls `parser(*task)` for each task, optionally in a process pool and through a parse cache.
+
+    Args:
+    - parser (Callable): A module-level parser listed in `PARSER_VERSIONS`. Its first argument is the file path.
+    - tasks (list): Argument tuples of each call.
+    - jobs (int): Number of worker processes. 1 parses everything in the current process.
+    - cache (ParseCache, optional): Serves unchanged files from the cache and stores newly parsed ones.
+
+    Returns:
+    - list: The parser outputs, in the same order as the tasks.
+    """
+    results = [None] * len(tasks)
+    missed = []
+    for i, task in enumerate(tasks):
+        if cache is not None:
+            hit, value = cache.get(
+                parser.__name__,
+                PARSER_VERSIONS[parser.__name__],
+                task,
+                get_parser_input_files(parser, task),
+            )
+            if hit:
+                results[i] = value
+                continue
+        missed.append(i)
+
+    if jobs <= 1 or len(missed) <= 1:
+        values = [parser(*tasks[i]) for i in missed]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            # map() keeps the submission order, so the merge below is deterministic
+            values = list(
+                executor.map(
+                    parser,
+                    *zip(*[tasks[i] for i in missed]),
+                    chunksize=max(1, len(missed) // (jobs * 4)),
+                )
+            )
+
+    for i, value in zip(missed, values):
+        results[i] = value
+        if cache is not None:
+            cache.put(
+                parser.__name__,
+                PARSER_VERSIONS[parser.__name__],
+                tasks[i],
+                get_parser_input_files(parser, tasks[i]),
+                value,
+            )
+    return results
+
+
+def parse_zkp_log_files(
+    cells: List[Tuple[List[str], bool]],
+    jobs: int = 1,
+    cache: Optional[ParseCache] = None,
+) -> List[List[ZkpLogRecord]]:
+    """
+    Parses the `.stderr`/`.stdout` pairs of many cells at once.
+
+    Args:
+    - cells (list): One `(stderr_files, with_bytes_sent)` tuple per cell.
+    - jobs (int): Number of worker processes. 1 parses everything in the current process.
+    - cache (ParseCache, optional): Parse cache passed to `parse_files`.
+
+    Returns:
+    - list: For each cell, the records of its files, in the same order as given.
+    """
+    flat_records = parse_files(
+        get_zkp_record_from_stderr_file,
+        [
+            (log_file, with_bytes_sent)
+            for log_files, with_bytes_sent in cells
+            for log_file in log_files
+        ],
+        jobs,
+        cache,
+    )
+
+    ret = []
+    position = 0
+    for log_files, _ in cells:
+        ret.append(flat_records[position : position + len(log_files)])
+        position += len(log_files)
+    return ret
+
+
+def aggregate_zkp_records(
+    records: List[ZkpLogRecord], party_count: int
+) -> Tuple[Dict[str, List[float]], List[float]]:
+    # process timecost
+    current_timecosts = {
+        "total": [],
+        "setup": [],
+        "prove": [],
+        "verify": [],
+    }
+    for record in records:
+        current_timecosts["total"].append(record.total)
+        for k, v in record.step_timecost.items():
+            current_timecosts[k].append(v)
+
+    # process bytes
+    bytes_per_seconds = []
+    if party_count > 1:
+        for record in records:
+            bytes_per_seconds.append(
+                record.bytes_sent
+                / (party_count - 1)  # for each party, compute the per-party bandwidth
+                / record.total
+            )
+
+    return current_timecosts, bytes_per_seconds
+
+
 def get_zkp_total_timecost_from_stderr_file(filename: str) -> int:
     sys.stderr.write("get_zkp_total_timecost_from_stderr_file:" + filename + "\n")
     # Initialize variables for start and end times
     start_time, end_time = None, None
 
-    with open(filename, "r") as file:
+    with open_raw_log(filename) as file:
         # Read all lines from the file
         lines = [line.strip() for line in file.readlines()]
 
@@ -549,46 +1342,61 @@ def get_zkp_total_timecost_from_stderr_file(filename: str) -> int:
         raise ValueError("File must contain at least one non-empty line.")
 
 
-def get_zkp_bytes_sent_from_stderr_file(file_path: str) -> int:
-    sys.stderr.write("get_zkp_bytes_sent_from_stderr_file:" + file_path + "\n")
-    # The regex pattern to capture the bytes sent line
-    bytes_sent_pattern = re.compile(r"bytes_sent: (\d+),")
+REVERSE_READ_BLOCK_SIZE = 1 << 16
 
-    # Start reading from the bottom of the file
-    with open(file_path, "rb") as file:
-        # Go to the end of the file
-        file.seek(0, 2)
-
-        # Position in file
-        position = file.tell()
-        line = ""
-
-        # Looping backwards to read the file from the end
-        while position >= 0:
-            file.seek(position)
-            char = file.read(1).decode()
-
-            if char == "\n":
-                # Process the line
-                match = bytes_sent_pattern.search(line.strip())
-                if match:
-                    total_bytes_sent = int(match.group(1))
-                    return total_bytes_sent
-
-                # Reset line and continue
-                line = ""
-            else:
-                line = char + line
+# The regex pattern to capture the bytes sent line
+ZKP_BYTES_SENT_PATTERN = re.compile(r"bytes_sent: (\d+),")
 
-            # Move one character back
-            position -= 1
 
-        # Check the first line of the file if no newline at the start
-        if line:
-            match = bytes_sent_pattern.search(line.strip())
-            if match:
-                total_bytes_sent = int(match.group(1))
-                return total_bytes_sent
+def read_lines_reversed(
+    file_path: str,
+    stop: Optional[Callable[[str], bool]] = None,
+    block_size: int = REVERSE_READ_BLOCK_SIZE,
+) -> Iterator[str]:
+    """
+    Yields the lines of a file from the last one to the first one, without line endings.
+
+    The file is read backwards in blocks of `block_size` bytes, so finding a line near the end
+    of a large file only costs a few reads. Compressed files are read backwards one compressed
+    block at a time, see `raw_data_archive.read_raw_blocks_reversed`.
+
+    Args:
+    - file_path (str): Path to the file to be read.
+    - stop (Callable[[str], bool], optional): Called with each yielded line once the consumer asks
+      for the next one. Iteration ends as soon as it returns True.
+    - block_size (int): Number of bytes read per seek of a plain file.
+    """
+    remainder = b""
+    # A trailing newline terminates the last line, it does not start an empty one
+    skip_empty_tail = True
+
+    for block in read_raw_blocks_reversed(file_path, block_size):
+        # Prepend new data to complete the partial first line of the previous block
+        lines = (block + remainder).split(b"\n")
+
+        # Unless we reached the beginning of the file, the first item might be a partial line
+        remainder = lines[0]
+        for line in reversed(lines[1:]):
+            if skip_empty_tail:
+                skip_empty_tail = False
+                if not line:
+                    continue
+            decoded_line = line.decode()
+            yield decoded_line
+            if stop is not None and stop(decoded_line):
+                return
+
+    if remainder or not skip_empty_tail:
+        yield remainder.decode()
+
+
+def get_zkp_bytes_sent_from_stderr_file(file_path: str) -> int:
+    sys.stderr.write("get_zkp_bytes_sent_from_stderr_file:" + file_path + "\n")
+    # Start reading from the bottom of the file
+    for line in read_lines_reversed(file_path):
+        match = ZKP_BYTES_SENT_PATTERN.search(line)
+        if match:
+            return int(match.group(1))
 
     # Return an error or zero if no matching pattern found
     raise ValueError("No 'bytes_sent' pattern found in the log file")
@@ -596,119 +1404,39 @@ def get_zkp_bytes_sent_from_stderr_file(file_path: str) -> int:
 
 def get_preshare_value_usage_from_log_file(file_path: str) -> Dict[str, int]:
     sys.stderr.write("get_preshare_value_usage_from_log_file:" + file_path + "\n")
-    # Define the keys we are looking for
-    share_keys = [
-        "FieldBeaverTripleShare",
-        "BoolBeaverTripleShare",
-        "EdaBitsKaiShare",
-        "DaBitPrioPlusShare",
-    ]
-
     # Initialize the dictionary with None values
-    share_values = {key: None for key in share_keys}
-
-    # Some configurations
-    chunk_size = 4096  # Size of chunk to read at a time from the end of file
-
-    with open(file_path, "rb") as file:
-        # Move to the end of the file
-        file.seek(0, 2)
-        end_of_file = file.tell()
-
-        # Start reading from the end
-        position = end_of_file
-        buffer = ""
-
-        while True:
-            size_to_read = min(chunk_size, position)
-            position -= size_to_read
-            file.seek(position)
-            data = file.read(size_to_read).decode("utf-8")
-
-            # Prepend new data to cope with any half-read last line from previous chunk
-            buffer = data + buffer
-            lines = buffer.split("\n")
+    share_values = {key: None for key in PRESHARE_KEYS}
+
+    # We read the file from the end, so the values reported last are found first.
+    # If all values are found, no need to continue processing
+    for line in read_lines_reversed(
+        file_path,
+        stop=lambda _: all(value is not None for value in share_values.values()),
+    ):
+        for key in PRESHARE_KEYS:
+            if key in line:
+                # Extract the value and convert it to int
+                try:
+                    share_values[key] = int(line.strip().split()[-1])
+                except ValueError:
+                    pass
 
-            # If this chunk does not reach to beginning of file, hold the first item as it might be a partial line
-            if position != 0:
-                buffer = lines.pop(0)
-            else:
-                buffer = ""
-
-            # Process each full line
-            for line in reversed(
-                lines
-            ):  # We read the file from the end so we have to reverse lines
-                if all(value is not None for value in share_values.values()):
-                    # If all values are found, no need to continue processing
-                    break
-                for key in share_keys:
-                    if key in line:
-                        # Extract the value and convert it to int
-                        try:
-                            value = int(line.strip().split()[-1])
-                            share_values[key] = value
-                        except ValueError:
-                            pass
-            if position == 0:
-                break
-        # If a key was not found, default it to 0
-        for key in share_keys:
-            if share_values[key] is None:
-                share_values[key] = 0
+    # If a key was not found, default it to 0
+    for key in PRESHARE_KEYS:
+        if share_values[key] is None:
+            share_values[key] = 0
 
     return share_values
 
 
 def get_compute_total_bytes_sent_from_log_file(file_path: str) -> int:
     sys.stderr.write("get_compute_total_bytes_sent_from_log_file:" + file_path + "\n")
-    # The regex pattern to capture necessary log lines
-    sent_pattern = re.compile(
-        r"Total sent \(all parties\): (\d+) bytes|Total sent: (\d+) bytes"
-    )
-
     # Start reading from the bottom of the file
-    with open(file_path, "rb") as file:
-        # Go to the end of the file
-        file.seek(0, 2)
-
-        # Position in file
-        position = file.tell()
-        line = ""
-
-        # Looping backwards to read the file from the end
-        while position >= 0:
-            file.seek(position)
-            char = file.read(1).decode()
-
-            if char == "\n":
-                # Process the line
-                match = sent_pattern.search(line.strip())
-                if match:
-                    # Extract the first found group which is not None
-                    total_bytes_sent = next(
-                        (int(num) for num in match.groups() if num is not None), None
-                    )
-                    if total_bytes_sent is not None:
-                        return total_bytes_sent
-
-                # Reset line and continue
-                line = ""
-            else:
-                line = char + line
-
-            # Move one character back
-            position -= 1
-
-        # Check the first line of the file if no newline at the start
-        if line:
-            match = sent_pattern.search(line.strip())
-            if match:
-                total_bytes_sent = next(
-                    (int(num) for num in match.groups() if num is not None), None
-                )
-                if total_bytes_sent is not None:
-                    return total_bytes_sent
+    for line in read_lines_reversed(file_path):
+        match = COMPUTE_SENT_PATTERN.search(line)
+        if match:
+            # Extract the first found group which is not None
+            return int(match.group(1) or match.group(2))
 
     # Return an error or zero if no matching pattern found
     raise ValueError("No matching pattern found in the log file")
@@ -728,7 +1456,7 @@ def get_compute_timecost_from_log_file(file_path: str) -> Dict[str, float]:
     sys.stderr.write("get_compute_timecost_from_log_file:" + file_path + "\n")
     results = {}
 
-    with open(file_path, "r") as file:
+    with open_raw_log(file_path) as file:
         read_total_time = False
         read_step_time = False
 
@@ -774,68 +1502,326 @@ def get_compute_timecost_from_log_file(file_path: str) -> Dict[str, float]:
     return results
 
 
+class ComputeLogRecord(NamedTuple):
+    timecost: Dict[str, float]
+    preshare_usage: Dict[str, int]
+    total_bytes_sent: Optional[int]
+
+
+class ComputeLogParser:
+    """
+    Extracts a `ComputeLogRecord` from the lines of a compute log, fed one at a time.
+
+    `record()` can be called at any point, which also makes it usable on logs that are still being written.
+    """
+
+    def __init__(self):
+        self.timecost: Dict[str, float] = {}
+        self.preshare_usage: Dict[str, int] = {key: 0 for key in PRESHARE_KEYS}
+        self.total_bytes_sent: Optional[int] = None
+
+        self.read_total_time = False
+        self.read_step_time = False
+        self.timecost_done = False
+
+    def feed(self, line: str) -> None:
+        # Cheap substring checks first, most lines are none of these
+        if "Total sent" in line:
+            match = COMPUTE_SENT_PATTERN.search(line)
+            if match:
+                self.total_bytes_sent = int(match.group(1) or match.group(2))
+            # Falls through, since the line can still end the time cost block
+
+        elif "Share" in line:
+            for key in PRESHARE_KEYS:
+                if key in line:
+                    try:
+                        self.preshare_usage[key] = int(line.strip().split()[-1])
+                    except ValueError:
+                        pass
+
+        if self.timecost_done:
+            return
+
+        cleaned_line = (
+            line.strip().split("]")[1] if "]" in line else line.strip()
+        )  # Remove timestamp and "[Information]"
+
+        if not self.read_total_time:
+            if "Total time cost:" in cleaned_line:
+                try:
+                    self.timecost["total"] = float(
+                        cleaned_line.split("Total time cost:")[1]
+                        .split("seconds")[0]
+                        .strip()
+                    )
+                    self.read_total_time = True
+                except ValueError:
+                    raise Exception("Error extracting the total time cost.")
+
+        # After finding "Total time cost", check if the next line is about "Step time costs"
+        elif not self.read_step_time:
+            if "Step time costs" in cleaned_line:
+                self.read_step_time = True
+            else:
+                self.timecost_done = True
+
+        # Process each step time cost
+        elif ":" in cleaned_line and "seconds" in cleaned_line:
+            try:
+                parts = cleaned_line.split(":")
+                method_name = parts[0].strip()
+                self.timecost[method_name] = float(parts[1].split("seconds")[0].strip())
+            except ValueError:
+                raise Exception("Error extracting step time.")
+        else:
+            # Stops reading step times once the expected string format is not found
+            self.timecost_done = True
+
+    def record(self) -> ComputeLogRecord:
+        return ComputeLogRecord(
+            dict(self.timecost), dict(self.preshare_usage), self.total_bytes_sent
+        )
+
+
+def get_compute_record_from_log_file(file_path: str) -> ComputeLogRecord:
+    """
+    Reads a compute log once and extracts everything the compute stage needs from it.
+
+    This is equivalent to calling `get_compute_timecost_from_log_file`,
+    `get_preshare_value_usage_from_log_file` and `get_compute_total_bytes_sent_from_log_file`
+    on the same file, but the file is only opened and scanned a single time.
+
+    Args:
+    - file_path (str): Path to the compute log file.
+
+    Returns:
+    - ComputeLogRecord: The time costs (first "Total time cost" block, as returned by
+      `get_compute_timecost_from_log_file`), the last reported preshare usage of each kind
+      (0 if never reported) and the last reported total bytes sent (None if never reported).
+    """
+    sys.stderr.write("get_compute_record_from_log_file:" + file_path + "\n")
+    parser = ComputeLogParser()
+    with open_raw_log(file_path) as file:
+        for line in file:
+            parser.feed(line)
+    return parser.record()
+
+
+def require_compute_total_bytes_sent(file_path: str, record: ComputeLogRecord) -> int:
+    if record.total_bytes_sent is None:
+        raise ValueError(f"No matching pattern found in the log file {file_path}")
+    return record.total_bytes_sent
+
+
+class ZkpStderrParser:
+    """
+    Extracts the start and end timestamps and the bytes sent from a ZKP `.stderr` file, fed one line at a time.
+
+    The launcher writes `int(time.time())` as the first and the last line. `end_time` stays None until the
+    last line has been written.
+    """
+
+    def __init__(self):
+        self.start_time: Optional[int] = None
+        self.end_time: Optional[int] = None
+        self.bytes_sent: Optional[int] = None
+
+    def feed(self, line: str) -> None:
+        line = line.strip()
+        if not line:
+            return
+        if "bytes_sent" in line:
+            match = ZKP_BYTES_SENT_PATTERN.search(line)
+            if match:
+                self.bytes_sent = int(match.group(1))
+            return
+        try:
+            timestamp = int(line)
+        except ValueError:
+            return
+        if self.start_time is None:
+            self.start_time = timestamp
+        else:
+            self.end_time = timestamp
+
+    def total(self) -> Optional[int]:
+        if self.start_time is None or self.end_time is None:
+            return None
+        return self.end_time - self.start_time
+
+
+# Written by `prove-r1cs-multiparty-inner.py` next to the logs, one line per prover run
+ZKP_METRICS_FILE = "metrics.jsonl"
+
+# Metrics files already read, by path, with the identity of the file they were read from
+zkp_metrics_by_file: Dict[str, Tuple[str, Dict[str, Dict[str, Any]]]] = {}
+
+
+def get_zkp_metrics_from_file(filename: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Reads a `metrics.jsonl` file, once per process as long as it does not change.
+
+    Returns:
+    - dict: The last record of each `.stdout` file name. Empty if the file does not exist.
+    """
+    version = get_file_identity(filename)
+    if version is None:
+        return {}
+    if filename in zkp_metrics_by_file and zkp_metrics_by_file[filename][0] == version:
+        return zkp_metrics_by_file[filename][1]
+
+    sys.stderr.write("get_zkp_metrics_from_file:" + filename + "\n")
+    records = {}
+    with open_raw_file(filename, encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by a crash of the launcher
+                continue
+            records[record["stdout"]] = record
+    zkp_metrics_by_file[filename] = (version, records)
+    return records
+
+
+def get_zkp_metrics_record(filename: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the record of a `.stdout` file in the `metrics.jsonl` file next to it, or None if it has no record
+    of the file, or the file changed since the record was written.
+    """
+    record = get_zkp_metrics_from_file(
+        os.path.join(os.path.dirname(filename), ZKP_METRICS_FILE)
+    ).get(os.path.basename(filename))
+    if record is None:
+        return None
+    # Compressed files are compared by their size on disk
+    stdout_file = resolve_raw_log_file(filename)
+    if not path_exists(stdout_file) or record.get(
+        "stdout_file_bytes", record["stdout_bytes"]
+    ) != get_file_size(stdout_file):
+        return None
+    return record
+
+
+def get_zkp_step_timecost_from_metrics(filename: str) -> Optional[Dict[str, float]]:
+    """
+    Returns the step time costs of a `.stdout` file from its `metrics.jsonl` record, see `get_zkp_metrics_record`.
+    """
+    record = get_zkp_metrics_record(filename)
+    if record is None:
+        return None
+    parser = ZkpStdoutParser()
+    for label, timecost in record["spans"]:
+        parser.add(label, timecost)
+    return parser.step_timecost
+
+
 def get_zkp_step_timecost_from_stdout_file(filename: str) -> Dict[str, float]:
+    """
+    Returns the setup/prove/verify time costs of a ZKP `.stdout` file. They are taken from the `metrics.jsonl`
+    record of the file if there is one, and parsed from the file itself otherwise.
+    """
+    step_timecost = get_zkp_step_timecost_from_metrics(filename)
+    if step_timecost is not None:
+        return step_timecost
+
     sys.stderr.write("get_zkp_step_timecost_from_stdout_file:" + filename + "\n")
-    results = []
-    with open(filename, "r") as file:
+    parser = ZkpStdoutParser()
+    with open_raw_log(filename) as file:
         for line in file:
-            if line.startswith("End:"):
-                # Adjust the regular expression to ignore the dots before the time value
-                match = re.match(
-                    r"End:\s+(.*?)\s*\.*\s*([\d\.]+)(s|ms|µs|ns)", line.strip()
-                )
-                if match:
-                    label = match.group(1)
-                    time_value = float(match.group(2))
-                    unit = match.group(3)
+            parser.feed(line)
+    return parser.step_timecost
 
-                    # Convert time based on the unit
-                    if unit == "s":
-                        pass
-                    elif unit == "ms":
-                        time_value = time_value / 1000
-                    elif unit == "µs":
-                        time_value = time_value / 1000000
-                    elif unit == "ns":
-                        time_value = time_value / 1000000000
-                    else:
-                        raise Exception(f"Unknown unit {unit}")
-
-                    # Add to results
-                    results.append((label, time_value))
-                else:
-                    print(f"unrecognized line: {line}")
 
-    del line
-    del time_value
-    del unit
+class ResourceUsage(NamedTuple):
+    """
+    Summary of the `.resources` time series of a process, see `scripts/prove-scripts/proc_sampler.py`.
+    """
+
+    # Seconds from the start of the process to the last sample
+    duration: float
+    cpu_seconds: float
+    # CPU seconds per second, i.e. the average number of busy cores
+    cpu_utilization: float
+    # Bytes
+    peak_rss: int
+    read_bytes: int
+    write_bytes: int
+    # The highest sampled resident set size in bytes of each phase, if the top-level spans are known
+    peak_rss_by_phase: Dict[str, int]
 
-    results_classified = {
-        "setup": 0,
-        "prove": 0,
-        "verify": 0,
-    }
-    # classify names
-    for label, timecost in results:
-        if label == "Connecting":
-            pass
-        elif (
-            label.startswith("KZG10::Setup")
-            or label.startswith("Constructing `powers`")
-            or label.startswith("Constructing `shifted_powers`")
-            or label == "Committing to polynomials"
-        ):
-            results_classified["setup"] += timecost
-        elif label in [
-            "commit: p",
-            "prove_public",
-            "prove_gates",
-            "prove_wiring",
-            "timed section",
-        ]:
-            results_classified["prove"] += timecost
-        elif label == "Checking evaluations":
-            results_classified["verify"] += timecost
-        else:
-            raise Exception(f"Unrecognized label {label}")
-    return results_classified
+
+def read_resources_file(filename: str) -> Dict[str, List[int]]:
+    """
+    Reads a `.resources` file into one column per header field.
+    """
+    with open_raw_file(filename) as file:
+        version_line = file.readline()
+        if not version_line.startswith("# resources "):
+            raise ValueError(f"Not a resources file: {filename}")
+        header = file.readline().split()
+        columns: Dict[str, List[int]] = {name: [] for name in header}
+        for line in file:
+            values = line.split()
+            # A line cut short by a crash of the sampler is dropped
+            if len(values) != len(header):
+                continue
+            for name, value in zip(header, values):
+                columns[name].append(int(value))
+    return columns
+
+
+def get_resource_usage(
+    columns: Dict[str, List[int]], spans: Optional[List[Tuple[str, float]]]
+) -> ResourceUsage:
+    """
+    Args:
+    - columns (dict): The columns of a `.resources` file.
+    - spans (list, optional): The `(label, seconds)` top-level spans of the process, to attribute the samples
+      to phases.
+    """
+    if len(columns["elapsed_ms"]) == 0:
+        return ResourceUsage(0.0, 0.0, 0.0, 0, 0, 0, {})
+
+    duration = columns["elapsed_ms"][-1] / 1e3
+    cpu_seconds = columns["cpu_ms"][-1] / 1e3
+    peak_rss_by_phase: Dict[str, int] = {}
+    if spans is not None:
+        for span_index, rss_kb in zip(columns["span"], columns["rss_kb"]):
+            if not 0 <= span_index < len(spans):
+                continue
+            try:
+                phase = classify_zkp_step_label(spans[span_index][0])
+            except Exception:
+                continue
+            phase = phase if phase is not None else "connect"
+            peak_rss_by_phase[phase] = max(
+                peak_rss_by_phase.get(phase, 0), rss_kb * 1024
+            )
+
+    return ResourceUsage(
+        duration,
+        cpu_seconds,
+        cpu_seconds / duration if duration > 0 else 0.0,
+        max(columns["hwm_kb"]) * 1024,
+        max(0, columns["read_bytes"][-1]),
+        max(0, columns["write_bytes"][-1]),
+        peak_rss_by_phase,
+    )
+
+
+def get_compute_resource_usage_from_file(filename: str) -> ResourceUsage:
+    sys.stderr.write("get_compute_resource_usage_from_file:" + filename + "\n")
+    return get_resource_usage(read_resources_file(filename), None)
+
+
+def get_zkp_resource_usage_from_file(filename: str) -> ResourceUsage:
+    """
+    Summarizes the `.resources` file of a prover process. The samples are attributed to the setup/prove/verify
+    phases with the spans of its `metrics.jsonl` record, if it still matches the `.stdout` file.
+    """
+    sys.stderr.write("get_zkp_resource_usage_from_file:" + filename + "\n")
+    record = get_zkp_metrics_record(filename.removesuffix(".resources") + ".stdout")
+    spans = record["spans"] if record is not None else None
+    return get_resource_usage(read_resources_file(filename), spans)
@@ -0,0 +1,100 @@
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import zipfile
+
+import analyze_data
+from log_compression import (
+    COMPRESSION_SUFFIXES,
+    BlockCompressedWriter,
+    get_compression,
+)
+
+# Files that are block-compressed before they are added, so that they can be read from any offset in the archive
+LOG_SUFFIXES = (".txt", ".stdout", ".stderr")
+
+
+def add_file(
+    archive: zipfile.ZipFile,
+    path: str,
+    member: str,
+    compression: str,
+    temp_dir: str,
+) -> None:
+    """
+    Adds a file of `rawdata/` to the archive, keeping its modification time.
+
+    Logs are block-compressed and stored without zip compression, already compressed logs are stored as they
+    are, and the other files are deflated.
+    """
+    source = path
+    compress_type = zipfile.ZIP_DEFLATED
+    if get_compression(path) is not None:
+        compress_type = zipfile.ZIP_STORED
+    elif path.endswith(LOG_SUFFIXES):
+        source = os.path.join(temp_dir, "log")
+        writer = BlockCompressedWriter(source, compression)
+        with open(path, "rb") as file:
+            shutil.copyfileobj(file, writer)
+        writer.close()
+        member += COMPRESSION_SUFFIXES[compression]
+        compress_type = zipfile.ZIP_STORED
+
+    info = zipfile.ZipInfo.from_file(path, member)
+    info.compress_type = compress_type
+    with open(source, "rb") as file, archive.open(info, "w", force_zip64=True) as out:
+        shutil.copyfileobj(file, out)
+
+
+def archive_raw_data(raw_data_dir: str, output: str, compression: str) -> int:
+    """
+    Writes the files of `raw_data_dir` to a zip archive, with member names relative to `raw_data_dir`, so that
+    the archive can be read in place of the directory. Returns the number of files.
+    """
+    count = 0
+    with zipfile.ZipFile(
+        output + ".tmp", "w"
+    ) as archive, tempfile.TemporaryDirectory() as temp_dir:
+        for directory, directory_names, file_names in os.walk(raw_data_dir):
+            directory_names.sort()
+            names = set(file_names)
+            for name in sorted(file_names):
+                if name.startswith("."):
+                    continue
+                # The plain copy of a log wins, like in `log_index.scan_files`
+                file_compression = get_compression(name)
+                if (
+                    file_compression is not None
+                    and name.removesuffix(COMPRESSION_SUFFIXES[file_compression])
+                    in names
+                ):
+                    continue
+                path = os.path.join(directory, name)
+                member = os.path.relpath(path, raw_data_dir).replace(os.sep, "/")
+                sys.stderr.write("archive_raw_data:" + path + "\n")
+                add_file(archive, path, member, compression, temp_dir)
+                count += 1
+    os.replace(output + ".tmp", output)
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Pack rawdata/ into a zip archive that 2-analyze_data.py reads in place, without extracting it"
+    )
+    parser.add_argument("--source", default=analyze_data.RAW_DATA_DIR)
+    parser.add_argument("--output", default=analyze_data.RAW_DATA_ARCHIVE)
+    parser.add_argument(
+        "--compress",
+        choices=list(COMPRESSION_SUFFIXES),
+        default="zstd",
+        help="Compression of the logs (zstd needs the zstandard package)",
+    )
+    args = parser.parse_args()
+
+    count = archive_raw_data(args.source, args.output, args.compress)
+    print(
+        f"Archived {count} files of {args.source} into {args.output} ({os.path.getsize(args.output) / 2**20:.1f} MiB)"
+    )
@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import pickle
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+EXP_DATA_DIR = "exp_data"
+INDEX_FILE = "index.json"
+
+Key = Tuple[str, ...]
+
+
+def flatten(data: Any, prefix: Key = ()) -> Iterator[Tuple[Key, Any]]:
+    """
+    Yields `(key path, leaf)` pairs of a nested dict, in insertion order. Leaves are lists of numbers or numbers.
+    """
+    if isinstance(data, dict):
+        for k, v in data.items():
+            yield from flatten(v, prefix + (k,))
+    else:
+        yield prefix, data
+
+
+def save_exp_data(exp_data: Dict[str, Dict[str, Any]], directory: str = EXP_DATA_DIR):
+    """
+    Writes the aggregated measurements of `2-analyze_data.py` in a columnar layout.
+
+    Each `(dataset, metric)` table, e.g. `("exp23_zkp_data", "timecost")`, becomes one flat `.npy` column
+    holding all its values back to back. `index.json` maps each key path of the table to a slice of that column.
+
+    The directory is tracked in git as the results the draw scripts plot, so it is rewritten as a whole.
+    """
+    os.makedirs(directory, exist_ok=True)
+    index = {}
+    for dataset_name, metrics in exp_data.items():
+        for metric_name, table in metrics.items():
+            table_name = f"{dataset_name}.{metric_name}"
+            keys, offsets, lengths, scalars = [], [], [], []
+            values: List[float] = []
+            for key, leaf in flatten(table):
+                keys.append(list(key))
+                offsets.append(len(values))
+                if isinstance(leaf, list):
+                    values.extend(leaf)
+                    scalars.append(False)
+                else:
+                    values.append(leaf)
+                    scalars.append(True)
+                lengths.append(len(values) - offsets[-1])
+            np.save(
+                os.path.join(directory, f"{table_name}.npy"),
+                np.asarray(values, dtype=np.float64),
+            )
+            index[table_name] = {
+                "keys": keys,
+                "offsets": offsets,
+                "lengths": lengths,
+                "scalars": scalars,
+            }
+
+    with open(os.path.join(directory, INDEX_FILE), "w") as file:
+        json.dump(index, file)
+    # Drop the columns of tables an earlier run wrote and this one did not, e.g. without `--all-parties`
+    for name in os.listdir(directory):
+        if name.endswith(".npy") and name.removesuffix(".npy") not in index:
+            os.remove(os.path.join(directory, name))
+
+
+class ExpDataStore:
+    """
+    Read access to the data written by `save_exp_data`.
+
+    Columns are memory-mapped and only opened when a table is first accessed, so scripts only pay for the
+    slices they actually read.
+    """
+
+    def __init__(self, directory: str = EXP_DATA_DIR):
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE), "r") as file:
+            self.index = json.load(file)
+        self.slices: Dict[str, Dict[Key, Tuple[int, int, bool]]] = {}
+        self.columns: Dict[str, np.ndarray] = {}
+
+    def _get_table(
+        self, dataset: str, metric: str
+    ) -> Tuple[np.ndarray, Dict[Key, Tuple[int, int, bool]]]:
+        table_name = f"{dataset}.{metric}"
+        if table_name not in self.columns:
+            if table_name not in self.index:
+                raise KeyError(f"No table {table_name} in {self.directory}")
+            table_index = self.index[table_name]
+            self.slices[table_name] = {
+                tuple(key): (offset, length, scalar)
+                for key, offset, length, scalar in zip(
+                    table_index["keys"],
+                    table_index["offsets"],
+                    table_index["lengths"],
+                    table_index["scalars"],
+                )
+            }
+            self.columns[table_name] = np.load(
+                os.path.join(self.directory, f"{table_name}.npy"), mmap_mode="r"
+            )
+        return self.columns[table_name], self.slices[table_name]
+
+    def tables(self) -> List[Tuple[str, str]]:
+        """
+        Returns the `(dataset, metric)` pairs of all stored tables.
+        """
+        return [tuple(table_name.split(".", 1)) for table_name in self.index]
+
+    def get(self, dataset: str, metric: str, *key: str) -> np.ndarray:
+        """
+        Returns the values stored under `key`, e.g. `get("exp1_zkp_data", "timecost", "mpc-2t.exp1", "Addition-100000", "prove")`.
+
+        The result is a read-only view on the memory-mapped column.
+        """
+        column, slices = self._get_table(dataset, metric)
+        if key not in slices:
+            raise KeyError(f"No key {key} in table {dataset}.{metric}")
+        offset, length, _ = slices[key]
+        return column[offset : offset + length]
+
+    def keys(self, dataset: str, metric: str, prefix: Key = ()) -> List[Key]:
+        """
+        Returns the key paths of a table that start with `prefix`, in insertion order.
+        """
+        _, slices = self._get_table(dataset, metric)
+        return [key for key in slices if key[: len(prefix)] == prefix]
+
+    def select(
+        self,
+        dataset: str,
+        metric: str,
+        filter: Optional[Callable[[Key], bool]] = None,
+    ) -> Dict[Key, np.ndarray]:
+        """
+        Returns the values of every key path of a table accepted by `filter` (all if None).
+        """
+        return {
+            key: self.get(dataset, metric, *key)
+            for key in self.keys(dataset, metric)
+            if filter is None or filter(key)
+        }
+
+    def values(self, dataset: str, metric: str) -> np.ndarray:
+        """
+        Returns the whole column of a table, i.e. all of its values back to back.
+        """
+        column, _ = self._get_table(dataset, metric)
+        return column
+
+    def to_dict(self, dataset: str, metric: str) -> Dict[str, Any]:
+        """
+        Rebuilds the nested dict of lists that `analyze_data` returned for a table.
+        """
+        ret: Dict[str, Any] = {}
+        column, slices = self._get_table(dataset, metric)
+        for key, (offset, length, scalar) in slices.items():
+            values = column[offset : offset + length].tolist()
+            node = ret
+            for k in key[:-1]:
+                node = node.setdefault(k, {})
+            node[key[-1]] = values[0] if scalar else values
+        return ret
+
+
+if __name__ == "__main__":
+    # Converts an existing pickled exp_data into the columnar layout
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <exp_data.pkl> [output-directory]")
+        sys.exit(1)
+
+    with open(sys.argv[1], "rb") as file:
+        exp_data = pickle.load(file)
+    save_exp_data(exp_data, sys.argv[2] if len(sys.argv) > 2 else EXP_DATA_DIR)
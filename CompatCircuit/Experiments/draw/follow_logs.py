@@ -0,0 +1,330 @@
+import argparse
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from analyze_data import (
+    RAW_DATA_DIR,
+    ComputeLogParser,
+    ZkpStderrParser,
+    get_zkp_stdout_file,
+)
+from log_compression import AppendedDataDecompressor, get_compression
+from log_index import (
+    STEP_CIRCUIT_PATTERN,
+    ComputeLogKey,
+    PreprocessLogKey,
+    ZkpLogKey,
+    iter_log_files,
+)
+from raw_data_archive import resolve_raw_log_file, split_archive_path
+from zkp_stdout import ZkpStdoutParser
+
+FOLLOW_INTERVAL = 2.0
+RESCAN_INTERVAL = 30.0
+STALL_AFTER = 300.0
+
+
+class TailReader:
+    """
+    Returns the lines appended to a file since the previous call.
+
+    The path is resolved to the plain or compressed file on disk like `raw_data_archive.open_raw_log` does, and
+    a compressed file is decompressed as its blocks are appended. A partial last line is held back until its line
+    ending has been written. If the file shrinks, e.g. because it was downloaded again, or is replaced by a copy
+    with another compression, it is read again from the beginning. Files in an archive do not grow, so they are
+    reported once and not followed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        # The file on disk being read, with the compression suffix if any
+        self.file_path: Optional[str] = None
+        self.decompressor: Optional[AppendedDataDecompressor] = None
+        self.offset = 0
+        self.partial = b""
+        self.last_growth = time.monotonic()
+        self.reported = False
+
+    def read_lines(self) -> Tuple[List[str], bool]:
+        """
+        Returns:
+        - tuple: The new complete lines, and whether the file was truncated since the previous call.
+        """
+        file_path = resolve_raw_log_file(self.path)
+        if split_archive_path(file_path) is not None:
+            if not self.reported:
+                sys.stderr.write(f"Cannot follow {file_path}, which is in an archive\n")
+                self.reported = True
+            return [], False
+        try:
+            size = os.stat(file_path).st_size
+        except FileNotFoundError:
+            return [], False
+
+        truncated = False
+        if file_path != self.file_path or size < self.offset:
+            # Nothing was read before the first file was found
+            truncated = self.file_path is not None
+            self.file_path = file_path
+            compression = get_compression(file_path)
+            self.decompressor = (
+                AppendedDataDecompressor(compression)
+                if compression is not None
+                else None
+            )
+            self.offset = 0
+            self.partial = b""
+        if size == self.offset:
+            return [], truncated
+
+        with open(file_path, "rb") as file:
+            file.seek(self.offset)
+            data = file.read()
+        self.offset += len(data)
+        self.last_growth = time.monotonic()
+        if self.decompressor is not None:
+            data = self.decompressor.decompress(data)
+
+        lines = (self.partial + data).split(b"\n")
+        self.partial = lines.pop()
+        return [line.decode(errors="replace") + "\n" for line in lines], truncated
+
+    def idle_seconds(self) -> float:
+        return time.monotonic() - self.last_growth
+
+
+class FollowedComputeLog:
+    """
+    A compute or preprocess log, parsed with `ComputeLogParser` as it grows.
+    """
+
+    def __init__(self, path: str, stage: str, cell: str):
+        self.stage = stage
+        self.cell = cell
+        self.group = "total"
+        self.reader = TailReader(path)
+        self.parser = ComputeLogParser()
+
+    def poll(self) -> bool:
+        lines, truncated = self.reader.read_lines()
+        if truncated:
+            self.parser = ComputeLogParser()
+        for line in lines:
+            self.parser.feed(line)
+        return truncated or len(lines) > 0
+
+    def finished(self) -> bool:
+        # The step time costs are complete once a line after them has been read
+        return "total" in self.parser.timecost and self.parser.timecost_done
+
+    def total(self) -> Optional[float]:
+        return self.parser.timecost.get("total")
+
+    def idle_seconds(self) -> float:
+        return self.reader.idle_seconds()
+
+
+class FollowedZkpLog:
+    """
+    A ZKP `.stderr` file and its `.stdout` sibling, parsed as they grow.
+    """
+
+    def __init__(self, path: str, cell: str, circuit: str):
+        self.stage = "zkp"
+        self.cell = cell
+        # Group the per-step circuits of an instance together
+        match = STEP_CIRCUIT_PATTERN.match(circuit)
+        self.group = match.group(1) if match else circuit
+        self.stderr_reader = TailReader(path)
+        self.stdout_reader = TailReader(get_zkp_stdout_file(path))
+        self.stderr_parser = ZkpStderrParser()
+        self.stdout_parser = ZkpStdoutParser()
+
+    def poll(self) -> bool:
+        stderr_lines, stderr_truncated = self.stderr_reader.read_lines()
+        if stderr_truncated:
+            self.stderr_parser = ZkpStderrParser()
+        for line in stderr_lines:
+            self.stderr_parser.feed(line)
+
+        stdout_lines, stdout_truncated = self.stdout_reader.read_lines()
+        if stdout_truncated:
+            self.stdout_parser = ZkpStdoutParser()
+        for line in stdout_lines:
+            self.stdout_parser.feed(line)
+
+        return (
+            stderr_truncated
+            or stdout_truncated
+            or len(stderr_lines) > 0
+            or len(stdout_lines) > 0
+        )
+
+    def finished(self) -> bool:
+        return self.stderr_parser.total() is not None
+
+    def total(self) -> Optional[float]:
+        return self.stderr_parser.total()
+
+    def idle_seconds(self) -> float:
+        return min(self.stderr_reader.idle_seconds(), self.stdout_reader.idle_seconds())
+
+
+FollowedLog = Union[FollowedComputeLog, FollowedZkpLog]
+
+
+def create_followed_log(path: str, key) -> Optional[FollowedLog]:
+    """
+    Returns the followed log of a file, or None for the files `analyze_data` does not read (other parties, `.stdout`).
+    """
+    if isinstance(key, ComputeLogKey):
+        if key.party_index != 0:
+            return None
+        return FollowedComputeLog(path, "compute", f"{key.setup}.{key.instance}")
+    if isinstance(key, PreprocessLogKey):
+        return FollowedComputeLog(path, "preprocess", f"{key.setup}.{key.instance}")
+    if isinstance(key, ZkpLogKey):
+        if key.stream != "stderr" or key.party not in ["party0", "single"]:
+            return None
+        return FollowedZkpLog(path, f"{key.setup}.{key.instance}", key.circuit)
+    return None
+
+
+class LogFollower:
+    """
+    Follows the growing log files under `rawdata/` by polling, and keeps running aggregates of each
+    `(stage, setup.instance, method)` group up to date.
+
+    New files are picked up by walking the directory again every `rescan_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        raw_data_dir: str = RAW_DATA_DIR,
+        rescan_interval: float = RESCAN_INTERVAL,
+        stall_after: float = STALL_AFTER,
+    ):
+        self.raw_data_dir = raw_data_dir
+        self.rescan_interval = rescan_interval
+        self.stall_after = stall_after
+        self.logs: Dict[str, Optional[FollowedLog]] = {}
+        self.groups: Dict[Tuple[str, str, str], List[FollowedLog]] = {}
+        # Paths of the unfinished logs already reported as stalled
+        self.stalled: Set[str] = set()
+        self.last_rescan: Optional[float] = None
+
+    def rescan(self) -> None:
+        for path, key in iter_log_files(self.raw_data_dir):
+            if path in self.logs:
+                continue
+            log = create_followed_log(path, key)
+            self.logs[path] = log
+            if log is not None:
+                self.groups.setdefault((log.stage, log.cell, log.group), []).append(log)
+        self.last_rescan = time.monotonic()
+
+    def poll(self) -> List[Tuple[str, str, str]]:
+        """
+        Reads the new lines of all followed files.
+
+        Returns:
+        - list: The `(stage, cell, group)` groups that changed or have a newly stalled log.
+        """
+        if (
+            self.last_rescan is None
+            or time.monotonic() - self.last_rescan >= self.rescan_interval
+        ):
+            self.rescan()
+
+        changed = set()
+        for path, log in self.logs.items():
+            if log is None:
+                continue
+            try:
+                updated = log.poll()
+            except Exception as e:
+                # Keep following the other files, the full analysis will raise on this one again
+                sys.stderr.write(f"Stop following {path}: {e}\n")
+                self.logs[path] = None
+                continue
+            if updated:
+                self.stalled.discard(path)
+                changed.add((log.stage, log.cell, log.group))
+            elif (
+                path not in self.stalled
+                and not log.finished()
+                and log.idle_seconds() >= self.stall_after
+            ):
+                self.stalled.add(path)
+                changed.add((log.stage, log.cell, log.group))
+        return sorted(changed)
+
+    def summarize(self, group: Tuple[str, str, str]) -> str:
+        logs = self.groups[group]
+        totals = np.asarray(
+            [log.total() for log in logs if log.finished()], dtype=np.float64
+        )
+        running = [log for log in logs if not log.finished()]
+        stalled = [log for log in running if log.idle_seconds() >= self.stall_after]
+
+        stage, cell, method = group
+        line = f"{stage:<10} {cell:<20} {method:<28} done={len(totals):<4} running={len(running):<4}"
+        if len(totals) > 0:
+            line += f" mean={totals.mean():.3f}s std={totals.std():.3f}s max={totals.max():.3f}s"
+        if stalled:
+            line += f" STALLED={len(stalled)}"
+        return line
+
+    def follow(self, interval: float = FOLLOW_INTERVAL, once: bool = False) -> None:
+        """
+        Prints the summary of each group that changed, every `interval` seconds, until interrupted.
+        """
+        while True:
+            changed = self.poll()
+            for group in changed:
+                print(self.summarize(group))
+            sys.stdout.flush()
+            if once:
+                return
+            time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Follow the logs of running experiments and print running aggregates"
+    )
+    parser.add_argument("--raw-data-dir", default=RAW_DATA_DIR)
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=FOLLOW_INTERVAL,
+        help="Seconds between two polls of the followed files",
+    )
+    parser.add_argument(
+        "--rescan-interval",
+        type=float,
+        default=RESCAN_INTERVAL,
+        help="Seconds between two walks of the raw data directory for new files",
+    )
+    parser.add_argument(
+        "--stall-after",
+        type=float,
+        default=STALL_AFTER,
+        help="Report unfinished logs that did not grow for this many seconds as stalled",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Read the current content of all logs once, print the aggregates and exit",
+    )
+    args = parser.parse_args()
+
+    follower = LogFollower(args.raw_data_dir, args.rescan_interval, args.stall_after)
+    try:
+        follower.follow(args.interval, args.once)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1 @@
+../scripts/prove-scripts/log_compression.py
\ No newline at end of file
@@ -0,0 +1,286 @@
+import os
+import re
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+from log_compression import COMPRESSION_SUFFIXES, get_compression
+from raw_data_archive import ArchiveEntry, scan_archive
+
+# Experiment 1 has a single instance, which does not appear in the filenames
+EXP1_INSTANCE_NAME = "exp1"
+
+STEP_CIRCUIT_PATTERN = re.compile(r"^(.*)-Step-(\d+)$")
+STEP_COUNT_CIRCUIT_PATTERN = re.compile(r"^MemoryTraceProverCircuit-(\d+)$")
+
+# `.timing` files are written by the prove scripts since they record nanosecond timestamps, `.resources` files
+# when they sample the resource usage of the provers, and `.all.traffic` files (party `all`) when they sample the
+# traffic between them
+ZKP_LOG_STREAMS = ["stderr", "stdout", "timing", "resources", "traffic"]
+
+
+class ComputeLogKey(NamedTuple):
+    """
+    `compute/log-{setup}/{party_index}/log.{prefix}[.{instance}].{repeat}.{timestamp}.txt`
+    """
+
+    setup: str
+    party_index: int
+    prefix: str
+    instance: str
+    repeat: str
+
+
+class PreprocessLogKey(NamedTuple):
+    """
+    `preprocess/log.preprocess.{setup}.{instance}.{repeat}.{timestamp}.txt`
+    """
+
+    setup: str
+    instance: str
+    repeat: str
+
+
+class ZkpLogKey(NamedTuple):
+    """
+    `zkp/log-{setup}/{prefix}[.{instance}].{repeat}.{circuit}.{party}.{stderr|stdout|timing|resources|traffic}`
+    """
+
+    setup: str
+    prefix: str
+    instance: str
+    repeat: str
+    circuit: str
+    step: Optional[int]
+    party: str
+    stream: str
+
+
+def split_instance(prefix: str, rest: List[str]) -> Tuple[str, str]:
+    # Experiment 1 filenames have no instance part
+    if prefix.startswith("exp1_"):
+        return EXP1_INSTANCE_NAME, ".".join(rest)
+    return rest[0], ".".join(rest[1:])
+
+
+def parse_compute_log_name(
+    setup: str, party_index: int, filename: str
+) -> Optional[ComputeLogKey]:
+    parts = filename.split(".")
+    if len(parts) < 4 or parts[0] != "log" or parts[-1] != "txt":
+        return None
+    prefix = parts[1]
+    instance, repeat = split_instance(prefix, parts[2:-1])
+    return ComputeLogKey(setup, party_index, prefix, instance, repeat)
+
+
+def parse_preprocess_log_name(filename: str) -> Optional[PreprocessLogKey]:
+    parts = filename.split(".")
+    if len(parts) < 5 or parts[:2] != ["log", "preprocess"] or parts[-1] != "txt":
+        return None
+    return PreprocessLogKey(parts[2], parts[3], ".".join(parts[4:-1]))
+
+
+def parse_zkp_log_name(setup: str, filename: str) -> Optional[ZkpLogKey]:
+    parts = filename.split(".")
+    if len(parts) < 5 or parts[-1] not in ZKP_LOG_STREAMS:
+        return None
+    prefix = parts[0]
+    instance, repeat = split_instance(prefix, parts[1:-3])
+    circuit = parts[-3]
+    match = STEP_CIRCUIT_PATTERN.match(circuit)
+    step = int(match.group(2)) if match else None
+    return ZkpLogKey(
+        setup, prefix, instance, repeat, circuit, step, parts[-2], parts[-1]
+    )
+
+
+def is_shadowed(path: str, paths: Set[str]) -> bool:
+    """
+    Returns whether a file is a compressed copy of a plain file in `paths`. It is skipped, since readers open
+    the plain file.
+    """
+    compression = get_compression(path)
+    return (
+        compression is not None
+        and path.removesuffix(COMPRESSION_SUFFIXES[compression]) in paths
+    )
+
+
+def scan_files(directory: str) -> Iterator[Union[os.DirEntry, ArchiveEntry]]:
+    archive_entries = scan_archive(directory)
+    if archive_entries is not None:
+        paths = {entry.path for entry in archive_entries}
+        for entry in archive_entries:
+            if not entry.name.startswith(".") and not is_shadowed(entry.path, paths):
+                yield entry
+        return
+
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return
+    names = {entry.name for entry in entries}
+    for entry in entries:
+        # Same as glob, which ignores hidden files
+        if entry.name.startswith(".") or is_shadowed(entry.name, names):
+            continue
+        if entry.is_dir(follow_symlinks=True):
+            yield from scan_files(entry.path)
+        elif entry.is_file(follow_symlinks=True):
+            yield entry
+
+
+def get_log_path(entry: Union[os.DirEntry, ArchiveEntry]) -> Tuple[str, str]:
+    """
+    Returns the path and the name of a log file without its compression suffix. Parsers open the compressed file
+    from that path with `raw_data_archive.open_raw_log`.
+    """
+    compression = get_compression(entry.name)
+    if compression is None:
+        return entry.path, entry.name
+    suffix = COMPRESSION_SUFFIXES[compression]
+    return entry.path.removesuffix(suffix), entry.name.removesuffix(suffix)
+
+
+def get_log_setup_name(directory_name: str) -> Optional[str]:
+    return (
+        directory_name.removeprefix("log-")
+        if directory_name.startswith("log-")
+        else None
+    )
+
+
+LogKey = Union[ComputeLogKey, PreprocessLogKey, ZkpLogKey]
+
+
+def iter_log_files(raw_data_dir: str) -> Iterator[Tuple[str, Optional[LogKey]]]:
+    """
+    Walks `raw_data_dir` and yields `(path, key)` for each file. `key` is None if the filename is not recognized.
+    Compressed files are yielded without their compression suffix.
+    """
+    for entry in scan_files(os.path.join(raw_data_dir, "compute")):
+        path, name = get_log_path(entry)
+        parent, party_dir = os.path.split(os.path.dirname(path))
+        setup = get_log_setup_name(os.path.basename(parent))
+        key = (
+            parse_compute_log_name(setup, int(party_dir), name)
+            if setup is not None and party_dir.isdigit()
+            else None
+        )
+        yield path, key
+
+    for entry in scan_files(os.path.join(raw_data_dir, "preprocess")):
+        path, name = get_log_path(entry)
+        yield path, parse_preprocess_log_name(name)
+
+    for entry in scan_files(os.path.join(raw_data_dir, "zkp")):
+        path, name = get_log_path(entry)
+        setup = get_log_setup_name(os.path.basename(os.path.dirname(path)))
+        key = parse_zkp_log_name(setup, name) if setup is not None else None
+        yield path, key
+
+
+class RawDataIndex:
+    """
+    In-memory index of the raw log files, built from a single walk over `rawdata/`, or over the members of a
+    `rawdata.zip` archive of it.
+
+    Filenames are parsed into typed keys (`ComputeLogKey`, `PreprocessLogKey`, `ZkpLogKey`) and all lookups
+    of `analyze_data` are answered from the index instead of globbing the file system.
+    """
+
+    def __init__(self, raw_data_dir: str):
+        self.raw_data_dir = raw_data_dir
+        self.compute_logs: Dict[ComputeLogKey, List[str]] = {}
+        self.preprocess_logs: Dict[PreprocessLogKey, List[str]] = {}
+        self.zkp_logs: Dict[ZkpLogKey, List[str]] = {}
+        self.unrecognized_files: List[str] = []
+        # The repeat part of each recognized file, e.g. `repeat1.2024-09-01.10.00.00`
+        self.repeats: Dict[str, str] = {}
+        self.step_counts: Optional[Dict[str, int]] = None
+
+        for path, key in iter_log_files(raw_data_dir):
+            if isinstance(key, ComputeLogKey):
+                self._add(self.compute_logs, key, path)
+            elif isinstance(key, PreprocessLogKey):
+                self._add(self.preprocess_logs, key, path)
+            else:
+                self._add(self.zkp_logs, key, path)
+
+    def _add(self, logs: Dict, key: Optional[NamedTuple], path: str) -> None:
+        if key is None:
+            self.unrecognized_files.append(path)
+            return
+        self.repeats[path] = key.repeat
+        # Drop the repeat part, lookups return all repeats of a cell
+        cell = key._replace(repeat="")
+        if cell not in logs:
+            logs[cell] = []
+        logs[cell].append(path)
+
+    def get_run_name(self, path: str) -> str:
+        """
+        Returns the run a log file belongs to, e.g. `repeat1`. The logs of all parties of a run share it, while
+        the timestamps in compute log names may differ between parties.
+        """
+        return self.repeats[path].split(".")[0]
+
+    def get_compute_logs(
+        self, setup: str, party_index: int, prefix: str, instance: str
+    ) -> List[str]:
+        return self.compute_logs.get(
+            ComputeLogKey(setup, party_index, prefix, instance, ""), []
+        )
+
+    def get_preprocess_logs(self, setup: str, instance: str) -> List[str]:
+        return self.preprocess_logs.get(PreprocessLogKey(setup, instance, ""), [])
+
+    def get_zkp_logs(
+        self,
+        setup: str,
+        prefix: str,
+        instance: str,
+        circuit: str,
+        party: str,
+        stream: str = "stderr",
+    ) -> List[str]:
+        match = STEP_CIRCUIT_PATTERN.match(circuit)
+        step = int(match.group(2)) if match else None
+        return self.zkp_logs.get(
+            ZkpLogKey(setup, prefix, instance, "", circuit, step, party, stream), []
+        )
+
+    def get_instances(self) -> Set[str]:
+        """
+        Returns the names of all instances found in the raw data.
+        """
+        return (
+            {key.instance for key in self.compute_logs}
+            | {key.instance for key in self.preprocess_logs}
+            | {key.instance for key in self.zkp_logs}
+        )
+
+    def get_step_counts(self) -> Dict[str, int]:
+        """
+        Returns the zkVM step count of each instance found in the ZKP logs.
+
+        It is read from the `MemoryTraceProverCircuit-{step count}` circuit, or derived from the highest
+        `*-Step-{i}` circuit if that one is missing.
+        """
+        if self.step_counts is not None:
+            return self.step_counts
+
+        ret: Dict[str, int] = {}
+        from_step_circuits: Dict[str, int] = {}
+        for key in self.zkp_logs:
+            match = STEP_COUNT_CIRCUIT_PATTERN.match(key.circuit)
+            if match:
+                ret[key.instance] = max(ret.get(key.instance, 0), int(match.group(1)))
+            elif key.step is not None:
+                from_step_circuits[key.instance] = max(
+                    from_step_circuits.get(key.instance, 0), key.step + 1
+                )
+        for instance, step_count in from_step_circuits.items():
+            if instance not in ret:
+                ret[instance] = step_count
+        self.step_counts = ret
+        return ret
@@ -0,0 +1,353 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import analyze_data
+from exp_data_store import ExpDataStore, flatten
+from log_index import STEP_CIRCUIT_PATTERN
+
+# Columns of the long-format table, one row per measured value
+COLUMNS = [
+    "stage",  # preprocess, compute or zkp
+    "setup",  # e.g. mpc-8t
+    "parties",  # number of MPC parties
+    "instance",  # exp1, exp2_1, exp3_16, ...
+    "method",  # e.g. total, IF, Addition-100000, InstructionFetcherCircuit, FieldBeaverTripleShare
+    "step",  # zkVM step of the method, -1 if the method is not per step
+    "phase",  # ZKP phase (total, setup, prove or verify), empty for the other stages
+    "metric",  # timecost, bytes_per_second, preshare_usage, party_timecost (*_party_data), peak_rss, ... (*_resource_data)
+    "repeat",  # index of the repeated run, -1 for values shared by all runs
+    "party",  # index of the party the value was read from
+    "value",
+    "unit",
+]
+
+METRIC_UNITS = {
+    "timecost": "s",
+    "bytes_per_second": "B/s",
+    "preshare_usage": "count",
+    "peak_rss": "B",
+    "peak_rss_by_phase": "B",
+    "cpu_seconds": "s",
+    "cpu_utilization": "cores",
+    "read_bytes": "B",
+    "write_bytes": "B",
+}
+
+# Datasets that read the logs of every party, with a `party{i}` key
+PER_PARTY_DATASET_SUFFIXES = ("_party_data", "_resource_data")
+
+SETUP_PARTY_COUNTS = {
+    setup_name: party_count
+    for setup_name, _, party_count in analyze_data.EXP1_SETUPS
+    + analyze_data.EXP23_SETUPS
+}
+
+COMPUTE_STEP_PATTERN = re.compile(
+    r"^(" + "|".join(analyze_data.EXP23_COMPUTE_METHODS) + r")-(\d+)$"
+)
+ZKP_STEP_COUNT_CIRCUIT_PATTERN = re.compile(
+    r"^(" + "|".join(analyze_data.EXP23_ZKP_METHODS) + r")-(\d+)$"
+)
+PARTY_KEY_PATTERN = re.compile(r"^party\d+$")
+
+
+def get_stage_name(dataset_name: str) -> str:
+    """
+    `exp23_zkp_data` -> `zkp`
+    """
+    return dataset_name.split("_")[1]
+
+
+def split_method_step(stage: str, instance: str, method: str) -> Tuple[str, int]:
+    """
+    Splits the per-step names of experiment 2/3, e.g. `IF-3` or `ZkVmCircuit-Step-3`, into the method and the step.
+
+    Experiment 1 method names such as `Addition-100000` are kept as is.
+    """
+    if instance == "exp1":
+        return method, -1
+    if stage == "zkp":
+        match = STEP_CIRCUIT_PATTERN.match(method)
+        if match:
+            return match.group(1), int(match.group(2))
+        # MemoryTraceProverCircuit-{step count} covers all steps
+        match = ZKP_STEP_COUNT_CIRCUIT_PATTERN.match(method)
+        if match:
+            return match.group(1), -1
+    else:
+        match = COMPUTE_STEP_PATTERN.match(method)
+        if match:
+            return match.group(1), int(match.group(2))
+    return method, -1
+
+
+def get_key_columns(
+    dataset_name: str, metric_name: str, key: Sequence[str]
+) -> Dict[str, Any]:
+    """
+    Maps a key path of an `analyze_data` result to the columns of the long-format table.
+
+    Args:
+    - dataset_name: e.g. `exp23_zkp_data`
+    - metric_name: e.g. `timecost`
+    - key: e.g. `("mpc-8t.exp3_16", "ZkVmCircuit-Step-3", "prove")`
+    """
+    stage = get_stage_name(dataset_name)
+    unit = METRIC_UNITS.get(metric_name, "")
+    party = 0  # the stage data only reads the logs of party 0
+    if dataset_name.endswith(PER_PARTY_DATASET_SUFFIXES):
+        # e.g. `("mpc-8t.exp3_16", "ZkVmCircuit-Step-3", "party2", "prove")`
+        party_position = next(
+            i for i, k in enumerate(key) if PARTY_KEY_PATTERN.match(k)
+        )
+        party = int(key[party_position].removeprefix("party"))
+        key = tuple(key[:party_position]) + tuple(key[party_position + 1 :])
+    setup, instance = key[0].split(".", 1)
+    method, step, phase = "", -1, ""
+    if stage == "zkp":
+        method, step = split_method_step(stage, instance, key[1])
+        if metric_name in ["timecost", "peak_rss_by_phase"]:
+            phase = key[2]
+    elif len(key) > 1:
+        method, step = split_method_step(stage, instance, key[1])
+    if dataset_name.endswith("_party_data"):
+        # Keep them apart from the party 0 values of the stage data, their repeats are aligned across parties
+        metric_name = f"party_{metric_name}"
+    return {
+        "stage": stage,
+        "setup": setup,
+        "parties": SETUP_PARTY_COUNTS.get(setup, 1),
+        "instance": instance,
+        "method": method,
+        "step": step,
+        "phase": phase,
+        "metric": metric_name,
+        "party": party,
+        "unit": unit,
+    }
+
+
+class MeasurementTable:
+    """
+    Column-oriented table of measurements. Each column is a NumPy array of the same length.
+
+    The table built by `from_exp_data` / `from_store` has the columns in `COLUMNS`. Filtering, grouping and
+    aggregation are done with array operations, e.g. the mean and standard deviation of every ZKP phase:
+
+        table.where(stage="zkp", metric="timecost").group_by("setup", "instance", "method", "phase").summary()
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns have different lengths: {lengths}")
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, column_name: str) -> np.ndarray:
+        return self.columns[column_name]
+
+    def __repr__(self) -> str:
+        return f"MeasurementTable({len(self)} rows, columns={list(self.columns)})"
+
+    @classmethod
+    def from_rows(
+        cls, rows: Iterable[Tuple[Dict[str, Any], Sequence[float], bool]]
+    ) -> "MeasurementTable":
+        """
+        Builds the table from `(key columns, values, scalar)` triples. The key columns are repeated for each value,
+        and the position of a value in `values` becomes its `repeat` (-1 if `scalar`).
+        """
+        key_columns: Dict[str, List[Any]] = {
+            name: [] for name in COLUMNS if name not in ["repeat", "value"]
+        }
+        values: List[np.ndarray] = []
+        repeats: List[np.ndarray] = []
+        lengths: List[int] = []
+        for columns, leaf_values, scalar in rows:
+            for name in key_columns:
+                key_columns[name].append(columns[name])
+            leaf_values = np.asarray(leaf_values, dtype=np.float64)
+            values.append(leaf_values)
+            repeats.append(
+                np.full(len(leaf_values), -1) if scalar else np.arange(len(leaf_values))
+            )
+            lengths.append(len(leaf_values))
+
+        ret = {
+            name: np.repeat(np.asarray(column), lengths)
+            for name, column in key_columns.items()
+        }
+        ret["repeat"] = np.concatenate(repeats) if repeats else np.zeros(0, dtype=int)
+        ret["value"] = np.concatenate(values) if values else np.zeros(0)
+        return cls({name: ret[name] for name in COLUMNS})
+
+    @classmethod
+    def from_exp_data(
+        cls, exp_data: Dict[str, Dict[str, Dict[str, Any]]]
+    ) -> "MeasurementTable":
+        """
+        Builds the table from the nested dicts returned by the stage functions of `analyze_data`.
+        """
+        return cls.from_rows(
+            (
+                get_key_columns(dataset_name, metric_name, key),
+                leaf if isinstance(leaf, list) else [leaf],
+                not isinstance(leaf, list),
+            )
+            for dataset_name, metrics in exp_data.items()
+            for metric_name, data in metrics.items()
+            for key, leaf in flatten(data)
+        )
+
+    @classmethod
+    def from_store(cls, store: ExpDataStore) -> "MeasurementTable":
+        """
+        Builds the table from the data written by `2-analyze_data.py`.
+        """
+        return cls.from_rows(
+            (
+                get_key_columns(dataset_name, metric_name, key),
+                store.get(dataset_name, metric_name, *key),
+                store.slices[f"{dataset_name}.{metric_name}"][key][2],
+            )
+            for dataset_name, metric_name in store.tables()
+            for key in store.keys(dataset_name, metric_name)
+        )
+
+    def select(self, mask: np.ndarray) -> "MeasurementTable":
+        return MeasurementTable(
+            {name: column[mask] for name, column in self.columns.items()}
+        )
+
+    def where(self, **conditions: Any) -> "MeasurementTable":
+        """
+        Returns the rows matching all conditions. A condition is either a single value, or a list/tuple/set of
+        accepted values, e.g. `where(stage="compute", method=["IF", "MF", "IE"])`.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for name, accepted in conditions.items():
+            if isinstance(accepted, (list, tuple, set)):
+                mask &= np.isin(self.columns[name], list(accepted))
+            else:
+                mask &= self.columns[name] == accepted
+        return self.select(mask)
+
+    def sort_by(self, *by: str) -> "MeasurementTable":
+        # np.lexsort sorts by the last key first
+        order = np.lexsort([self.columns[name] for name in reversed(by)])
+        return self.select(order)
+
+    def group_by(self, *by: str) -> "GroupBy":
+        return GroupBy(self, list(by))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        return [
+            {name: column[i].item() for name, column in self.columns.items()}
+            for i in range(len(self))
+        ]
+
+
+class GroupBy:
+    """
+    Rows of a `MeasurementTable` grouped by the distinct values of some columns.
+
+    Groups are ordered by their key columns. All aggregations return one value per group, aligned with `keys`.
+    """
+
+    def __init__(self, table: MeasurementTable, by: List[str]):
+        self.table = table
+        self.by = by
+
+        # Assign each row a group number, ordered by the key columns
+        self.inverse = np.zeros(len(table), dtype=np.int64)
+        self.group_count = 1 if len(table) > 0 else 0
+        for name in by:
+            values, inverse = np.unique(table[name], return_inverse=True)
+            codes = self.inverse * len(values) + inverse
+            group_codes, self.inverse = np.unique(codes, return_inverse=True)
+            self.group_count = len(group_codes)
+
+        # Rows sorted by group, then by value. Used by min/max/percentile
+        self.order = np.lexsort((table["value"], self.inverse))
+        self.counts = np.bincount(self.inverse, minlength=self.group_count)
+        self.starts = np.cumsum(self.counts) - self.counts
+
+        first_rows = self.order[self.starts]
+        self.keys = {name: table[name][first_rows] for name in by}
+
+    def __len__(self) -> int:
+        return self.group_count
+
+    def count(self) -> np.ndarray:
+        return self.counts
+
+    def sum(self, column: str = "value") -> np.ndarray:
+        # bincount adds the values of each group in row order
+        return np.bincount(
+            self.inverse, weights=self.table[column], minlength=self.group_count
+        )
+
+    def mean(self, column: str = "value") -> np.ndarray:
+        return self.sum(column) / self.counts
+
+    def std(self, column: str = "value", ddof: int = 0) -> np.ndarray:
+        """
+        Same as `np.std` of each group, i.e. the population standard deviation by default.
+        """
+        deviations = self.table[column] - self.mean(column)[self.inverse]
+        return np.sqrt(
+            np.bincount(self.inverse, weights=deviations**2, minlength=self.group_count)
+            / (self.counts - ddof)
+        )
+
+    def min(self) -> np.ndarray:
+        return self.table["value"][self.order[self.starts]]
+
+    def max(self) -> np.ndarray:
+        return self.table["value"][self.order[self.starts + self.counts - 1]]
+
+    def percentile(self, q: float) -> np.ndarray:
+        """
+        Same as `np.percentile(..., q)` of each group, with linear interpolation.
+        """
+        sorted_values = self.table["value"][self.order]
+        positions = self.starts + (self.counts - 1) * (q / 100)
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.ceil(positions).astype(np.int64)
+        return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (
+            positions - lower
+        )
+
+    def summary(self, percentiles: Sequence[float] = (50,)) -> MeasurementTable:
+        """
+        Returns a table with the key columns and the count, mean, std, min, max and percentiles of each group.
+        """
+        columns = dict(self.keys)
+        columns["count"] = self.count()
+        columns["mean"] = self.mean()
+        columns["std"] = self.std()
+        columns["min"] = self.min()
+        columns["max"] = self.max()
+        for q in percentiles:
+            columns[f"p{q:g}"] = self.percentile(q)
+        return MeasurementTable(columns)
+
+    def aggregate(self, function: str = "sum") -> MeasurementTable:
+        """
+        Returns a table with the key columns and the aggregated `value` of each group, e.g. the sum over all steps
+        of each run with `group_by("setup", "instance", "method", "repeat").aggregate("sum")`.
+        """
+        columns = dict(self.keys)
+        columns["value"] = getattr(self, function)()
+        return MeasurementTable(columns)
+
+
+def load_measurements(directory: Optional[str] = None) -> MeasurementTable:
+    return MeasurementTable.from_store(
+        ExpDataStore(directory) if directory is not None else ExpDataStore()
+    )
@@ -0,0 +1,115 @@
+import json
+import pickle
+import sqlite3
+from typing import Any, List, Optional, Sequence, Tuple
+
+from raw_data_archive import get_file_identity, resolve_raw_log_file
+
+PARSE_CACHE_FILE = "parse_cache.sqlite"
+
+
+class ParseCache:
+    """
+    On-disk cache of parser outputs, stored in a SQLite file next to `exp_data/`.
+
+    An entry is keyed by the parser name and its arguments. It is only served while the parser
+    version and the size and mtime of every file the parser read are unchanged.
+    """
+
+    def __init__(self, path: str = PARSE_CACHE_FILE):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                parser TEXT NOT NULL,
+                args TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                files TEXT NOT NULL,
+                identity TEXT NOT NULL,
+                value BLOB NOT NULL,
+                PRIMARY KEY (parser, args)
+            )
+            """
+        )
+
+    def __enter__(self) -> "ParseCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @staticmethod
+    def get_files_identity(files: Sequence[str]) -> Optional[str]:
+        identity = []
+        for file in files:
+            # A log may have been compressed since it was parsed
+            file_identity = get_file_identity(resolve_raw_log_file(file))
+            if file_identity is None:
+                return None
+            identity.append(file_identity)
+        return ";".join(identity)
+
+    def get(
+        self, parser: str, version: int, args: Sequence[Any], files: Sequence[str]
+    ) -> Tuple[bool, Any]:
+        """
+        Returns `(True, value)` on a hit and `(False, None)` on a miss.
+        """
+        identity = self.get_files_identity(files)
+        row = self.connection.execute(
+            "SELECT version, identity, value FROM entries WHERE parser = ? AND args = ?",
+            (parser, repr(tuple(args))),
+        ).fetchone()
+        if identity is None or row is None or row[0] != version or row[1] != identity:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, pickle.loads(row[2])
+
+    def put(
+        self,
+        parser: str,
+        version: int,
+        args: Sequence[Any],
+        files: Sequence[str],
+        value: Any,
+    ) -> None:
+        identity = self.get_files_identity(files)
+        if identity is None:
+            return
+        self.connection.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                parser,
+                repr(tuple(args)),
+                version,
+                json.dumps(list(files)),
+                identity,
+                pickle.dumps(value),
+            ),
+        )
+
+    def evict_missing(self) -> int:
+        """
+        Removes the entries of which any input file no longer exists. Returns the number of removed entries.
+        """
+        evicted: List[Tuple[str, str]] = []
+        for parser, args, files in self.connection.execute(
+            "SELECT parser, args, files FROM entries"
+        ).fetchall():
+            if not all(
+                get_file_identity(resolve_raw_log_file(file)) is not None
+                for file in json.loads(files)
+            ):
+                evicted.append((parser, args))
+        self.connection.executemany(
+            "DELETE FROM entries WHERE parser = ? AND args = ?", evicted
+        )
+        return len(evicted)
+
+    def close(self) -> None:
+        self.connection.commit()
+        self.connection.close()
@@ -0,0 +1,227 @@
+"""
+Reads `rawdata/` from a zip archive made by `archive_rawdata.py`, without extracting it.
+
+A file in an archive is addressed as if the archive were its directory, e.g.
+`rawdata.zip/zkp/log-mpc-2t/exp1_mpc_thread.repeat1.Addition-100000.party0.stdout.zst`, so that the parsers take
+the same paths for both. The logs are stored in the archive without zip compression, as block-compressed files
+(see `log_compression.py`), so they are read from any offset straight from the archive file. The other, small
+members are deflated and read from the start.
+"""
+
+import io
+import os
+import struct
+import zipfile
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from log_compression import (
+    get_log_file_identity,
+    open_log,
+    read_blocks_reversed,
+    resolve_log_file,
+)
+
+ARCHIVE_SUFFIX = ".zip"
+# Signature, version, flags, compression, time, date, CRC-32, sizes, then the lengths of the name and extra field
+ZIP_LOCAL_HEADER = struct.Struct("<4s5H3I2H")
+
+
+class ArchiveEntry(NamedTuple):
+    """
+    A file in an archive, with the `os.DirEntry` fields that `log_index` uses.
+    """
+
+    name: str
+    path: str
+
+
+class ArchiveMemberFile(io.RawIOBase):
+    """
+    A read-only, seekable view of the bytes of an uncompressed member in the archive file.
+    """
+
+    def __init__(self, archive_path: str, start: int, size: int):
+        super().__init__()
+        self.file = open(archive_path, "rb", buffering=0)
+        self.start = start
+        self.size = size
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += self.size
+        self.position = min(max(0, offset), self.size)
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self.size - self.position)
+        if size <= 0:
+            return 0
+        self.file.seek(self.start + self.position)
+        read = self.file.readinto(memoryview(buffer)[:size])
+        self.position += read
+        return read
+
+    def close(self) -> None:
+        self.file.close()
+        super().close()
+
+
+class RawDataArchive:
+    """
+    A zip archive of `rawdata/`, indexed by member name from its central directory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.zip_file = zipfile.ZipFile(path)
+        self.members: Dict[str, zipfile.ZipInfo] = {
+            info.filename: info
+            for info in self.zip_file.infolist()
+            if not info.is_dir()
+        }
+
+    def get_info(self, member: str) -> zipfile.ZipInfo:
+        if member not in self.members:
+            raise FileNotFoundError(f"{member} is not in {self.path}")
+        return self.members[member]
+
+    def get_data_offset(self, info: zipfile.ZipInfo) -> int:
+        """
+        Returns the offset of the data of a member in the archive file, after its local header.
+        """
+        with open(self.path, "rb") as file:
+            file.seek(info.header_offset)
+            header = ZIP_LOCAL_HEADER.unpack(file.read(ZIP_LOCAL_HEADER.size))
+        return info.header_offset + ZIP_LOCAL_HEADER.size + header[-2] + header[-1]
+
+    def open(self, member: str, mode: str = "r", encoding: Optional[str] = None):
+        info = self.get_info(member)
+        if info.compress_type == zipfile.ZIP_STORED:
+            file = io.BufferedReader(
+                ArchiveMemberFile(self.path, self.get_data_offset(info), info.file_size)
+            )
+        else:
+            file = self.zip_file.open(info)
+        return file if mode == "rb" else io.TextIOWrapper(file, encoding=encoding)
+
+    def scan(self, directory: str) -> List[ArchiveEntry]:
+        """
+        Returns the files under a directory of the archive, recursively, sorted by path.
+        """
+        prefix = directory.strip("/") + "/" if directory.strip("/") else ""
+        return [
+            ArchiveEntry(
+                member.rsplit("/", 1)[-1], os.path.join(self.path, *member.split("/"))
+            )
+            for member in sorted(self.members)
+            if member.startswith(prefix)
+        ]
+
+
+def split_archive_path(path: str) -> Optional[Tuple[str, str]]:
+    """
+    Returns `(archive file, member name)` of a path in an archive, or None for a path on disk. The member name of
+    the archive itself is empty.
+    """
+    parts = os.path.normpath(path).split(os.sep)
+    for i, part in enumerate(parts):
+        if part.endswith(ARCHIVE_SUFFIX):
+            archive_path = os.sep.join(parts[: i + 1]) or os.sep
+            if os.path.isfile(archive_path):
+                return archive_path, "/".join(parts[i + 1 :])
+    return None
+
+
+# Archives opened by this process, by process id, since worker processes must not share the file offsets
+open_archives: Dict[Tuple[int, str], RawDataArchive] = {}
+
+
+def get_archive(path: str) -> RawDataArchive:
+    key = (os.getpid(), path)
+    if key not in open_archives:
+        open_archives[key] = RawDataArchive(path)
+    return open_archives[key]
+
+
+def path_exists(path: str) -> bool:
+    """
+    Same as `os.path.exists`, for paths on disk and in archives.
+    """
+    archive_path = split_archive_path(path)
+    if archive_path is None:
+        return os.path.exists(path)
+    return archive_path[1] in get_archive(archive_path[0]).members
+
+
+def get_file_size(path: str) -> int:
+    archive_path = split_archive_path(path)
+    if archive_path is None:
+        return os.path.getsize(path)
+    return get_archive(archive_path[0]).get_info(archive_path[1]).file_size
+
+
+def get_file_identity(path: str) -> Optional[str]:
+    """
+    Returns a string that changes when a file changes, or None if it does not exist.
+    """
+    archive_path = split_archive_path(path)
+    if archive_path is None:
+        return get_log_file_identity(path)
+    archive = get_archive(archive_path[0])
+    if archive_path[1] not in archive.members:
+        return None
+    info = archive.members[archive_path[1]]
+    return f"{info.file_size}:{info.CRC}"
+
+
+def open_raw_file(path: str, mode: str = "r", encoding: Optional[str] = None):
+    """
+    Same as `open` for reading, in text (`r`) or binary (`rb`) mode, for paths on disk and in archives.
+    """
+    archive_path = split_archive_path(path)
+    if archive_path is None:
+        return open(path, mode, encoding=encoding)
+    return get_archive(archive_path[0]).open(archive_path[1], mode, encoding)
+
+
+def scan_archive(directory: str) -> Optional[List[ArchiveEntry]]:
+    """
+    Returns the files under a directory of an archive, or None if the directory is on disk.
+    """
+    archive_path = split_archive_path(directory)
+    if archive_path is None:
+        return None
+    return get_archive(archive_path[0]).scan(archive_path[1])
+
+
+def resolve_raw_log_file(path: str) -> str:
+    """
+    Same as `log_compression.resolve_log_file`, for paths on disk and in archives.
+    """
+    return resolve_log_file(path, path_exists)
+
+
+def open_raw_log(path: str, mode: str = "r"):
+    """
+    Same as `log_compression.open_log`, for paths on disk and in archives.
+    """
+    return open_log(path, mode, open_raw_file, path_exists)
+
+
+def read_raw_blocks_reversed(path: str, block_size: int) -> Iterator[bytes]:
+    """
+    Same as `log_compression.read_blocks_reversed`, for paths on disk and in archives.
+    """
+    return read_blocks_reversed(path, block_size, open_raw_file, path_exists)
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+from follow_logs import LogFollower
+from log_compression import compress_file
+
+STDERR_LINES = [
+    "1000",
+    "Stats { bytes_sent: 1024, bytes_recv: 1, exchanges: 2 }",
+    "1012",
+]
+STDOUT_LINES = [
+    "End:     Connecting....................46.667ms",
+    "End:     KZG10::Setup with degree 1024 .................888.927µs",
+    "End:     prove_gates ...................................7.5s",
+    "End:     Checking evaluations ..........................500ms",
+]
+
+
+def write_zkp_run(directory: str, name: str, compression=None) -> None:
+    for suffix, lines in [(".stderr", STDERR_LINES), (".stdout", STDOUT_LINES)]:
+        path = os.path.join(directory, f"{name}.party0{suffix}")
+        with open(path, "w") as file:
+            file.write("\n".join(lines) + "\n")
+        if compression is not None:
+            compress_file(path, compression)
+            os.remove(path)
+
+
+class LogFollowerTest(unittest.TestCase):
+    def test_plain_and_gzip_logs_are_followed_alike(self):
+        with tempfile.TemporaryDirectory() as raw_data_dir:
+            directory = os.path.join(raw_data_dir, "zkp", "log-mpc-2t")
+            os.makedirs(directory)
+            write_zkp_run(directory, "exp1_mpc_thread.repeat1.Addition-100")
+            write_zkp_run(directory, "exp1_mpc_thread.repeat1.Addition-200", "gzip")
+
+            follower = LogFollower(raw_data_dir)
+            changed = follower.poll()
+
+            self.assertEqual(
+                [group[2] for group in changed], ["Addition-100", "Addition-200"]
+            )
+            logs = [follower.groups[group][0] for group in changed]
+            for log in logs:
+                self.assertTrue(log.finished())
+                self.assertEqual(log.total(), 12)
+            self.assertEqual(
+                logs[0].stdout_parser.step_timecost, logs[1].stdout_parser.step_timecost
+            )
+            self.assertEqual(follower.poll(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
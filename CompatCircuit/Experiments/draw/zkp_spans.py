@@ -0,0 +1,306 @@
+import re
+import os
+import sys
+import json
+import argparse
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from raw_data_archive import open_raw_log
+from zkp_stdout import classify_zkp_step_label, parse_zkp_end_line
+
+# ark-std indents nested timers with this character, two per level
+SPAN_INDENT_CHAR = "·"
+ANSI_ESCAPE_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+class Span:
+    """
+    A `Start:`/`End:` pair of the ark-std timer output.
+
+    The timer output only has durations. `start` is estimated by laying the spans out back to back: a span
+    starts when its previous sibling ended, or when its parent started.
+    """
+
+    def __init__(self, label: str, start: float, parent: Optional["Span"]):
+        self.label = label
+        self.depth = parent.depth + 1 if parent is not None else 0
+        self.start = start
+        self.parent = parent
+        self.children: List["Span"] = []
+        # None until the `End:` line is read
+        self.total: Optional[float] = None
+
+    @property
+    def complete(self) -> bool:
+        return self.total is not None
+
+    @property
+    def end(self) -> float:
+        if self.total is not None:
+            return self.start + self.total
+        # An unfinished span lasts at least until its last child ended
+        return max([self.start] + [child.end for child in self.children])
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    @property
+    def self_time(self) -> float:
+        """
+        Time spent in the span itself, outside of its child spans.
+        """
+        return max(0.0, self.duration - sum(child.duration for child in self.children))
+
+    @property
+    def path(self) -> Tuple[str, ...]:
+        return (self.parent.path if self.parent is not None else ()) + (self.label,)
+
+    def walk(self) -> Iterator["Span"]:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def __repr__(self) -> str:
+        return f"Span({self.label!r}, depth={self.depth}, total={self.total})"
+
+
+def strip_span_indent(line: str) -> str:
+    """
+    Returns a timer line without its nesting indentation and colors.
+    """
+    return ANSI_ESCAPE_PATTERN.sub("", line.rstrip("\n")).lstrip(SPAN_INDENT_CHAR)
+
+
+def parse_spans(lines: List[str]) -> List[Span]:
+    """
+    Rebuilds the span tree of a ZKP `.stdout` file.
+
+    Returns:
+    - list: The top-level spans, in order. Spans without an `End:` line, e.g. of a run that crashed, are kept
+      with `total` None.
+    """
+    roots: List[Span] = []
+    stack: List[Span] = []
+    cursor = 0.0
+
+    for line in lines:
+        rest = strip_span_indent(line)
+        if rest.startswith("Start:"):
+            parent = stack[-1] if stack else None
+            span = Span(rest[len("Start:") :].strip(), cursor, parent)
+            (parent.children if parent is not None else roots).append(span)
+            stack.append(span)
+        elif rest.startswith("End:"):
+            result = parse_zkp_end_line(rest)
+            if result is None:
+                continue
+            label, timecost = result
+            # Close the matching span. Spans opened after it were never ended
+            for i in range(len(stack) - 1, -1, -1):
+                if stack[i].label == label:
+                    span = stack[i]
+                    span.total = timecost
+                    cursor = span.end
+                    del stack[i:]
+                    break
+
+    return roots
+
+
+def parse_spans_from_stdout_file(filename: str) -> List[Span]:
+    sys.stderr.write("parse_spans_from_stdout_file:" + filename + "\n")
+    with open_raw_log(filename) as file:
+        return parse_spans(file.readlines())
+
+
+def get_span_phase(span: Span) -> str:
+    """
+    Returns the ZKP phase (setup, prove, verify) of the top-level span a span belongs to.
+    Unlike `classify_zkp_step_label`, unknown labels do not raise but are classified as `other`.
+    """
+    while span.parent is not None:
+        span = span.parent
+    try:
+        phase = classify_zkp_step_label(span.label)
+    except Exception:
+        return "other"
+    return phase if phase is not None else "connect"
+
+
+def get_span_summary(profiles: Dict[str, List[Span]]) -> List[Dict[str, Any]]:
+    """
+    Aggregates the spans with the same path over all profiles.
+
+    Returns:
+    - list: One row per span path, with the phase, the number of occurrences, and the mean total and self
+      time per profile, in the order of first appearance.
+    """
+    rows: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+    for roots in profiles.values():
+        for root in roots:
+            for span in root.walk():
+                if span.path not in rows:
+                    rows[span.path] = {
+                        "path": " > ".join(span.path),
+                        "depth": span.depth,
+                        "phase": get_span_phase(span),
+                        "count": 0,
+                        "total": 0.0,
+                        "self": 0.0,
+                    }
+                row = rows[span.path]
+                row["count"] += 1
+                row["total"] += span.duration
+                row["self"] += span.self_time
+
+    for row in rows.values():
+        row["total"] /= len(profiles)
+        row["self"] /= len(profiles)
+    return list(rows.values())
+
+
+def clamp_span(span: Span, lower: float, upper: float) -> Tuple[float, float]:
+    """
+    Returns the start and end of a span, clamped into `[lower, upper]`. The printed durations are rounded, so
+    children can otherwise slightly overflow their parent or overlap their previous sibling.
+    """
+    start = min(max(span.start, lower), upper)
+    return start, min(max(span.end, start), upper)
+
+
+def iter_clamped_spans(
+    spans: List[Span], lower: float, upper: float
+) -> Iterator[Tuple[Span, float, float]]:
+    """
+    Yields `(span, start, end)` in depth-first order, clamped with `clamp_span`.
+    """
+    for span in spans:
+        start, end = clamp_span(span, lower, upper)
+        yield span, start, end
+        yield from iter_clamped_spans(span.children, start, end)
+        lower = end
+
+
+def to_chrome_trace(profiles: Dict[str, List[Span]]) -> Dict[str, Any]:
+    """
+    Converts the spans of each profile (e.g. each party) to the Chrome trace event format, one thread per profile.
+    Open the result in `chrome://tracing` or https://ui.perfetto.dev.
+    """
+    events: List[Dict[str, Any]] = []
+    for tid, (name, roots) in enumerate(profiles.items()):
+        events.append(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 0,
+                "tid": tid,
+                "args": {"name": name},
+            }
+        )
+        for span, start, end in iter_clamped_spans(roots, 0.0, float("inf")):
+            events.append(
+                {
+                    "name": span.label,
+                    "cat": get_span_phase(span),
+                    "ph": "X",
+                    "ts": start * 1e6,
+                    "dur": (end - start) * 1e6,
+                    "pid": 0,
+                    "tid": tid,
+                    "args": {
+                        "self_ms": span.self_time * 1e3,
+                        "complete": span.complete,
+                    },
+                }
+            )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def to_speedscope(profiles: Dict[str, List[Span]], name: str) -> Dict[str, Any]:
+    """
+    Converts the spans of each profile to the speedscope file format, one evented profile per profile.
+    Open the result in https://www.speedscope.app.
+    """
+    frames: List[Dict[str, str]] = []
+    frame_indexes: Dict[str, int] = {}
+    speedscope_profiles = []
+    for profile_name, roots in profiles.items():
+        events: List[Dict[str, Any]] = []
+
+        def add_events(spans: List[Span], lower: float, upper: float) -> None:
+            for span in spans:
+                start, end = clamp_span(span, lower, upper)
+                if span.label not in frame_indexes:
+                    frame_indexes[span.label] = len(frames)
+                    frames.append({"name": span.label})
+                frame = frame_indexes[span.label]
+                events.append({"type": "O", "frame": frame, "at": start})
+                add_events(span.children, start, end)
+                events.append({"type": "C", "frame": frame, "at": end})
+                lower = end
+
+        add_events(roots, 0.0, float("inf"))
+        end_value = events[-1]["at"] if events else 0.0
+
+        speedscope_profiles.append(
+            {
+                "type": "evented",
+                "name": profile_name,
+                "unit": "seconds",
+                "startValue": 0.0,
+                "endValue": end_value,
+                "events": events,
+            }
+        )
+
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "shared": {"frames": frames},
+        "profiles": speedscope_profiles,
+    }
+
+
+def get_profile_name(filename: str) -> str:
+    """
+    `exp1_mpc_thread.repeat1.Addition-100000.party0.stdout` -> `exp1_mpc_thread.repeat1.Addition-100000.party0`
+    """
+    return os.path.basename(filename).removesuffix(".stdout")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Rebuild the timer span tree of ZKP .stdout files, e.g. of all parties of a run"
+    )
+    parser.add_argument("stdout_files", nargs="+", metavar="FILE")
+    parser.add_argument("--chrome-trace", metavar="OUTPUT", help="Write a Chrome trace")
+    parser.add_argument(
+        "--speedscope", metavar="OUTPUT", help="Write a speedscope profile"
+    )
+    args = parser.parse_args()
+
+    profiles = {
+        get_profile_name(filename): parse_spans_from_stdout_file(filename)
+        for filename in args.stdout_files
+    }
+
+    # Print the per-span breakdown, averaged over the given files
+    print(f"{'phase':<8} {'total (s)':>12} {'self (s)':>12} {'count':>6}  span")
+    for row in get_span_summary(profiles):
+        print(
+            f"{row['phase']:<8} {row['total']:>12.6f} {row['self']:>12.6f} {row['count']:>6}  "
+            + "  " * row["depth"]
+            + row["path"].split(" > ")[-1]
+        )
+
+    if args.chrome_trace:
+        with open(args.chrome_trace, "w") as file:
+            json.dump(to_chrome_trace(profiles), file)
+    if args.speedscope:
+        with open(args.speedscope, "w") as file:
+            json.dump(
+                to_speedscope(profiles, get_profile_name(args.stdout_files[0])), file
+            )
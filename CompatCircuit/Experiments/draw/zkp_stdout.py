@@ -0,0 +1 @@
+../scripts/prove-scripts/zkp_stdout.py
\ No newline at end of file
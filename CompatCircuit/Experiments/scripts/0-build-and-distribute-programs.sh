@@ -27,6 +27,11 @@ echo "Compiling..."
     dotnet build -c "$project_configuration" -r "$project_platform" -o "$program_dir" --self-contained
 )
 
+# Optional wrapper that samples the CPU time, memory and I/O of the experiment runs
+cp -- "$current_dir/prove-scripts/proc_sampler.py" "$program_dir/"
+# Compresses the logs before download-remote-log.sh copies them, if LOG_COMPRESSION is set
+cp -- "$current_dir/prove-scripts/log_compression.py" "$program_dir/"
+
 echo "Compressing..."
 (
     cd -- "$run_dir"
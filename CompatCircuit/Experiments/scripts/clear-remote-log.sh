@@ -16,7 +16,7 @@ errors=0 # Error counter
 for ((i = 0; i < $CONTROL_NODE_NUM; i++)); do
     (
         ssh_user_host="${NODE_SSH_USERNAME}@${NODE_IPS[$i]}"
-        ssh "$ssh_user_host" -- "rm -v ~/$PROJECT_REMOTE_DIR_NAME/$MPC_NODE_NUM/bin/log.*.txt || true"
+        ssh "$ssh_user_host" -- "rm -v ~/$PROJECT_REMOTE_DIR_NAME/$MPC_NODE_NUM/bin/log.*.txt ~/$PROJECT_REMOTE_DIR_NAME/$MPC_NODE_NUM/bin/log.*.txt.{zst,gz} || true"
     ) &
 
     pid=$!       # Get the process ID of the background job
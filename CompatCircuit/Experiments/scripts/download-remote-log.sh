@@ -9,6 +9,19 @@ source -- ./config.sh
 current_dir="$(pwd)"
 run_dir="$current_dir/run/$MPC_NODE_NUM"
 
+# Set LOG_COMPRESSION=zstd or gzip to compress the logs on the nodes before copying them, with the
+# log_compression.py copied into bin/ by 0-build-and-distribute-programs.sh. The analysis scripts read them in place
+LOG_COMPRESSION="${LOG_COMPRESSION:-}"
+case "$LOG_COMPRESSION" in
+"") log_suffix="" ;;
+zstd) log_suffix=".zst" ;;
+gzip) log_suffix=".gz" ;;
+*)
+    echo "Unknown LOG_COMPRESSION $LOG_COMPRESSION" 1>&2
+    exit 1
+    ;;
+esac
+
 mkdir -p -- "$run_dir/log/"
 (
     cd -- "$run_dir/log/"
@@ -19,7 +32,12 @@ mkdir -p -- "$run_dir/log/"
 
         (            
             ssh_user_host="${NODE_SSH_USERNAME}@${NODE_IPS[$i]}"
-            scp "$ssh_user_host:~/$PROJECT_REMOTE_DIR_NAME/$MPC_NODE_NUM/bin/log.*.txt" "./$i/"
+            if [ -n "$LOG_COMPRESSION" ]; then
+                ssh "$ssh_user_host" -- "cd ~/$PROJECT_REMOTE_DIR_NAME/$MPC_NODE_NUM/bin/ && python3 log_compression.py --compress $LOG_COMPRESSION log.*.txt"
+            fi
+            scp "$ssh_user_host:~/$PROJECT_REMOTE_DIR_NAME/$MPC_NODE_NUM/bin/log.*.txt$log_suffix" "./$i/"
+            # Only written by runs wrapped in proc_sampler.py
+            scp "$ssh_user_host:~/$PROJECT_REMOTE_DIR_NAME/$MPC_NODE_NUM/bin/log.*.resources" "./$i/" 2>/dev/null || true
         ) &
 
         pid=$!       # Get the process ID of the background job
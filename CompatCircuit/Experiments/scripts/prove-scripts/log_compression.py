@@ -0,0 +1,383 @@
+"""
+Writes and reads log files as gzip or zstd streams made of independently compressed blocks of `BLOCK_SIZE` bytes:
+
+- gzip: each block is a gzip member. Its header has an `LB` extra subfield with the size of the whole member, so
+  the members can be found by reading their headers only.
+- zstd: each block is a zstd frame, and a seek table in the zstd seekable format is appended as a skippable frame.
+
+Both are regular gzip and zstd files that `zcat` and `zstdcat` decompress. The blocks let readers decompress the end
+of a file without decompressing everything before it, see `read_blocks_reversed`. zstd needs the `zstandard` package.
+
+Used by `prove-r1cs-multiparty-inner.py --compress`, and to compress existing logs, e.g.
+
+    python3 log_compression.py --compress zstd log.*.txt
+
+`draw/log_compression.py` links to this file. The draw scripts pass the readers the file functions of
+`draw/raw_data_archive.py`, to also read files from `rawdata` archives.
+"""
+
+import io
+import os
+import sys
+import gzip
+import zlib
+import struct
+import argparse
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+BLOCK_SIZE = 1 << 20
+COMPRESSION_SUFFIXES = {
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+GZIP_MAGIC = b"\x1f\x8b"
+GZIP_FLAG_EXTRA = 4
+# ID, CM, FLG, MTIME, XFL, OS, XLEN, then the `LB` subfield: SI, LEN and the size of the member
+GZIP_BLOCK_HEADER = struct.Struct("<2sBBIBBH2sHI")
+GZIP_BLOCK_SUBFIELD = b"LB"
+GZIP_TRAILER = struct.Struct("<II")
+
+ZSTD_SKIPPABLE_MAGIC = 0x184D2A5E
+ZSTD_SKIPPABLE_HEADER = struct.Struct("<II")
+ZSTD_SEEKABLE_MAGIC = 0x8F92EAB1
+# Number of frames, descriptor (no checksums), magic
+ZSTD_SEEK_TABLE_FOOTER = struct.Struct("<IBI")
+# Compressed and decompressed size of a frame
+ZSTD_SEEK_TABLE_ENTRY = struct.Struct("<II")
+
+
+def check_compression(compression: str) -> None:
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression {compression}")
+    if compression == "zstd" and zstandard is None:
+        raise RuntimeError(
+            "zstd compression needs the zstandard package: pip install zstandard"
+        )
+
+
+def get_compression(path: str):
+    """
+    Returns the compression of a file from its suffix, or None for a plain file.
+    """
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    return None
+
+
+class BlockCompressedWriter:
+    """
+    A binary file that compresses what is written to it block by block.
+    """
+
+    def __init__(self, path: str, compression: str, block_size: int = BLOCK_SIZE):
+        check_compression(compression)
+        self.compression = compression
+        self.block_size = block_size
+        self.file = open(path, "wb")
+        self.buffer = bytearray()
+        self.block_count = 0
+        self.seek_table = []
+        self.compressor = (
+            zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+            if compression == "zstd"
+            else None
+        )
+
+    def write(self, data: bytes) -> int:
+        self.buffer += data
+        while len(self.buffer) >= self.block_size:
+            self.write_block(bytes(self.buffer[: self.block_size]))
+            del self.buffer[: self.block_size]
+        return len(data)
+
+    def write_block(self, block: bytes) -> None:
+        self.block_count += 1
+        if self.compression == "gzip":
+            compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+            deflated = compressor.compress(block) + compressor.flush()
+            member_size = GZIP_BLOCK_HEADER.size + len(deflated) + GZIP_TRAILER.size
+            self.file.write(
+                GZIP_BLOCK_HEADER.pack(
+                    GZIP_MAGIC,
+                    zlib.DEFLATED,
+                    GZIP_FLAG_EXTRA,
+                    0,
+                    0,
+                    255,
+                    8,
+                    GZIP_BLOCK_SUBFIELD,
+                    4,
+                    member_size,
+                )
+            )
+            self.file.write(deflated)
+            self.file.write(GZIP_TRAILER.pack(zlib.crc32(block), len(block)))
+        else:
+            frame = self.compressor.compress(block)
+            self.file.write(frame)
+            self.seek_table.append((len(frame), len(block)))
+
+    def flush(self) -> None:
+        # The partial block stays in memory, compressing it now would cost compression ratio
+        self.file.flush()
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        # An empty gzip file is not valid, so there is at least one member
+        if self.buffer or (self.compression == "gzip" and self.block_count == 0):
+            self.write_block(bytes(self.buffer))
+            self.buffer.clear()
+        if self.compression == "zstd":
+            seek_table = b"".join(
+                ZSTD_SEEK_TABLE_ENTRY.pack(*entry) for entry in self.seek_table
+            ) + ZSTD_SEEK_TABLE_FOOTER.pack(
+                len(self.seek_table), 0, ZSTD_SEEKABLE_MAGIC
+            )
+            self.file.write(
+                ZSTD_SKIPPABLE_HEADER.pack(ZSTD_SKIPPABLE_MAGIC, len(seek_table))
+            )
+            self.file.write(seek_table)
+        self.file.close()
+
+
+def open_log_writer(path: str, compression=None, buffering: int = -1):
+    """
+    Opens `path`, or `path` with the suffix of `compression`, for writing in binary mode. Copies of the same log
+    with another compression are removed, since readers would prefer them.
+    """
+    for suffix in [""] + list(COMPRESSION_SUFFIXES.values()):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    if compression is None:
+        return open(path, "wb", buffering=buffering)
+    return BlockCompressedWriter(path + COMPRESSION_SUFFIXES[compression], compression)
+
+
+def resolve_log_file(path: str, exists=os.path.exists) -> str:
+    """
+    Returns `path` if it exists, or else its compressed copy if there is one, or else `path`.
+    """
+    if exists(path):
+        return path
+    for suffix in COMPRESSION_SUFFIXES.values():
+        if exists(path + suffix):
+            return path + suffix
+    return path
+
+
+def get_log_file_identity(path: str):
+    """
+    Returns a string that changes when a file changes, or None if it does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def open_log(path: str, mode: str = "r", opener=open, exists=os.path.exists):
+    """
+    Opens a plain, gzip or zstd log file for reading, in text (`r`) or binary (`rb`) mode. A path without a
+    compression suffix is resolved with `resolve_log_file`. The file is opened with `opener(path, mode)`, and
+    `exists` stands in for `os.path.exists`, so that files can be read from elsewhere than the disk.
+    """
+    path = resolve_log_file(path, exists)
+    compression = get_compression(path)
+    if compression is None:
+        return opener(path, mode)
+    check_compression(compression)
+    if compression == "gzip":
+        file = gzip.open(opener(path, "rb"), "rb")
+    else:
+        file = io.BufferedReader(
+            zstandard.ZstdDecompressor().stream_reader(
+                opener(path, "rb"), read_across_frames=True, closefd=True
+            )
+        )
+    return file if mode == "rb" else io.TextIOWrapper(file)
+
+
+class AppendedDataDecompressor:
+    """
+    Decompresses a gzip or zstd file as it is written, from the bytes appended to it since the previous call.
+    Each gzip member or zstd frame is decompressed as far as it has been written, so a block still being
+    written is held back until the rest of it is appended. Skippable frames, e.g. the zstd seek table, are
+    skipped.
+    """
+
+    def __init__(self, compression: str):
+        check_compression(compression)
+        self.compression = compression
+        self.decompressor = None
+
+    def decompress(self, data: bytes) -> bytes:
+        output = []
+        while data:
+            if self.decompressor is None:
+                self.decompressor = (
+                    zlib.decompressobj(16 + zlib.MAX_WBITS)
+                    if self.compression == "gzip"
+                    else zstandard.ZstdDecompressor().decompressobj()
+                )
+            output.append(self.decompressor.decompress(data))
+            if not self.decompressor.eof:
+                break
+            # The rest belongs to the next member or frame
+            data = self.decompressor.unused_data
+            self.decompressor = None
+        return b"".join(output)
+
+
+def get_gzip_blocks(file):
+    """
+    Returns `(offset, size)` of each member of a block-compressed gzip file, or None if it is a plain gzip file.
+    """
+    end = file.seek(0, os.SEEK_END)
+    blocks = []
+    offset = 0
+    while offset < end:
+        file.seek(offset)
+        header = file.read(GZIP_BLOCK_HEADER.size)
+        if len(header) < GZIP_BLOCK_HEADER.size:
+            return None
+        magic, _, flags, _, _, _, extra_size, subfield, subfield_size, member_size = (
+            GZIP_BLOCK_HEADER.unpack(header)
+        )
+        if (
+            magic != GZIP_MAGIC
+            or not flags & GZIP_FLAG_EXTRA
+            or extra_size != 8
+            or subfield != GZIP_BLOCK_SUBFIELD
+            or subfield_size != 4
+        ):
+            return None
+        blocks.append((offset, member_size))
+        offset += member_size
+    return blocks
+
+
+def get_zstd_blocks(file):
+    """
+    Returns `(offset, size)` of each frame of a zstd file from its seek table, or None if it has none.
+    """
+    end = file.seek(0, os.SEEK_END)
+    if end < ZSTD_SKIPPABLE_HEADER.size + ZSTD_SEEK_TABLE_FOOTER.size:
+        return None
+    file.seek(end - ZSTD_SEEK_TABLE_FOOTER.size)
+    frame_count, _, magic = ZSTD_SEEK_TABLE_FOOTER.unpack(
+        file.read(ZSTD_SEEK_TABLE_FOOTER.size)
+    )
+    entries_size = frame_count * ZSTD_SEEK_TABLE_ENTRY.size
+    table_start = end - ZSTD_SEEK_TABLE_FOOTER.size - entries_size
+    if magic != ZSTD_SEEKABLE_MAGIC or table_start < ZSTD_SKIPPABLE_HEADER.size:
+        return None
+    file.seek(table_start)
+    entries = file.read(entries_size)
+    blocks = []
+    offset = 0
+    for i in range(frame_count):
+        frame_size, _ = ZSTD_SEEK_TABLE_ENTRY.unpack_from(
+            entries, i * ZSTD_SEEK_TABLE_ENTRY.size
+        )
+        blocks.append((offset, frame_size))
+        offset += frame_size
+    return blocks
+
+
+def read_blocks_reversed(
+    path: str, block_size: int, opener=open, exists=os.path.exists
+):
+    """
+    Yields the content of a file in consecutive blocks, from the last one to the first one.
+
+    Plain files are read in blocks of `block_size` bytes. Compressed files are read one compressed block at a
+    time, and decompressed all at once if they are not block-compressed, e.g. by `gzip`. `opener` and `exists`
+    are the same as for `open_log`.
+    """
+    path = resolve_log_file(path, exists)
+    compression = get_compression(path)
+    with opener(path, "rb") as file:
+        if compression is None:
+            position = file.seek(0, os.SEEK_END)
+            while position > 0:
+                size_to_read = min(block_size, position)
+                position -= size_to_read
+                file.seek(position)
+                yield file.read(size_to_read)
+            return
+
+        check_compression(compression)
+        blocks = (
+            get_gzip_blocks(file) if compression == "gzip" else get_zstd_blocks(file)
+        )
+        if blocks is None:
+            with open_log(path, "rb", opener, exists) as log_file:
+                yield log_file.read()
+            return
+        for offset, size in reversed(blocks):
+            file.seek(offset)
+            data = file.read(size)
+            if compression == "gzip":
+                yield gzip.decompress(data)
+            else:
+                yield zstandard.ZstdDecompressor().decompress(data)
+
+
+def compress_file(path: str, compression: str) -> str:
+    """
+    Writes a block-compressed copy of a plain file next to it, unless an up-to-date one exists.
+    """
+    target = path + COMPRESSION_SUFFIXES[compression]
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+        return target
+    writer = BlockCompressedWriter(target + ".tmp", compression)
+    with open(path, "rb") as file:
+        while True:
+            data = file.read(BLOCK_SIZE)
+            if not data:
+                break
+            writer.write(data)
+    writer.close()
+    os.replace(target + ".tmp", target)
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write block-compressed copies of log files, which the analysis scripts read in place"
+    )
+    parser.add_argument(
+        "--compress", choices=list(COMPRESSION_SUFFIXES), default="zstd"
+    )
+    parser.add_argument(
+        "--remove",
+        action="store_true",
+        help="Remove each plain file once it is compressed",
+    )
+    parser.add_argument("files", nargs="+")
+    args = parser.parse_args()
+
+    for path in args.files:
+        if get_compression(path) is not None:
+            continue
+        target = compress_file(path, args.compress)
+        print(
+            f"{path}: {os.path.getsize(path)} -> {os.path.getsize(target)} bytes",
+            file=sys.stderr,
+        )
+        if args.remove:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
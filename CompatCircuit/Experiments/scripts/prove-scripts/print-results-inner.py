@@ -1,98 +1,102 @@
-import json
-import re
+"""
+Prints the setup/prove/verify time costs of all the stdout files under a results directory, one row per circuit
+and party (or per circuit with `--group-by circuit`), as CSV, JSONL or the older per-file JSON text. See
+`zkp_results.py` for how the time costs are found.
+"""
+
 import os
-import glob
+import csv
 import sys
-from typing import Dict, List
-
-def get_zkp_step_timecost_from_stdout_file(filename: str) -> Dict[str, float]:
-    results = []
-    with open(filename, "r") as file:
-        for line in file:
-            if line.startswith("End:"):
-                # Adjust the regular expression to ignore the dots before the time value
-                match = re.match(
-                    r"End:\s+(.*?)\s*\.*\s*([\d\.]+)(s|ms|µs|ns)", line.strip()
-                )
-                if match:
-                    label = match.group(1)
-                    time_value = float(match.group(2))
-                    unit = match.group(3)
+import json
+import argparse
 
-                    # Convert time based on the unit
-                    if unit == "s":
-                        pass
-                    elif unit == "ms":
-                        time_value = time_value / 1000
-                    elif unit == "µs":
-                        time_value = time_value / 1000000
-                    elif unit == "ns":
-                        time_value = time_value / 1000000000
-                    else:
-                        raise Exception(f"Unknown unit {unit}")
+from zkp_results import RESULTS_CACHE_FILE, get_results
+from zkp_stdout import ZKP_STEPS
 
-                    # Add to results
-                    results.append((label, time_value))
-                else:
-                    print(f"unrecognized line: {line}")
 
-    del line
-    del time_value
-    del unit
+def group_by_circuit(results):
+    """
+    Returns one row per circuit of each directory, with the largest time cost of each step over its parties,
+    since the slowest party sets the time of the proof.
+    """
+    rows = {}
+    for result in results:
+        key = (result["directory"], result["circuit"])
+        if key not in rows:
+            rows[key] = {
+                "directory": result["directory"],
+                "circuit": result["circuit"],
+                "parties": 0,
+                "failed_parties": 0,
+                **{step: None for step in ZKP_STEPS},
+            }
+        row = rows[key]
+        row["parties"] += 1
+        if result["error"]:
+            row["failed_parties"] += 1
+            continue
+        for step in ZKP_STEPS:
+            if row[step] is None or result[step] > row[step]:
+                row[step] = result[step]
+    return list(rows.values())
 
-    results_classified = {
-        "setup": 0,
-        "prove": 0,
-        "verify": 0,
-    }
-    # classify names
-    for label, timecost in results:
-        if label == "Connecting":
-            pass
-        elif (
-            label.startswith("KZG10::Setup")
-            or label.startswith("Constructing `powers`")
-            or label.startswith("Constructing `shifted_powers`")
-            or label == "Committing to polynomials"
-        ):
-            results_classified["setup"] += timecost
-        elif label in [
-            "commit: p",
-            "prove_public",
-            "prove_gates",
-            "prove_wiring",
-            "timed section",
-        ]:
-            results_classified["prove"] += timecost
-        elif label == "Checking evaluations":
-            results_classified["verify"] += timecost
-        else:
-            raise Exception(f"Unrecognized label {label}")
-    return results_classified
 
 def print_high_precision(data: dict[str, float], precision: int = 16) -> None:
     formatted = {k: f"{v:.{precision}f}" for k, v in data.items()}
     print(json.dumps(formatted, indent=4, ensure_ascii=False))
 
-if __name__ == '__main__':
-    # Check if a directory was provided
-    if len(sys.argv) < 2:
-        print(f"Usage: {sys.argv[0]} <directory>")
-        sys.exit(1)
-    
-    # Get the directory from command line argument
-    target_dir = sys.argv[1]
 
-    # List all files in the current directory
-    for filename in os.listdir(target_dir):
-        # Check if the file ends with .stdout
-        if filename.endswith('.stdout'):
-            filepath = os.path.join(target_dir, filename)
-            # Print the full path
-            print(filepath)
+def write_rows(rows, output_format: str, target_dir: str) -> None:
+    if output_format == "csv":
+        if not rows:
+            return
+        writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    elif output_format == "jsonl":
+        for row in rows:
+            sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+    else:
+        for row in rows:
+            if "party" in row:
+                name = f"{row['circuit']}.party{row['party']}.stdout"
+            else:
+                name = row["circuit"]
+            print(os.path.join(target_dir, row["directory"], name))
+            if row.get("error"):
+                print(row["error"])
+            else:
+                print_high_precision({step: row[step] or 0 for step in ZKP_STEPS})
+            print()
+
 
-            # Print the result
-            result = get_zkp_step_timecost_from_stdout_file(filepath)
-            print_high_precision(result)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Print the time costs of the prover stdout files under a directory, recursively"
+    )
+    parser.add_argument("directory")
+    parser.add_argument(
+        "--format", choices=["csv", "jsonl", "text"], default="csv", dest="output_format"
+    )
+    parser.add_argument("--group-by", choices=["party", "circuit"], default="party")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of processes parsing the stdout files",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Do not read or write {RESULTS_CACHE_FILE} in the directory",
+    )
+    args = parser.parse_args()
 
-            print()
\ No newline at end of file
+    results = get_results(args.directory, args.jobs, not args.no_cache)
+    rows = group_by_circuit(results) if args.group_by == "circuit" else results
+    write_rows(rows, args.output_format, args.directory)
+
+    failed = sum(1 for result in results if result["error"])
+    if failed:
+        sys.stderr.write(f"{failed} of {len(results)} stdout files could not be parsed\n")
+        sys.exit(1)
@@ -3,4 +3,4 @@ set -euo pipefail
 
 source -- ./config.sh
 
-exec python3 print-results-inner.py "$R1CS_PATH"
\ No newline at end of file
+exec python3 print-results-inner.py "$R1CS_PATH" "$@"
\ No newline at end of file
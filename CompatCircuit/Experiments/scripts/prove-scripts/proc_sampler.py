@@ -0,0 +1,172 @@
+"""
+Samples the CPU time, memory and I/O of a process from `/proc/<pid>/stat`, `status` and `io` at a fixed interval,
+and writes them as a tab-separated time series, one line per sample:
+
+    # resources 1 interval=1.0
+    elapsed_ms	cpu_ms	rss_kb	hwm_kb	read_bytes	write_bytes	threads	span
+    1001	985	812344	812344	0	4096	17	2
+
+- `elapsed_ms` is counted from the start of the process, `cpu_ms` is its user and system time so far.
+- `hwm_kb` is the peak resident set size since the process started, as tracked by the kernel, so it does not
+  depend on the interval.
+- `read_bytes` and `write_bytes` are the bytes the process caused to be read from and written to storage. They
+  are -1 if `/proc/<pid>/io` is not readable.
+- Child processes of the process are not included.
+- `span` is the number of top-level timer spans the process had ended when the sample was taken, or -1 if
+  unknown. Sample `i` with `span == k` was taken during the `k`-th top-level span of its stdout.
+
+Used by `prove-r1cs-multiparty-inner.py`, and as a wrapper of other commands, e.g.
+
+    python3 proc_sampler.py -- ./Anonymous.CollaborativeZkVmExperiment exp-1-run-mpc-thread
+
+which writes the series of the command next to the `log.$INSTANCE_NAME.*.txt` file it creates, as
+`log.$INSTANCE_NAME.*.resources`.
+"""
+
+import subprocess
+import time
+import sys
+import os
+import glob
+import argparse
+
+RESOURCES_FILE_VERSION = 1
+SAMPLE_INTERVAL = 1.0
+COLUMNS = [
+    "elapsed_ms",
+    "cpu_ms",
+    "rss_kb",
+    "hwm_kb",
+    "read_bytes",
+    "write_bytes",
+    "threads",
+    "span",
+]
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def read_proc_sample(pid: int):
+    """
+    Returns `[cpu_ms, rss_kb, hwm_kb, read_bytes, write_bytes, threads]` of a process, or None once it has exited.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "r") as file:
+            stat = file.read()
+        with open(f"/proc/{pid}/status", "r") as file:
+            status = file.read()
+    except (FileNotFoundError, ProcessLookupError):
+        return None
+
+    # The command name in parentheses may contain spaces
+    fields = stat[stat.rindex(")") + 2 :].split()
+    if fields[0] in ["Z", "X"]:
+        return None
+    cpu_ms = (int(fields[11]) + int(fields[12])) * 1000 // CLOCK_TICKS
+    threads = int(fields[17])
+
+    rss_kb = 0
+    hwm_kb = 0
+    for line in status.splitlines():
+        if line.startswith("VmRSS:"):
+            rss_kb = int(line.split()[1])
+        elif line.startswith("VmHWM:"):
+            hwm_kb = int(line.split()[1])
+
+    read_bytes = -1
+    write_bytes = -1
+    try:
+        with open(f"/proc/{pid}/io", "r") as file:
+            for line in file:
+                name, value = line.split(":")
+                if name == "read_bytes":
+                    read_bytes = int(value)
+                elif name == "write_bytes":
+                    write_bytes = int(value)
+    except (FileNotFoundError, PermissionError, ProcessLookupError):
+        pass
+
+    return [cpu_ms, rss_kb, hwm_kb, read_bytes, write_bytes, threads]
+
+
+class ProcSampler:
+    """
+    Writes the samples of a process to an open file.
+    """
+
+    def __init__(self, pid: int, file, start_ns: int, interval: float):
+        self.pid = pid
+        self.file = file
+        self.start_ns = start_ns
+        file.write(f"# resources {RESOURCES_FILE_VERSION} interval={interval}\n")
+        file.write("\t".join(COLUMNS) + "\n")
+
+    def sample(self, span: int = -1) -> bool:
+        """
+        Takes one sample. Returns False once the process has exited.
+        """
+        values = read_proc_sample(self.pid)
+        if values is None:
+            return False
+        elapsed_ms = (time.monotonic_ns() - self.start_ns) // 1000000
+        self.file.write("\t".join(map(str, [elapsed_ms] + values + [span])) + "\n")
+        return True
+
+
+def find_log_file(instance_name: str, started: float):
+    """
+    Returns the newest `log.{instance_name}.*.txt` file in the working directory created after `started`, or None.
+    """
+    log_files = [
+        log_file
+        for log_file in glob.glob(f"log.{instance_name}.*.txt")
+        if os.path.getmtime(log_file) >= started
+    ]
+    return max(log_files, key=os.path.getmtime) if log_files else None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a command and sample its CPU time, memory and I/O from /proc"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=SAMPLE_INTERVAL,
+        help="Seconds between two samples",
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Output file (default: next to the log.$INSTANCE_NAME.*.txt file the command creates)",
+    )
+    parser.add_argument("command", nargs="+")
+    args = parser.parse_args()
+
+    instance_name = os.environ.get("INSTANCE_NAME", "default")
+    output = args.output or f"log.{instance_name}.{os.getpid()}.resources.tmp"
+
+    started = time.time()
+    start_ns = time.monotonic_ns()
+    process = subprocess.Popen(args.command)
+    with open(output, "w") as file:
+        sampler = ProcSampler(process.pid, file, start_ns, args.interval)
+        while process.poll() is None:
+            sampler.sample()
+            file.flush()
+            try:
+                process.wait(args.interval)
+            except subprocess.TimeoutExpired:
+                pass
+
+    if args.output is None:
+        log_file = find_log_file(instance_name, started)
+        if log_file is None:
+            print(f"No log.{instance_name}.*.txt file found, keeping {output}")
+        else:
+            os.replace(output, log_file.removesuffix(".txt") + ".resources")
+    sys.exit(process.returncode)
+
+
+if __name__ == "__main__":
+    main()
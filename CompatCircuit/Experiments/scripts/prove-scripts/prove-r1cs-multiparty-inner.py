@@ -1,138 +1,494 @@
+import asyncio
 import subprocess
 import time
 import sys
-import subprocess
-import time
-import threading
 import os
+import json
+import argparse
+
+from log_compression import COMPRESSION_SUFFIXES, open_log_writer
+from proc_sampler import SAMPLE_INTERVAL, ProcSampler
+from traffic_sampler import SS_COMMAND, TrafficSampler, read_hosts_file
+from zkp_results import METRICS_FILE
+from zkp_stdout import parse_zkp_end_line
 
 """
-1. Start a group of processes, redirecting EACH stdout and stderr to files. Count the line count of EACH stdout.
-2. After processes are started, wait for 60 seconds, then check if ANY stdout has fewer than 6 lines. If ANY process matches, kill ALL processes at the same time, sleep for 60 seconds, and go to step 1.
-3. Since checks have passed, the script continues to wait until ALL processes have ended.
+1. Start a group of processes, redirecting EACH stdout and stderr to files. All stdout pipes are read concurrently by one asyncio event loop.
+2. After processes are started, wait until EACH stdout reports `End: Connecting`, for at most `--ready-timeout` seconds. If ANY process exits or times out before that, kill ALL processes at the same time, sleep with exponential backoff, and go to step 1.
+3. Since checks have passed, the script continues to wait until ALL processes have ended. If ANY process fails, kill ALL the others at once and exit with an error.
+4. Write the start/ready/end time of EACH process, in nanoseconds of the monotonic clock, and the failed attempts, to a `.timing` file next to its stdout.
+5. With `--sample-interval` above 0, sample the CPU time, memory and I/O of EACH process to a `.resources` file next to its stdout, see `proc_sampler.py`.
+6. With `--traffic-interval` above 0, sample the TCP counters of the sockets between the processes, and write the bytes sent over EACH link to a `.all.traffic` file, see `traffic_sampler.py`.
+7. Append one record per process to `metrics.jsonl` in `r1cs_path`, with the top-level timer spans parsed while the stdout was streamed, so that the analysis does not have to read the stdout again.
+8. With `--compress`, the stdout and stderr files are written as `.stdout.zst`/`.stderr.zst` (or `.gz`) instead, see `log_compression.py`.
 """
 
-line_numbers = {}
+TIMING_FILE_VERSION = 2
+
+READY_TIMEOUT = 60
+BACKOFF_INITIAL = 5
+BACKOFF_MAX = 60
+
+# Bytes read from a stdout pipe at once
+READ_SIZE = 1 << 16
+# Buffer size of the log files, so that they are not written line by line
+LOG_BUFFER_SIZE = 1 << 20
+READY_LINE = b"End:     Connecting"
+
+METRICS_FILE_VERSION = 2
+
+
+class Party:
+    """
+    A prover process, its log files and its timestamps.
+    """
+
+    def __init__(self, index: int, process, stdout_file, stderr_file, timing):
+        self.index = index
+        self.process = process
+        self.stdout_file = stdout_file
+        self.stderr_file = stderr_file
+        self.timing = timing
+        # Set once the process has connected to the others, or has exited
+        self.ready = asyncio.Event()
+        self.line_count = 0
+        self.stdout_bytes = 0
+        # `[label, seconds]` of the top-level `End:` lines, in order
+        self.spans = []
+
+
+async def pump_stdout(party: Party, echo: bool):
+    """
+    Copies the stdout pipe of a process to its log file until the process closes it, and picks up the
+    `End: Connecting` line and the top-level timer spans on the way.
+    """
+    partial = b""
+    while True:
+        chunk = await party.process.stdout.read(READ_SIZE)
+        if not chunk:
+            break
+        party.stdout_file.write(chunk)
+        party.stdout_bytes += len(chunk)
+
+        lines = (partial + chunk).split(b"\n")
+        partial = lines.pop()
+        for line in lines:
+            party.line_count += 1
+            # Nested timer lines start with `·`, so only the top-level ones match
+            if line.startswith(b"End:"):
+                # Connected to the other parties
+                if party.timing["ready_ns"] is None and line.startswith(READY_LINE):
+                    party.timing["ready_ns"] = time.monotonic_ns()
+                    party.ready.set()
+                span = parse_zkp_end_line(line.decode(errors="replace"))
+                if span is not None:
+                    party.spans.append(span)
+            if echo:
+                sys.stdout.write(
+                    f"[{party.index}] Line {party.line_count}: {line.decode(errors='replace').rstrip()}\n"
+                )
+    if partial.startswith(b"End:"):
+        span = parse_zkp_end_line(partial.decode(errors="replace"))
+        if span is not None:
+            party.spans.append(span)
+
+
+async def pump_stderr(party: Party):
+    """
+    Copies the stderr pipe of a process to its compressed log file.
+    """
+    while True:
+        chunk = await party.process.stderr.read(READ_SIZE)
+        if not chunk:
+            break
+        party.stderr_file.write(chunk)
+
+
+async def sample_resources(party: Party, path: str, interval: float):
+    with open(path, "w") as file:
+        sampler = ProcSampler(
+            party.process.pid, file, party.timing["start_ns"], interval
+        )
+        # The number of ended top-level spans tells which span a sample was taken in
+        while sampler.sample(len(party.spans)):
+            await asyncio.sleep(interval)
+
+
+async def sample_traffic(parties, sampler: TrafficSampler, interval: float):
+    party_by_pid = {party.process.pid: party.index for party in parties}
+    while any(party.process.returncode is None for party in parties):
+        process = await asyncio.create_subprocess_exec(
+            *SS_COMMAND, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        output, _ = await process.communicate()
+        sampler.feed(output.decode(errors="replace"), party_by_pid)
+        await asyncio.sleep(interval)
 
 
-def log_output(index: int, proc, stdout_file):
-    line_numbers[index] = 0
-    # Use proc.stdout to read output line-by-line
-    for line in iter(proc.stdout.readline, b""):
-        decoded_line = line.decode()
-        # Write each line into the log file with a line number
-        stdout_file.write(decoded_line)
-        line_numbers[index] += 1
-        print(f"[{index}] Line {line_numbers[index]}: {decoded_line.rstrip()}")
+async def wait_for_exit(party: Party) -> int:
+    returncode = await party.process.wait()
+    party.timing["end_ns"] = time.monotonic_ns()
+    party.ready.set()
+    return returncode
 
 
-def start_processes(party_count: int, r1cs_name: str, r1cs_path: str, bin_client: str):
-    processes = []
-    stdout_files = []
-    stderr_files = []
-    logging_threads = []
+async def start_processes(
+    party_count: int,
+    r1cs_name: str,
+    r1cs_path: str,
+    bin_client: str,
+    hosts_file: str,
+    echo: bool,
+    sample_interval: float,
+    compression,
+):
+    parties = []
+    tasks = []
 
     for party_index in range(party_count):
-        stdout_file = open(os.path.join(r1cs_path, f"{r1cs_name}.party{party_index}.stdout"), "w")
-        stderr_file = open(os.path.join(r1cs_path,f"{r1cs_name}.party{party_index}.stderr"), "w")
+        stdout_file = open_log_writer(
+            os.path.join(r1cs_path, f"{r1cs_name}.party{party_index}.stdout"),
+            compression,
+            buffering=LOG_BUFFER_SIZE,
+        )
+        stderr_file = open_log_writer(
+            os.path.join(r1cs_path, f"{r1cs_name}.party{party_index}.stderr"),
+            compression,
+        )
 
-        stderr_file.write(f"{int(time.time())}\n")
+        stderr_file.write(f"{int(time.time())}\n".encode())
         stderr_file.flush()
 
-        process = subprocess.Popen(
-            args=[
-                bin_client,
-                "-d",
-                "PlonkCompatCircuitMultiParty",
-                "--hosts",
-                f"hosts_{party_count}",
-                "--party",
-                f"{party_index}",
-                f"{r1cs_name}.party{party_index}.r1cs.json",
-            ],
+        timing = {
+            "version": TIMING_FILE_VERSION,
+            "clock": "monotonic_ns",
+            "wall_start_ns": time.time_ns(),
+            "start_ns": time.monotonic_ns(),
+            "ready_ns": None,
+            "end_ns": None,
+        }
+        process = await asyncio.create_subprocess_exec(
+            bin_client,
+            "-d",
+            "PlonkCompatCircuitMultiParty",
+            "--hosts",
+            hosts_file,
+            "--party",
+            f"{party_index}",
+            f"{r1cs_name}.party{party_index}.r1cs.json",
             stdout=subprocess.PIPE,
-            stderr=stderr_file,
+            # A compressed file has no file descriptor the process could write to
+            stderr=stderr_file if compression is None else subprocess.PIPE,
             stdin=subprocess.PIPE,
             cwd=r1cs_path,
         )
-        processes.append(process)
-        stdout_files.append(stdout_file)
-        stderr_files.append(stderr_file)
+        party = Party(party_index, process, stdout_file, stderr_file, timing)
+        parties.append(party)
+        tasks.append(asyncio.create_task(pump_stdout(party, echo)))
+        if compression is not None:
+            tasks.append(asyncio.create_task(pump_stderr(party)))
+        tasks.append(asyncio.create_task(wait_for_exit(party)))
+        if sample_interval > 0:
+            tasks.append(
+                asyncio.create_task(
+                    sample_resources(
+                        party,
+                        os.path.join(
+                            r1cs_path, f"{r1cs_name}.party{party_index}.resources"
+                        ),
+                        sample_interval,
+                    )
+                )
+            )
+    return parties, tasks
 
-        # Start a separate thread to handle the output logging
-        logging_thread = threading.Thread(
-            target=log_output, args=(party_index, process, stdout_file)
-        )
-        logging_thread.start()
-        logging_threads.append(logging_thread)
-    return processes, stdout_files, stderr_files, logging_threads
 
+async def wait_until_ready(parties, ready_timeout: float):
+    """
+    Returns None once all processes have connected, or the reason why they did not.
+    Returns as soon as one process exits before connecting.
+    """
+    deadline = time.monotonic() + ready_timeout
+    waiting = {asyncio.create_task(party.ready.wait()): party for party in parties}
+    try:
+        while waiting:
+            done, _ = await asyncio.wait(
+                waiting,
+                timeout=max(0, deadline - time.monotonic()),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                party = min(waiting.values(), key=lambda party: party.index)
+                return f"party {party.index} did not connect within {ready_timeout} sec"
+            for task in done:
+                party = waiting.pop(task)
+                if party.timing["ready_ns"] is None:
+                    return f"party {party.index} exited before connecting"
+        return None
+    finally:
+        for task in waiting:
+            task.cancel()
 
-def are_stdout_lines_weird(party_count: int, line_threshold: int):
-    for party_index in range(party_count):
-        if line_numbers.get(party_index, 0) < line_threshold:
-            return True
-    return False
 
+async def wait_until_exited(parties):
+    """
+    Waits until all processes have exited. As soon as one of them fails, the others are killed, since they
+    would otherwise wait for it forever.
 
-def kill_all_processes(processes):
-    for process in processes:
-        process.kill()
+    Returns:
+    - None if all processes succeeded, or the index of the first one that failed.
+    """
+    waiting = {asyncio.create_task(party.process.wait()): party for party in parties}
+    failed_party = None
+    while waiting:
+        done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            party = waiting.pop(task)
+            if task.result() != 0 and failed_party is None:
+                failed_party = party.index
+                kill_all_processes(parties)
+    return failed_party
 
 
-def close_files(files):
-    for file in files:
-        file.close()
+def kill_all_processes(parties):
+    for party in parties:
+        if party.process.returncode is None:
+            party.process.kill()
 
 
-def main():
-    if len(sys.argv) < 5:
-        print(
-            f"Usage: {sys.argv[0]} <party-count> <r1cs-name> <r1cs-path> <bin-client>"
-        )
-        sys.exit(1)
+def write_timing_files(r1cs_name: str, r1cs_path: str, parties, failed_attempts):
+    for party in parties:
+        timing = dict(party.timing)
+        timing["exit_code"] = party.process.returncode
+        timing["restarts"] = len(failed_attempts)
+        timing["failed_attempts"] = failed_attempts
+        with open(
+            os.path.join(r1cs_path, f"{r1cs_name}.party{party.index}.timing"), "w"
+        ) as file:
+            json.dump(timing, file)
+            file.write("\n")
+
+
+def append_metrics(r1cs_name: str, r1cs_path: str, parties, compression):
+    """
+    Appends one line per process to `metrics.jsonl`. A circuit proved again gets new lines, and the last
+    line of a stdout file wins. `stdout_file_bytes`, the size of the stdout file on disk, lets readers check
+    that the stdout file is still the one the line was parsed from. `stdout_bytes` is the size of the stdout
+    before compression.
+    """
+    suffix = COMPRESSION_SUFFIXES[compression] if compression is not None else ""
+    lines = []
+    for party in parties:
+        record = {
+            "version": METRICS_FILE_VERSION,
+            # Without the compression suffix
+            "stdout": f"{r1cs_name}.party{party.index}.stdout",
+            "circuit": r1cs_name,
+            "party": party.index,
+            "stdout_bytes": party.stdout_bytes,
+            "stdout_file_bytes": os.path.getsize(
+                os.path.join(
+                    r1cs_path, f"{r1cs_name}.party{party.index}.stdout{suffix}"
+                )
+            ),
+            "exit_code": party.process.returncode,
+            "total_ns": party.timing["end_ns"] - party.timing["start_ns"],
+            "spans": party.spans,
+        }
+        lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+    with open(os.path.join(r1cs_path, METRICS_FILE), "a", encoding="utf-8") as file:
+        file.write("".join(lines))
+
+
+def write_traffic_file(
+    r1cs_name: str, r1cs_path: str, parties, sampler: TrafficSampler, interval: float
+):
+    """
+    Writes the bytes sent over each link, and the throughput over the time all processes were connected.
+    """
+    bytes_sent, unresolved_bytes = sampler.matrix()
+    connected_ns = max(party.timing["end_ns"] for party in parties) - max(
+        party.timing["ready_ns"] for party in parties
+    )
+    seconds = connected_ns / 1e9
+    traffic = {
+        "version": 1,
+        "interval": interval,
+        "parties": len(parties),
+        "seconds": seconds,
+        "bytes_sent": bytes_sent,
+        "bytes_per_second": [
+            [value / seconds if seconds > 0 else 0 for value in row]
+            for row in bytes_sent
+        ],
+        "unresolved_bytes": unresolved_bytes,
+    }
+    with open(os.path.join(r1cs_path, f"{r1cs_name}.all.traffic"), "w") as file:
+        json.dump(traffic, file)
+        file.write("\n")
 
-    party_count = int(sys.argv[1])
-    r1cs_name = sys.argv[2]
-    r1cs_path = sys.argv[3]
-    bin_client = sys.argv[4]
 
+def close_files(parties):
+    for party in parties:
+        party.stdout_file.close()
+        party.stderr_file.close()
+
+
+async def run(args) -> int:
+    failed_attempts = []
+    backoff = args.backoff_initial
     while True:
-        print(f"Starting processes on {r1cs_name}")
-        processes, stdout_files, stderr_files, logging_threads = start_processes(
-            party_count, r1cs_name, r1cs_path, bin_client
+        print(f"Starting processes on {args.r1cs_name}", flush=True)
+        parties, tasks = await start_processes(
+            args.party_count,
+            args.r1cs_name,
+            args.r1cs_path,
+            args.bin_client,
+            args.hosts_file or f"hosts_{args.party_count}",
+            args.echo,
+            args.sample_interval,
+            args.compress,
         )
+        started_ns = time.monotonic_ns()
+        traffic_sampler = None
+        if args.traffic_interval > 0:
+            traffic_sampler = TrafficSampler(
+                args.party_count,
+                read_hosts_file(
+                    os.path.join(
+                        args.r1cs_path, args.hosts_file or f"hosts_{args.party_count}"
+                    )
+                ),
+            )
+            tasks.append(
+                asyncio.create_task(
+                    sample_traffic(parties, traffic_sampler, args.traffic_interval)
+                )
+            )
         print(
-            f"All processes started. Waiting 60 sec before checking whether they work..."
+            f"All processes started. Waiting at most {args.ready_timeout} sec for them to connect...",
+            flush=True,
         )
-        time.sleep(60)
-
-        if are_stdout_lines_weird(party_count, line_threshold=6):
-            print(f"Failure. Killing processes...")
-            kill_all_processes(processes)
-            close_files(stdout_files)
-            close_files(stderr_files)
-            print(f"Waiting 60 sec before restarting them...")
-            time.sleep(60)
+
+        failure = await wait_until_ready(parties, args.ready_timeout)
+        if failure is not None:
+            print(f"Failure: {failure}. Killing processes...", flush=True)
+            failed_attempts.append(
+                {
+                    "reason": failure,
+                    "elapsed_ns": time.monotonic_ns() - started_ns,
+                }
+            )
+            kill_all_processes(parties)
+            # Let the pipes drain before the files are closed
+            await asyncio.gather(*tasks)
+            close_files(parties)
+            if (
+                args.max_restarts is not None
+                and len(failed_attempts) > args.max_restarts
+            ):
+                print(f"Giving up after {len(failed_attempts)} failed attempts")
+                return 1
+            print(f"Waiting {backoff} sec before restarting them...", flush=True)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, args.backoff_max)
             continue
 
-        print("Successfully start the clients. Waiting for them to exit...")
+        print(
+            f"Successfully start the clients in {(time.monotonic_ns() - started_ns) / 1e9:.3f} sec. Waiting for them to exit...",
+            flush=True,
+        )
+
+        failed_party = await wait_until_exited(parties)
+        await asyncio.gather(*tasks)
 
-        all_done = False
-        while not all_done:
-            all_done = all(proc.poll() is not None for proc in processes)
-            time.sleep(1)
-        
         # exited
-        for stderr_file in stderr_files:
-            stderr_file.write(f"{int(time.time())}\n")
-            stderr_file.flush()
+        for party in parties:
+            party.stderr_file.write(f"{int(time.time())}\n".encode())
+            party.stderr_file.flush()
+
+        write_timing_files(args.r1cs_name, args.r1cs_path, parties, failed_attempts)
+        if traffic_sampler is not None:
+            write_traffic_file(
+                args.r1cs_name,
+                args.r1cs_path,
+                parties,
+                traffic_sampler,
+                args.traffic_interval,
+            )
 
         print("Exited. Closing files...")
-        close_files(stdout_files)
-        close_files(stderr_files)
-        break
+        close_files(parties)
+        append_metrics(args.r1cs_name, args.r1cs_path, parties, args.compress)
+        if failed_party is not None:
+            print(
+                f"Failure: party {failed_party} exited with code {parties[failed_party].process.returncode}. The other processes were killed"
+            )
+            return 1
+        return 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("party_count", type=int)
+    parser.add_argument("r1cs_name")
+    parser.add_argument("r1cs_path")
+    parser.add_argument("bin_client")
+    parser.add_argument(
+        "--ready-timeout",
+        type=float,
+        default=READY_TIMEOUT,
+        help="Seconds to wait for all processes to connect before restarting them",
+    )
+    parser.add_argument(
+        "--backoff-initial",
+        type=float,
+        default=BACKOFF_INITIAL,
+        help="Seconds to wait before the first restart, doubled after each failure",
+    )
+    parser.add_argument(
+        "--backoff-max",
+        type=float,
+        default=BACKOFF_MAX,
+        help="Maximum seconds to wait before a restart",
+    )
+    parser.add_argument(
+        "--max-restarts",
+        type=int,
+        default=None,
+        help="Give up after this many restarts (default: never)",
+    )
+    parser.add_argument(
+        "--hosts-file",
+        default=None,
+        help="Hosts file of the processes, relative to r1cs_path (default: hosts_{party_count})",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=SAMPLE_INTERVAL,
+        help="Seconds between two samples of the CPU time, memory and I/O of each process (0: do not sample)",
+    )
+    parser.add_argument(
+        "--traffic-interval",
+        type=float,
+        default=0,
+        help="Seconds between two samples of the bytes sent between the processes, with ss (0: do not sample)",
+    )
+    parser.add_argument(
+        "--compress",
+        choices=list(COMPRESSION_SUFFIXES),
+        default=None,
+        help="Write the stdout and stderr files compressed, as .zst or .gz files (zstd needs the zstandard package)",
+    )
+    parser.add_argument(
+        "--echo",
+        action="store_true",
+        help="Print every stdout line of every process, prefixed with its index",
+    )
+    args = parser.parse_args()
 
+    sys.exit(asyncio.run(run(args)))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,195 @@
+"""
+1. Find the circuits in `r1cs_path` that have a `.r1cs.json` file for EACH party, largest first.
+2. Start up to `--jobs` slots. EACH slot gets its own hosts file, `hosts_{party_count}.slot{slot}`, with a port range no other slot uses.
+3. EACH slot takes the next circuit from the queue and proves it with `prove-r1cs-multiparty-inner.py`, which writes the logs in the usual layout. After a circuit, the slot waits `--slot-cooldown` seconds before it takes the next one.
+"""
+
+import asyncio
+import time
+import sys
+import os
+import argparse
+
+INNER_SCRIPT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "prove-r1cs-multiparty-inner.py"
+)
+
+BASE_PORT = 8000
+CORES_PER_PARTY = 4
+SLOT_COOLDOWN = 10
+
+
+def find_circuits(party_count: int, r1cs_path: str):
+    """
+    Returns the names of the circuits with a `.r1cs.json` file for each party, sorted by decreasing size of
+    the party 0 file, like `ls -S` in `prove-r1cs-multiparty.sh`. Proving the largest circuits first keeps
+    the slots busy until the end.
+    """
+    circuits = []
+    for filename in os.listdir(r1cs_path):
+        if not filename.endswith(".party0.r1cs.json"):
+            continue
+        circuit_name = filename.removesuffix(".party0.r1cs.json")
+
+        missing_files = [
+            f"{circuit_name}.party{party_index}.r1cs.json"
+            for party_index in range(party_count)
+            if not os.path.isfile(
+                os.path.join(r1cs_path, f"{circuit_name}.party{party_index}.r1cs.json")
+            )
+        ]
+        if missing_files:
+            for missing_file in missing_files:
+                print(f"Warning: File {missing_file} does not exist.")
+            continue
+
+        circuits.append(
+            (os.path.getsize(os.path.join(r1cs_path, filename)), circuit_name)
+        )
+    return [circuit_name for _, circuit_name in sorted(circuits, reverse=True)]
+
+
+def get_default_jobs(party_count: int, cores_per_party: int) -> int:
+    return max(1, (os.cpu_count() or 1) // (party_count * cores_per_party))
+
+
+def get_slot_hosts_file(party_count: int, slot: int) -> str:
+    return f"hosts_{party_count}.slot{slot}"
+
+
+def write_slot_hosts_file(party_count: int, r1cs_path: str, slot: int, base_port: int):
+    """
+    Writes the hosts file of a slot. Like `generate-local-host-file.sh`, party `i` listens on `127.0.0.{100 + i}`,
+    but each slot uses its own range of `party_count` ports.
+    """
+    hosts_file = get_slot_hosts_file(party_count, slot)
+    with open(os.path.join(r1cs_path, hosts_file), "w") as file:
+        for party_index in range(party_count):
+            file.write(
+                f"127.0.0.{100 + party_index}:{base_port + slot * party_count + party_index}\n"
+            )
+    return hosts_file
+
+
+async def run_slot(slot: int, queue: asyncio.Queue, args, hosts_file: str, results):
+    while True:
+        try:
+            circuit_name = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+
+        print(f"[slot {slot}] Proving {circuit_name}", flush=True)
+        started = time.monotonic()
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            INNER_SCRIPT,
+            str(args.party_count),
+            circuit_name,
+            args.r1cs_path,
+            args.bin_client,
+            "--hosts-file",
+            hosts_file,
+            *args.inner_args,
+        )
+        returncode = await process.wait()
+        elapsed = time.monotonic() - started
+        results.append((circuit_name, returncode, elapsed))
+        print(
+            f"[slot {slot}] Finished {circuit_name} with code {returncode} in {elapsed:.3f} sec "
+            f"({queue.qsize()} circuits left)",
+            flush=True,
+        )
+
+        if not queue.empty():
+            await asyncio.sleep(args.slot_cooldown)
+
+
+async def run(args) -> int:
+    circuits = find_circuits(args.party_count, args.r1cs_path)
+    jobs = args.jobs or get_default_jobs(args.party_count, args.cores_per_party)
+    jobs = min(jobs, max(1, len(circuits)))
+    print(
+        f"Proving {len(circuits)} circuits with {args.party_count} parties, {jobs} at a time",
+        flush=True,
+    )
+
+    queue = asyncio.Queue()
+    for circuit_name in circuits:
+        queue.put_nowait(circuit_name)
+
+    results = []
+    started = time.monotonic()
+    await asyncio.gather(
+        *(
+            run_slot(
+                slot,
+                queue,
+                args,
+                write_slot_hosts_file(
+                    args.party_count, args.r1cs_path, slot, args.base_port
+                ),
+                results,
+            )
+            for slot in range(jobs)
+        )
+    )
+    elapsed = time.monotonic() - started
+
+    failed = [
+        circuit_name for circuit_name, returncode, _ in results if returncode != 0
+    ]
+    busy = sum(elapsed for _, _, elapsed in results)
+    print(
+        f"Proved {len(results) - len(failed)}/{len(results)} circuits in {elapsed:.3f} sec "
+        f"(sum of proving times {busy:.3f} sec, speedup {busy / elapsed if elapsed > 0 else 0:.2f}x)"
+    )
+    for circuit_name in failed:
+        print(f"Failed: {circuit_name}")
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Prove the circuits of a directory, several at a time, each on its own ports",
+        epilog="Arguments after -- are passed to prove-r1cs-multiparty-inner.py, e.g. -- --max-restarts 3",
+    )
+    parser.add_argument("party_count", type=int)
+    parser.add_argument("r1cs_path")
+    parser.add_argument("bin_client")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of circuits proved at the same time (default: CPU cores / (party_count * --cores-per-party))",
+    )
+    parser.add_argument(
+        "--cores-per-party",
+        type=int,
+        default=CORES_PER_PARTY,
+        help="CPU cores given to each prover process when deriving --jobs",
+    )
+    parser.add_argument(
+        "--base-port",
+        type=int,
+        default=BASE_PORT,
+        help="First port of slot 0. Slot s uses the ports base_port + s * party_count + [0, party_count)",
+    )
+    parser.add_argument(
+        "--slot-cooldown",
+        type=float,
+        default=SLOT_COOLDOWN,
+        help="Seconds a slot waits after a circuit before it proves the next one",
+    )
+    argv = sys.argv[1:]
+    inner_args = []
+    if "--" in argv:
+        inner_args = argv[argv.index("--") + 1 :]
+        argv = argv[: argv.index("--")]
+    args = parser.parse_args(argv)
+    args.inner_args = inner_args
+
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
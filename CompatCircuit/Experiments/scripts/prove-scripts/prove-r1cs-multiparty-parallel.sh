@@ -0,0 +1,8 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+source -- ./config.sh
+
+# Proves several circuits at the same time, each with its own hosts file in "$R1CS_PATH"
+# Options are passed on, e.g. `bash prove-r1cs-multiparty-parallel.sh --jobs 2`
+exec python3 prove-r1cs-multiparty-parallel.py "$PARTY_COUNT" "$R1CS_PATH" "$BIN_CLIENT" "$@"
@@ -31,7 +31,8 @@ bash generate-local-host-file.sh
 
         (
             cd -- "$current_dir"
-            python3 prove-r1cs-multiparty-inner.py "$PARTY_COUNT" "$circuit_name" "$R1CS_PATH" "$BIN_CLIENT" || true
+            # Options are passed on, e.g. `bash prove-r1cs-multiparty.sh --compress zstd`
+            python3 prove-r1cs-multiparty-inner.py "$PARTY_COUNT" "$circuit_name" "$R1CS_PATH" "$BIN_CLIENT" "$@" || true
         )
 
         sleep 10
@@ -17,10 +17,15 @@ bash generate-local-host-file.sh
 
         stdout_name="${circuit_name}.single.stdout"
         stderr_name="${circuit_name}.single.stderr"
+        timing_name="${circuit_name}.single.timing"
         >"${stderr_name}"
         date +%s >>"${stderr_name}"
+        start_ns="$(date +%s%N)"
         ("$BIN_CLIENT" --hosts hosts_1 -d PlonkCompatCircuitLocal "${file}" --party 0 2>>"${stderr_name}" | tee "${stdout_name}") || true
+        end_ns="$(date +%s%N)"
         date +%s >>"${stderr_name}"
+        # Same format as the .timing files of prove-r1cs-multiparty-inner.py, but on the wall clock
+        printf '{"version": 1, "clock": "realtime_ns", "start_ns": %s, "ready_ns": null, "end_ns": %s}\n' "${start_ns}" "${end_ns}" >"${timing_name}"
 
         sleep 10
     done
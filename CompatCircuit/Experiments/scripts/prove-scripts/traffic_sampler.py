@@ -0,0 +1,110 @@
+"""
+Attributes the TCP traffic of a group of processes to the links between them, from the per-socket counters of
+`ss -tinpH`:
+
+    ESTAB 0 0 127.0.0.100:8000 127.0.0.1:45678 users:(("client",pid=123,fd=5))
+         cubic ... bytes_sent:1234 bytes_acked:1234 bytes_received:5678 ...
+
+A socket belongs to the party of the process that owns it. The party at the other end is found by the peer
+address, either because it is the listening address of a party in the hosts file, or because it is the local
+address of a socket owned by another party.
+
+The counters of a socket are only known until it is closed, so the bytes sent after the last sample of a socket
+are missing. Sample at least a few times per run.
+"""
+
+import re
+
+SS_COMMAND = ["ss", "-tinpH"]
+
+SS_PID_PATTERN = re.compile(r"pid=(\d+)")
+SS_COUNTER_PATTERN = re.compile(r"\b(bytes_sent|bytes_acked|bytes_received):(\d+)")
+
+
+def parse_ss_output(output: str):
+    """
+    Returns `(local address, peer address, pids, counters)` of each socket in the output of `ss -tinpH`.
+    """
+    sockets = []
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        if not line[0].isspace():
+            fields = line.split()
+            # State, Recv-Q, Send-Q, local address, peer address, process
+            if len(fields) < 5:
+                continue
+            pids = {int(pid) for pid in SS_PID_PATTERN.findall(line)}
+            sockets.append((fields[3], fields[4], pids, {}))
+        elif sockets:
+            for name, value in SS_COUNTER_PATTERN.findall(line):
+                sockets[-1][3][name] = int(value)
+    return sockets
+
+
+def read_hosts_file(path: str):
+    """
+    Returns the listening address of each party, in the `host:port` format of `ss`.
+    """
+    with open(path, "r") as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+class TrafficSampler:
+    """
+    Keeps the last seen counters of the sockets between parties.
+
+    Args:
+    - party_count (int): Number of parties.
+    - listen_addresses (list): The listening address of each party, from the hosts file.
+    """
+
+    def __init__(self, party_count: int, listen_addresses):
+        self.party_count = party_count
+        self.party_by_address = {
+            address: party_index for party_index, address in enumerate(listen_addresses)
+        }
+        # (local address, peer address) -> [source party, destination party or None, bytes sent]
+        self.sockets = {}
+
+    def feed(self, output: str, party_by_pid) -> None:
+        """
+        Updates the counters from one `ss -tinpH` output.
+
+        Args:
+        - party_by_pid (dict): The party of each process id.
+        """
+        sockets = parse_ss_output(output)
+        owners = {}
+        for local, _, pids, _ in sockets:
+            for pid in pids:
+                if pid in party_by_pid:
+                    owners[local] = party_by_pid[pid]
+
+        for local, peer, _, counters in sockets:
+            if local not in owners:
+                continue
+            destination = self.party_by_address.get(peer, owners.get(peer))
+            # Unlike bytes_sent, bytes_acked does not count retransmissions, only the SYN as one extra byte.
+            # Older kernels only have bytes_sent
+            bytes_sent = counters.get("bytes_acked", counters.get("bytes_sent", 0))
+            socket = self.sockets.setdefault(
+                (local, peer), [owners[local], destination, 0]
+            )
+            if socket[1] is None:
+                socket[1] = destination
+            socket[2] = max(socket[2], bytes_sent)
+
+    def matrix(self):
+        """
+        Returns `(bytes_sent, unresolved_bytes)`: `bytes_sent[i][j]` is the number of bytes party i sent to party
+        j, and `unresolved_bytes[i]` the number of bytes party i sent to peers that are not parties.
+        """
+        bytes_sent = [[0] * self.party_count for _ in range(self.party_count)]
+        unresolved_bytes = [0] * self.party_count
+        for source, destination, value in self.sockets.values():
+            if destination is None:
+                unresolved_bytes[source] += value
+            else:
+                bytes_sent[source][destination] += value
+        return bytes_sent, unresolved_bytes
@@ -0,0 +1,236 @@
+"""
+Parses the setup/prove/verify time costs of the prover stdout files, shared by `prove-r1cs-multiparty-inner.py`,
+which parses the top-level timer spans while it writes a stdout file, and `print-results-inner.py`, which reads
+them back for a whole results directory:
+
+1. Find the `<circuit>.party<i>.stdout` files under the directory, recursively, plain or compressed.
+2. Take the spans of each file from the `metrics.jsonl` record written by the launcher, as long as the file has
+   not changed since.
+3. Otherwise take the time costs from `RESULTS_CACHE_FILE` in the directory, as long as the file has not changed
+   since they were cached.
+4. Otherwise parse the stdout file, in parallel over the files, and cache the time costs.
+
+The `End:` lines are parsed by `zkp_stdout.py`, the same as in `draw/analyze_data.py`.
+"""
+
+import os
+import re
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from log_compression import (
+    COMPRESSION_SUFFIXES,
+    get_compression,
+    get_log_file_identity,
+    open_log,
+)
+from zkp_stdout import ZKP_STEPS, ZkpStdoutParser
+
+METRICS_FILE = "metrics.jsonl"
+RESULTS_CACHE_FILE = ".print-results-cache.json"
+# Bump when the parsing below changes, so that cached time costs are parsed again
+RESULTS_CACHE_VERSION = 1
+
+STDOUT_FILE_PATTERN = re.compile(r"^(.*)\.party(\d+)\.stdout$")
+
+
+def get_step_timecost(spans):
+    """
+    Sums up `[label, seconds]` spans into the time cost of each step.
+    """
+    parser = ZkpStdoutParser()
+    for label, timecost in spans:
+        parser.add(label, timecost)
+    return parser.step_timecost
+
+
+def get_step_timecost_from_stdout_file(filename: str):
+    """
+    Parses the time cost of each step from a plain or compressed stdout file.
+    """
+    parser = ZkpStdoutParser()
+    with open_log(filename) as file:
+        for line in file:
+            parser.feed(line)
+    return parser.step_timecost
+
+
+def parse_stdout_file_name(name: str):
+    """
+    Returns `(circuit, party)` of a stdout file name, with or without a compression suffix, or None.
+    """
+    compression = get_compression(name)
+    if compression is not None:
+        name = name[: -len(COMPRESSION_SUFFIXES[compression])]
+    match = STDOUT_FILE_PATTERN.match(name)
+    if not match:
+        return None
+    return match.group(1), int(match.group(2))
+
+
+def find_stdout_files(directory: str):
+    """
+    Returns the stdout files under a directory, recursively, sorted by path. A compressed copy of a stdout file
+    is skipped if the plain one exists.
+    """
+    files = []
+    for parent, directory_names, file_names in os.walk(directory):
+        directory_names.sort()
+        names = set(file_names)
+        for name in sorted(file_names):
+            if parse_stdout_file_name(name) is None:
+                continue
+            compression = get_compression(name)
+            if (
+                compression is not None
+                and name[: -len(COMPRESSION_SUFFIXES[compression])] in names
+            ):
+                continue
+            files.append(os.path.join(parent, name))
+    return files
+
+
+def read_metrics_file(path: str):
+    """
+    Returns the last record of each stdout file name in a `metrics.jsonl` file. Empty if it does not exist.
+    """
+    records = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by a crash of the launcher
+                continue
+            records[record["stdout"]] = record
+    return records
+
+
+def get_metrics_record(path: str, metrics):
+    """
+    Returns the record of a stdout file in the records of its `metrics.jsonl` file, or None if there is no
+    record of it, or the file changed since the record was written.
+    """
+    circuit, party = parse_stdout_file_name(os.path.basename(path))
+    record = metrics.get(f"{circuit}.party{party}.stdout")
+    if record is None:
+        return None
+    # Compressed files are compared by their size on disk
+    if record.get("stdout_file_bytes", record["stdout_bytes"]) != os.path.getsize(path):
+        return None
+    return record
+
+
+def read_results_cache(path: str):
+    """
+    Returns the cached time costs by stdout file path, relative to the directory of the cache file.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            cache = json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if cache.get("version") != RESULTS_CACHE_VERSION:
+        return {}
+    return cache["files"]
+
+
+def write_results_cache(path: str, files) -> None:
+    """
+    Replaces the cache file at once, so that an interrupted write leaves the old cache in place.
+    """
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump({"version": RESULTS_CACHE_VERSION, "files": files}, file)
+    os.replace(path + ".tmp", path)
+
+
+def parse_stdout_file(path: str):
+    """
+    Returns the time costs of a stdout file and an empty error, or empty time costs and the error, so that one
+    broken file does not stop a batch.
+    """
+    try:
+        return get_step_timecost_from_stdout_file(path), ""
+    except Exception as e:
+        return {}, f"{type(e).__name__}: {e}"
+
+
+def get_results(directory: str, jobs: int = 1, use_cache: bool = True):
+    """
+    Returns one result per stdout file under a directory, see the steps above.
+
+    Args:
+    - directory (str): The results directory, e.g. `R1CS_PATH`.
+    - jobs (int): Number of processes parsing the stdout files that have no metrics record or cached results.
+    - use_cache (bool): Whether to read and update `RESULTS_CACHE_FILE` in the directory.
+
+    Returns:
+    - list: Dicts with the directory relative to `directory`, the circuit, the party, the time cost of each step,
+      the source of the time costs (`metrics`, `cache` or `stdout`) and the error, if the file could not be
+      parsed. Sorted by directory, circuit and party.
+    """
+    cache_path = os.path.join(directory, RESULTS_CACHE_FILE)
+    cache = read_results_cache(cache_path) if use_cache else {}
+    metrics_by_directory = {}
+    results = []
+    pending = []
+    relative_paths = set()
+    for path in find_stdout_files(directory):
+        relative_path = os.path.relpath(path, directory)
+        relative_paths.add(relative_path)
+        circuit, party = parse_stdout_file_name(os.path.basename(path))
+        result = {
+            "directory": os.path.dirname(relative_path),
+            "circuit": circuit,
+            "party": party,
+            **{step: None for step in ZKP_STEPS},
+            "source": "stdout",
+            "error": "",
+        }
+        results.append(result)
+
+        parent = os.path.dirname(path)
+        if parent not in metrics_by_directory:
+            metrics_by_directory[parent] = read_metrics_file(
+                os.path.join(parent, METRICS_FILE)
+            )
+        record = get_metrics_record(path, metrics_by_directory[parent])
+        if record is not None:
+            result.update(get_step_timecost(record["spans"]), source="metrics")
+            continue
+
+        identity = get_log_file_identity(path)
+        cached = cache.get(relative_path)
+        if cached is not None and cached["identity"] == identity:
+            result.update(cached["step_timecost"], source="cache")
+            continue
+        pending.append((result, path, relative_path, identity))
+
+    paths = [path for _, path, _, _ in pending]
+    if jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            parsed = list(executor.map(parse_stdout_file, paths))
+    else:
+        parsed = [parse_stdout_file(path) for path in paths]
+
+    for (result, _, relative_path, identity), (step_timecost, error) in zip(
+        pending, parsed
+    ):
+        result.update(step_timecost, error=error)
+        if not error:
+            cache[relative_path] = {
+                "identity": identity,
+                "step_timecost": step_timecost,
+            }
+
+    if use_cache and pending:
+        # Drop the files that are gone
+        write_results_cache(
+            cache_path,
+            {path: entry for path, entry in cache.items() if path in relative_paths},
+        )
+
+    results.sort(key=lambda r: (r["directory"], r["circuit"], r["party"]))
+    return results
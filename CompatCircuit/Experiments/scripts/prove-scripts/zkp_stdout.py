@@ -0,0 +1,99 @@
+"""
+Parses the top-level `End:` lines that the ark-std timer writes to the stdout of a prover, and sums them up into the
+time cost of each step. Shared by `prove-r1cs-multiparty-inner.py`, `zkp_results.py` and, through the
+`draw/zkp_stdout.py` link to this file, `draw/analyze_data.py`.
+"""
+
+import re
+import sys
+from typing import Dict, Optional, Tuple
+
+ZKP_END_LINE_PATTERN = re.compile(r"End:\s+(.*?)\s*\.*\s*([\d\.]+)(s|ms|µs|ns)")
+
+ZKP_TIME_UNIT_DIVISORS = {
+    "s": 1,
+    "ms": 1000,
+    "µs": 1000000,
+    "ns": 1000000000,
+}
+
+ZKP_STEPS = ["setup", "prove", "verify"]
+
+
+def parse_zkp_end_line(line: str) -> Optional[Tuple[str, float]]:
+    """
+    Parses a top-level `End:` line of the ark-std timer output.
+
+    Returns:
+    - tuple: The label and the time cost in seconds, or None if the line does not match.
+    """
+    # Adjust the regular expression to ignore the dots before the time value
+    match = ZKP_END_LINE_PATTERN.match(line.strip())
+    if not match:
+        return None
+    label = match.group(1)
+    time_value = float(match.group(2))
+    unit = match.group(3)
+
+    # Convert time based on the unit
+    divisor = ZKP_TIME_UNIT_DIVISORS[unit]
+    if divisor != 1:
+        time_value = time_value / divisor
+    return label, time_value
+
+
+def classify_zkp_step_label(label: str) -> Optional[str]:
+    """
+    Returns the ZKP phase (setup, prove or verify) a top-level timer label belongs to, or None for `Connecting`.
+    """
+    if label == "Connecting":
+        return None
+    elif (
+        label.startswith("KZG10::Setup")
+        or label.startswith("Constructing `powers`")
+        or label.startswith("Constructing `shifted_powers`")
+        or label == "Committing to polynomials"
+    ):
+        return "setup"
+    elif label in [
+        "commit: p",
+        "prove_public",
+        "prove_gates",
+        "prove_wiring",
+        "timed section",
+    ]:
+        return "prove"
+    elif label == "Checking evaluations":
+        return "verify"
+    else:
+        raise Exception(f"Unrecognized label {label}")
+
+
+class ZkpStdoutParser:
+    """
+    Sums up the top-level timer spans of a ZKP `.stdout` file into setup/prove/verify, fed one line at a time.
+    An `End:` line that does not parse is reported and skipped, an unknown label raises.
+    """
+
+    def __init__(self):
+        self.step_timecost: Dict[str, float] = {step: 0 for step in ZKP_STEPS}
+        # Whether the parties have connected to each other, i.e. `End: Connecting` was seen
+        self.connected = False
+
+    def feed(self, line: str) -> None:
+        # Nested timer lines start with `·`, so only the top-level ones match
+        if not line.startswith("End:"):
+            return
+        result = parse_zkp_end_line(line)
+        if result is None:
+            sys.stderr.write(f"unrecognized line: {line.rstrip()}\n")
+            return
+        self.add(*result)
+
+    def add(self, label: str, timecost: float) -> None:
+        # classify names
+        phase = classify_zkp_step_label(label)
+        if phase is None:
+            self.connected = True
+        else:
+            self.step_timecost[phase] += timecost
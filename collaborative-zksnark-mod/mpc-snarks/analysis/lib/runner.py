@@ -1,8 +1,11 @@
 #!/usr/bin/env python
-from typing import NamedTuple, List, Tuple, Optional
+from typing import NamedTuple, List, Tuple, Optional, Dict
 
 import os
 import sys
+import csv
+import json
+import math
 import shutil as sh
 import subprocess as sub
 import argparse
@@ -11,6 +14,10 @@ import threading
 import queue
 import time
 import traceback
+import atexit
+import itertools
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 
 class Binary(object):
@@ -28,11 +35,31 @@ class Binary(object):
 ssh = Binary("ssh")
 scp = Binary("scp")
 
+# One multiplexed connection per host, opened by the first ssh to it and shared by all later ssh and scp
+# runs, so they do not pay for a new connection and authentication each time
+SSH_CONTROL_DIR = tempfile.mkdtemp(prefix="runner-ssh-")
+atexit.register(sh.rmtree, SSH_CONTROL_DIR, True)
+SSH_OPTS = [
+    "-o", "ControlMaster=auto",
+    "-o", f"ControlPath={SSH_CONTROL_DIR}/%C",
+    # Idle seconds before a connection closes, in case the runner dies without closing it
+    "-o", "ControlPersist=600",
+]
+
+
+def close_ssh_connections(machines: List["Machine"]):
+    procs = [
+        sub.Popen([ssh.path, *SSH_OPTS, "-O", "exit", m.str()], stdout=sub.DEVNULL, stderr=sub.DEVNULL)
+        for m in machines
+    ]
+    for p in procs:
+        p.wait()
+
 
 def check_ssh(ip: str):
     print("check ssh to " + ip)
     out = sub.run(
-        [ssh.path, f"{username}@{ip}", "ls && (pkill proof || echo no proof)"], stderr=sub.PIPE, stdout=sub.PIPE, input=""
+        [ssh.path, *SSH_OPTS, f"{username}@{ip}", "ls && (pkill proof || echo no proof)"], stderr=sub.PIPE, stdout=sub.PIPE, input=""
     )
     assert (
         out.returncode == 0
@@ -42,30 +69,46 @@ def check_ssh(ip: str):
 class Machine(object):
     ip: str
     priv_ip: str
+    # The hosts file last copied to the machine
+    host_file: Optional[str]
 
     def __init__(self, ip: str, priv_ip: str):
-        check_ssh(ip)
         self.ip = ip
         self.priv_ip = priv_ip
+        self.host_file = None
         #self.disable_threading()
 
     def str(self):
         return f"{username}@{self.ip}"
 
+    def ssh_cmd(self, cmd: List[str]) -> List[str]:
+        return [ssh.path, *SSH_OPTS, self.str()] + cmd
+
     def disable_threading(self):
         print(f"Disabling hyperthreading: {self.ip}")
-        sub.run(["ssh", self.str(), "sudo", "./hyperthreading.sh", "-d"], check=True)
+        sub.run(self.ssh_cmd(["sudo", "./hyperthreading.sh", "-d"]), check=True)
 
 
 class Hosts(NamedTuple):
     hosts: List[Machine]
 
     def mk_and_copy_host_file(self, hosts: "Hosts", host_path: str):
+        """Copies the hosts file to all the hosts at once, skipping the ones that already have it."""
+        content = "".join(f"{host.priv_ip}:{PORT}\n" for host in hosts.hosts)
+        stale = [host for host in hosts.hosts if host.host_file != content]
+        if not stale:
+            return
         with tempfile.NamedTemporaryFile("w+") as fp:
-            fp.writelines(f"{host.priv_ip}:8000\n" for host in hosts.hosts)
+            fp.write(content)
             fp.flush()
-            for host in hosts.hosts:
-                sub.run([scp.path, '-q', fp.name, f"{host.str()}:{host_path}"])
+            procs = [
+                sub.Popen([scp.path, *SSH_OPTS, '-q', fp.name, f"{host.str()}:{host_path}"])
+                for host in stale
+            ]
+            failed = [host.ip for host, p in zip(stale, procs) if p.wait() != 0]
+        assert not failed, f"Could not copy the hosts file to {failed}"
+        for host in stale:
+            host.host_file = content
 
 
 class Cmd(NamedTuple):
@@ -83,6 +126,15 @@ MARLIN = "marlin"
 NET_COHOST = "cohost"
 NET_LAN = "lan"
 
+# Port of each party in the hosts file
+PORT = 8000
+# Seconds to wait for the hosts of a timed out benchmark to be idle again
+TEARDOWN_TIMEOUT_SEC = 60
+# Kills what a benchmark left running on a host. `[b]` keeps pkill -f from matching the shell running it
+REMOTE_KILL_CMD = "pkill -{signal} -f '[b]ench.zsh'; pkill -{signal} proof; sleep 1"
+# Succeeds once no benchmark process is left on a host and nothing but TIME-WAIT sockets use its port
+REMOTE_IDLE_CMD = f"! pgrep proof >/dev/null && ! ss -Htan '( sport = :{PORT} or dport = :{PORT} )' | grep -qv TIME-WAIT"
+
 TIME_1024_SPDZ_SEC = {GROTH: 0.98, PLONK: 5.9, MARLIN: 3.1}
 
 ALG_RATIO = {
@@ -91,6 +143,142 @@ ALG_RATIO = {
     SPDZ: 1.0,
 }
 
+# Header of the CSVs written by this script, the ones in analysis/data/ the runtime model is fit from
+CSV_HEADER = ["proof_system", "alg", "parties", "net", "size", "trial", "time"]
+
+# Timeouts are the predicted time at this many standard deviations above the mean, in log space
+TIMEOUT_Z = 3.0
+TIMEOUT_MIN_SEC = 20
+# Lower bound of the standard deviation of log(time), so that a perfect fit still leaves some slack
+MIN_LOG_SIGMA = 0.1
+# Standard deviation of log(time) of the static estimates, when there is no data to fit
+PRIOR_LOG_SIGMA = 0.5
+RIDGE = 1e-6
+
+
+class RuntimeFit(NamedTuple):
+    # log(time) = coef[0] + coef[1] * log(size) + coef[2] * log(parties)
+    coef: List[float]
+    sigma: float
+    n: int
+
+
+def solve(a: List[List[float]], b: List[float]) -> List[float]:
+    """Gaussian elimination with partial pivoting."""
+    n = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(m[r][col]))
+        m[col], m[pivot] = m[pivot], m[col]
+        for r in range(col + 1, n):
+            f = m[r][col] / m[col][col]
+            for c in range(col, n + 1):
+                m[r][c] -= f * m[col][c]
+    x = [0.0] * n
+    for r in reversed(range(n)):
+        x[r] = (m[r][n] - sum(m[r][c] * x[c] for c in range(r + 1, n))) / m[r][r]
+    return x
+
+
+def fit_runtime(samples: List[Tuple[int, int, float]]) -> Optional[RuntimeFit]:
+    """
+    Least squares fit of log(time) against log(size) and log(parties), from (size, parties, time) samples.
+    None if there are fewer samples than coefficients, or fewer than two sizes.
+    """
+    rows = [
+        ([1.0, math.log(size), math.log(parties)], math.log(t))
+        for size, parties, t in samples
+        if t > 0
+    ]
+    if len(rows) < 3 or len(set(size for size, _, _ in samples)) < 2:
+        return None
+    ata = [[sum(x[i] * x[j] for x, _ in rows) for j in range(3)] for i in range(3)]
+    atb = [sum(x[i] * y for x, y in rows) for i in range(3)]
+    # A tiny ridge keeps the party term at 0 when all samples have the same number of parties
+    for i in range(1, 3):
+        ata[i][i] += RIDGE
+    coef = solve(ata, atb)
+    residuals = [y - sum(c * xi for c, xi in zip(coef, x)) for x, y in rows]
+    dof = max(len(rows) - 3, 1)
+    sigma = math.sqrt(sum(r * r for r in residuals) / dof)
+    return RuntimeFit(coef, sigma, len(rows))
+
+
+class RuntimeModel(object):
+    """
+    Runtime of the benchmarks of each (proof system, alg, net), fit from the CSVs of earlier runs and
+    refit as benchmarks complete. Falls back to `TIME_1024_SPDZ_SEC` and `ALG_RATIO` without data.
+    """
+
+    samples: Dict[Tuple[str, str, str], List[Tuple[int, int, float]]]
+    fits: Dict[Tuple[str, str, str], RuntimeFit]
+
+    def __init__(self):
+        self.samples = {}
+        self.fits = {}
+
+    def add(self, proof_system: str, alg: str, net: str, parties: int, size: int, t: float):
+        self.samples.setdefault((proof_system, alg, net), []).append((size, parties, t))
+
+    def load_csv(self, path: str) -> int:
+        """Adds the samples of a CSV in the format of this script. Returns their count, 0 for other CSVs."""
+        with open(path, newline="") as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames != CSV_HEADER:
+                return 0
+            count = 0
+            for row in reader:
+                if not row["time"]:
+                    continue
+                self.add(
+                    row["proof_system"],
+                    row["alg"],
+                    row["net"],
+                    int(row["parties"]),
+                    int(row["size"]),
+                    float(row["time"]),
+                )
+                count += 1
+            return count
+
+    def refit(self, key: Optional[Tuple[str, str, str]] = None):
+        """Refits one (proof system, alg, net), or all of them. Keeps the previous fit without enough samples."""
+        for k in [key] if key is not None else list(self.samples):
+            fit = fit_runtime(self.samples.get(k, []))
+            if fit is not None:
+                self.fits[k] = fit
+
+    def save(self, path: str):
+        data = [
+            {"proof_system": k[0], "alg": k[1], "net": k[2], **fit._asdict()}
+            for k, fit in sorted(self.fits.items())
+        ]
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def load(self, path: str):
+        """Loads the fits saved by `save`, for the (proof system, alg, net) that have no fit yet."""
+        with open(path) as f:
+            for d in json.load(f):
+                k = (d["proof_system"], d["alg"], d["net"])
+                if k not in self.fits:
+                    self.fits[k] = RuntimeFit(d["coef"], d["sigma"], d["n"])
+
+    def predict(self, proof_system: str, alg: str, net: str, parties: int, size: int) -> Tuple[float, float]:
+        """Returns the mean and standard deviation of log(time)."""
+        fit = self.fits.get((proof_system, alg, net))
+        if fit is None:
+            t_1024 = TIME_1024_SPDZ_SEC[proof_system]
+            return math.log(t_1024 / 1024 * size * ALG_RATIO[alg]), PRIOR_LOG_SIGMA
+        mean = fit.coef[0] + fit.coef[1] * math.log(size) + fit.coef[2] * math.log(parties)
+        # Widened for the uncertainty of the fit itself
+        sigma = max(fit.sigma, MIN_LOG_SIGMA) * math.sqrt(1 + 1 / fit.n)
+        return mean, sigma
+
+
+runtime_model = RuntimeModel()
+
 
 class BenchmarkInput(NamedTuple):
     proof_system: str
@@ -131,20 +319,21 @@ class BenchmarkInput(NamedTuple):
             raise Exception("Bad ent: " + self.net)
 
     def estimated_time(self):
-        t_1024 = TIME_1024_SPDZ_SEC[self.proof_system]
-        return t_1024 / 1024 * self.size * ALG_RATIO[self.alg]
+        mean, _ = runtime_model.predict(self.proof_system, self.alg, self.net, self.parties, self.size)
+        return math.exp(mean)
 
     def timeout(self):
-        return max(20, self.estimated_time() * 1.5)
+        mean, sigma = runtime_model.predict(self.proof_system, self.alg, self.net, self.parties, self.size)
+        return max(TIMEOUT_MIN_SEC, math.exp(mean + TIMEOUT_Z * sigma))
 
     def host_need(self):
         return 1 if self.net == NET_COHOST else self.parties
 
-    def run(self, host_path: str, bin_path: str, hosts: Hosts) -> Optional[float]:
-        count = len(hosts.hosts)
+    def run(self, host_path: str, bin_path: str, hosts: Hosts) -> List[str]:
+        """Returns the output of each party, in party order."""
         cmds = [
-            [ssh.path, host.str()] + cmd
-            # [ssh.path, host.str()] + ["echo", "1"]
+            host.ssh_cmd(cmd)
+            # host.ssh_cmd(["echo", "1"])
             for host, cmd in zip(hosts.hosts, self.cmds(bin_path, host_path))
         ]
         print('start', self, 'estimate:', self.estimated_time(), 'timeout:', self.timeout())
@@ -153,10 +342,9 @@ class BenchmarkInput(NamedTuple):
             outputs = async_run(cmds, self.timeout())
             if outputs is None:
                 print("TIMEOUT", self, 'after', self.timeout())
+                teardown(hosts)
         print('done', self, self.estimated_time(), outputs)
-        if '' in outputs:
-            return None
-        return sum(time_str_to_secs(o) for o in outputs) / count
+        return outputs
 
     def csv_line(self) -> str:
         return f"{self.proof_system},{self.alg},{self.parties},{self.net},{self.size},{self.trial}"
@@ -171,6 +359,9 @@ def hosts_from_file(path: str) -> List[Machine]:
         for line in f.read().strip().splitlines(keepends=False):
             ip, priv_ip = line.strip().split()
             out.append(Machine(ip, priv_ip))
+    # Checks all hosts at once, which also opens their connections
+    with ThreadPoolExecutor(max_workers=len(out) or 1) as executor:
+        list(executor.map(check_ssh, [m.ip for m in out]))
     return out
 
 
@@ -211,35 +402,86 @@ def time_str_to_secs(s: str) -> float:
         raise Exception("bad time: " + s)
 
 
-def async_run(cmds: List[List[str]], timeout: float) -> List[str]:
-    n = len(cmds)
-    ts = []
-    rs = queue.LifoQueue()
-    start_time = time.time()
-    for cmd in cmds:
-        t = threading.Thread(target=async_run_one, args=(cmd, rs))
-        t.setDaemon(True)
-        t.start()
-        ts.append(t)
-    for t in ts:
-        elapsed = max(time.time() - start_time, 0)
-        to = timeout-elapsed
-        if to < 0:
-            # Timeout!!!
-            return None
-        t.join(to)
-        if t.is_alive():
-            # Timeout!!!
-            return None
-    rlist = []
-    while not rs.empty():
-        rlist.append(rs.get())
-    return rlist
-
-
-def async_run_one(cmd: List[str], q: "Queue[str]"):
-    o = sub.check_output(cmd)
-    q.put(o.decode().strip())
+def async_run(cmds: List[List[str]], timeout: float) -> Optional[List[str]]:
+    """
+    Runs the commands at once. Returns their outputs in order, with '' for the ones that failed, or None if
+    they did not all finish within `timeout`, after killing the local processes.
+    """
+    procs = [sub.Popen(cmd, stdout=sub.PIPE, stdin=sub.DEVNULL) for cmd in cmds]
+    deadline = time.time() + timeout
+    outputs = []
+    try:
+        for cmd, p in zip(cmds, procs):
+            # The output is a single time, well below the pipe buffer, so it is read after the exit
+            p.wait(timeout=max(deadline - time.time(), 0))
+            out = p.stdout.read()
+            p.stdout.close()
+            if p.returncode != 0:
+                print("FAILED", cmd, "exit code", p.returncode)
+            outputs.append(out.decode().strip() if p.returncode == 0 else '')
+    except sub.TimeoutExpired:
+        # Timeout!!!
+        for p in procs:
+            p.kill()
+        for p in procs:
+            p.wait()
+            p.stdout.close()
+        return None
+    return outputs
+
+
+def run_on_hosts(hosts: List[Machine], cmd: str, timeout: float) -> List[int]:
+    """Runs a command on the hosts at once. Returns the exit codes, -1 for the ones that did not finish in time."""
+    procs = [
+        sub.Popen(host.ssh_cmd([cmd]), stdin=sub.DEVNULL, stdout=sub.DEVNULL, stderr=sub.DEVNULL)
+        for host in hosts
+    ]
+    deadline = time.time() + timeout
+    codes = []
+    for p in procs:
+        try:
+            codes.append(p.wait(timeout=max(deadline - time.time(), 0)))
+        except sub.TimeoutExpired:
+            p.kill()
+            p.wait()
+            codes.append(-1)
+    return codes
+
+
+class TeardownError(Exception):
+    """Raised by `teardown` with the hosts that are still busy, which must not run other benchmarks."""
+
+    def __init__(self, hosts: List[Machine]):
+        super().__init__(f"Hosts still busy {TEARDOWN_TIMEOUT_SEC}s after a timeout: {[h.ip for h in hosts]}")
+        self.hosts = hosts
+
+
+def teardown(hosts: Hosts):
+    """
+    Kills the benchmark on all its hosts after a timeout, and waits until they are idle and the port is
+    free, so that a retry does not compete with the leftovers. Kills with SIGTERM first, then SIGKILL.
+    Raises `TeardownError` if some hosts are not idle within TEARDOWN_TIMEOUT_SEC.
+    """
+    busy = list(hosts.hosts)
+    signal = "TERM"
+    deadline = time.time() + TEARDOWN_TIMEOUT_SEC
+    while True:
+        cmd = REMOTE_KILL_CMD.format(signal=signal) + "; " + REMOTE_IDLE_CMD
+        codes = run_on_hosts(busy, cmd, max(deadline - time.time(), 1))
+        busy = [host for host, code in zip(busy, codes) if code != 0]
+        if not busy:
+            return
+        if time.time() > deadline:
+            raise TeardownError(busy)
+        print("Waiting for", [h.ip for h in busy], "to be idle")
+        signal = "KILL"
+
+
+def outputs_time(outputs: List[str], count: int) -> Optional[float]:
+    """The time averaged over the parties, or None if a party printed nothing or did not finish."""
+    if len(outputs) < count or '' in outputs:
+        return None
+    return sum(time_str_to_secs(o) for o in outputs) / count
 
 
 class Benchmark(NamedTuple):
@@ -254,8 +496,169 @@ class Benchmark(NamedTuple):
 
 
 class Result(NamedTuple):
+    # Tells apart the launches of the same benchmark, which the benchmarks file may list more than once
+    launch_id: int
     benchmark: Benchmark
     hosts: Hosts
+    # Output of each party
+    outputs: List[str]
+    error: Optional[str]
+    # Hosts that could not be torn down, which are taken out of the pool
+    quarantined: List[Machine]
+
+
+# Next to the output CSV, one JSON line per result with the output of each party
+RAW_SUFFIX = ".raw.jsonl"
+# Next to the output CSV by default, the runtime model refit with its results
+MODEL_SUFFIX = ".model.json"
+
+
+class ResultLog(object):
+    """
+    Appends each result to the output CSV, and its raw outputs to `<output>.raw.jsonl`, as soon as it is
+    known. Both are flushed and fsynced, so an interrupted sweep keeps all the finished benchmarks, and
+    `--resume` continues it. Failed benchmarks only go to the raw file, so they run again on resume.
+    """
+
+    def __init__(self, path: str, resume: bool):
+        self.path = path
+        if resume:
+            truncate_partial_line(path)
+            truncate_partial_line(path + RAW_SUFFIX)
+        mode = "a" if resume else "w"
+        self.csv = open(path, mode)
+        self.raw = open(path + RAW_SUFFIX, mode)
+        if self.csv.tell() == 0:
+            self.write(self.csv, ",".join(CSV_HEADER) + "\n")
+
+    @staticmethod
+    def write(f, line: str):
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+
+    def append(self, result: Result, hosts: List[str]):
+        benchmark = result.benchmark
+        record = {
+            **benchmark.input._asdict(),
+            "time": benchmark.time,
+            "hosts": hosts,
+            "outputs": result.outputs,
+            "error": result.error,
+        }
+        self.write(self.raw, json.dumps(record) + "\n")
+        if benchmark.time is not None:
+            self.write(self.csv, benchmark.csv_line() + "\n")
+
+    def close(self):
+        self.csv.close()
+        self.raw.close()
+
+
+def truncate_partial_line(path: str):
+    """Drops a last line cut short by a crash, if any."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+def completed_inputs(path: str) -> set:
+    """The `csv_line()` of the benchmarks with a time in an output CSV."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f.read().splitlines()[1:]:
+            inputs, _, t = line.rpartition(",")
+            if inputs and t:
+                done.add(inputs)
+    return done
+
+
+def lpt_order(inputs: List[BenchmarkInput]) -> List[BenchmarkInput]:
+    """Longest estimated time first, and the ones needing more hosts first among equals. The estimates
+    change as the runtime model is refit, so the pending benchmarks are ordered again after each result."""
+    return sorted(inputs, key=lambda b: (b.estimated_time(), b.host_need()), reverse=True)
+
+
+def pick_benchmarks(
+    pending: List[BenchmarkInput],
+    free: int,
+    now: float,
+    running_ends: List[Tuple[float, int]],
+) -> List[BenchmarkInput]:
+    """
+    Picks the benchmarks to start now, out of `pending` in LPT order, given `free` idle hosts and the
+    projected (end time, host count) of the running benchmarks.
+
+    Benchmarks start in order while they fit. The first one that does not fit gets a reservation at the
+    earliest time enough hosts are projected to be free, and the benchmarks after it are backfilled onto the
+    idle hosts if they end before that time, or only use hosts that the reserved one does not need. So small
+    benchmarks fill the gaps without delaying the large one.
+    """
+    picked = []
+    ends = list(running_ends)
+    i = 0
+    while i < len(pending) and pending[i].host_need() <= free:
+        picked.append(pending[i])
+        free -= pending[i].host_need()
+        ends.append((now + pending[i].estimated_time(), pending[i].host_need()))
+        i += 1
+    if i == len(pending):
+        return picked
+
+    head_need = pending[i].host_need()
+    available = free
+    shadow = now
+    for end, count in sorted(ends):
+        if available >= head_need:
+            break
+        available += count
+        shadow = end
+    # Hosts free at the reservation that the reserved benchmark leaves over
+    extra = available - head_need
+
+    for b in pending[i + 1 :]:
+        need = b.host_need()
+        if need > free:
+            continue
+        if now + b.estimated_time() <= shadow:
+            pass
+        elif need <= extra:
+            extra -= need
+        else:
+            continue
+        picked.append(b)
+        free -= need
+    return picked
+
+
+def projected_makespan(
+    pending: List[BenchmarkInput],
+    free: int,
+    now: float,
+    running_ends: List[Tuple[float, int]],
+) -> float:
+    """
+    Simulates `pick_benchmarks` with the estimated times, and returns the time at which all benchmarks
+    are projected to be done.
+    """
+    pending = list(pending)
+    ends = sorted(running_ends)
+    while True:
+        for b in pick_benchmarks(pending, free, now, ends):
+            pending.remove(b)
+            free -= b.host_need()
+            ends.append((now + b.estimated_time(), b.host_need()))
+        if not ends:
+            return now
+        ends.sort()
+        end, count = ends.pop(0)
+        now = max(now, end)
+        free += count
 
 
 def tiny_baselines():
@@ -300,23 +703,62 @@ parser.add_argument(
     default="out.csv",
 )
 parser.add_argument("--user", metavar="USERNAME", default=os.getenv("USER"))
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+parser.add_argument(
+    "--data",
+    metavar="DIR",
+    type=str,
+    help="Directory of earlier result CSVs to fit the runtime model from",
+    default=DATA_DIR,
+)
+parser.add_argument(
+    "--model",
+    metavar="PATH",
+    type=str,
+    help="Where to save the fitted runtime model, which is also used when there is no data to fit. "
+    f"Defaults to the output CSV path with {MODEL_SUFFIX} appended",
+)
+parser.add_argument(
+    "--resume",
+    action="store_true",
+    help="Append to the output CSV and skip the benchmarks it already has, instead of starting it over",
+)
 
 args = parser.parse_args()
 username = args.user
+if args.model is None:
+    args.model = args.output + MODEL_SUFFIX
+
+n_samples = 0
+if os.path.isdir(args.data):
+    for name in sorted(os.listdir(args.data)):
+        if name.endswith(".csv"):
+            n_samples += runtime_model.load_csv(os.path.join(args.data, name))
+runtime_model.refit()
+if os.path.exists(args.model):
+    runtime_model.load(args.model)
+print(f"Runtime model: {len(runtime_model.fits)} fits from {n_samples} samples")
+for k, fit in sorted(runtime_model.fits.items()):
+    print("  ", k, f"time ~ size^{fit.coef[1]:.2f} * parties^{fit.coef[2]:.2f}, sigma {fit.sigma:.2f}, n {fit.n}")
 
 machines = hosts_from_file(args.hosts)
+atexit.register(close_ssh_connections, list(machines))
 to_run = benchmarks_from_file(args.benchmarks)
 print(f"{len(machines)} machines")
+if args.resume:
+    done = completed_inputs(args.output)
+    skipped = [b for b in to_run if b.csv_line() in done]
+    to_run = [b for b in to_run if b.csv_line() not in done]
+    print(f"Resuming: {len(skipped)} benchmarks already in {args.output}")
+result_log = ResultLog(args.output, args.resume)
 
 tasks = len(to_run)
 
-results = queue.LifoQueue()
+results = queue.Queue()
 benchmarks = []
 
-to_run.sort(key=lambda b: b.estimated_time())
-
 print("Benchmarks:")
-for t in to_run:
+for t in lpt_order(to_run):
     print("  ", t)
 
 HOST_PATH = "./hosts"
@@ -325,69 +767,141 @@ BENCH_PATH = "./multiprover-snark/mpc-snarks/scripts/bench.zsh"
 REMOTE_BENCH_PATH = "./multiprover-snark/mpc-snarks/scripts/remote_bench.zsh"
 
 
-def run_thread(inputs: BenchmarkInput, hosts: Hosts):
+def run_thread(launch_id: int, inputs: BenchmarkInput, hosts: Hosts):
+    # A failure only fails this benchmark, and its hosts go back to the pool, except the ones still busy
+    outputs = []
+    error = None
+    quarantined = []
     try:
         hosts.mk_and_copy_host_file(hosts, HOST_PATH)
-        time = inputs.run(HOST_PATH, BIN_PATH, hosts)
-        results.put(Result(Benchmark(inputs, time), hosts))
+        outputs = inputs.run(HOST_PATH, BIN_PATH, hosts)
+    except TeardownError as e:
+        traceback.print_exc()
+        error = repr(e)
+        quarantined = e.hosts
     except Exception as e:
         traceback.print_exc()
-        os._exit(1)
+        error = repr(e)
+    time = outputs_time(outputs, len(hosts.hosts)) if error is None else None
+    results.put(Result(launch_id, Benchmark(inputs, time), hosts, outputs, error, quarantined))
 
 
 
 threads = []
 
-update_ctr = 0
+# Seconds between progress reports while no benchmark finishes
+PROGRESS_INTERVAL_SEC = 10
+# Seconds between simulations of the remaining schedule for the progress reports, which are slow for long sweeps
+PROJECTION_INTERVAL_SEC = 60
 
 n_workers = len(machines)
-incomplete = set(to_run)
+# A multiset, since the benchmarks file may list a benchmark more than once
+incomplete = Counter(to_run)
+too_big = [b for b in to_run if b.host_need() > n_workers]
+assert not too_big, f"Not enough hosts for {too_big}"
+
+pending = lpt_order(to_run)
+# The hosts and projected end time of each running benchmark, by launch id
+running = {}
+launch_ids = itertools.count()
+# When the projected makespan was last computed, and its value
+projection = None
+
+
+def running_ends(now: float) -> List[Tuple[float, int]]:
+    # A benchmark running over its estimate is projected to end now
+    return [(max(end, now), len(hosts.hosts)) for hosts, end in running.values()]
+
+
+def quarantine(hosts: List[Machine]):
+    """Takes hosts out of the pool for the rest of the sweep, and fails the pending benchmarks that no longer
+    have enough hosts."""
+    global n_workers
+    n_workers -= len(hosts)
+    print("QUARANTINE", [h.ip for h in hosts], f"{n_workers} hosts left")
+    for b in [b for b in pending if b.host_need() > n_workers]:
+        pending.remove(b)
+        error = f"Needs {b.host_need()} hosts, {n_workers} left after quarantining {[h.ip for h in hosts]}"
+        print("FAILED", b, error)
+        result_log.append(Result(next(launch_ids), Benchmark(b, None), Hosts([]), [], error, []), [])
+        benchmarks.append(Benchmark(b, None))
+        incomplete.subtract([b])
+
+
+def print_progress(changed: bool):
+    """Prints the progress, with the projected makespan computed again if benchmarks finished since the last
+    report, at most once every PROJECTION_INTERVAL_SEC."""
+    global projection
+    now = time.time()
+    if projection is None or (changed and now - projection[0] >= PROJECTION_INTERVAL_SEC):
+        projection = (now, projected_makespan(pending, len(machines), now, running_ends(now)))
+    makespan = max(projection[1], now)
+    print(
+        f"{n_workers-len(machines)}/{n_workers} hosts busy, {len(benchmarks)}/{tasks} tasks done, "
+        f"projected makespan {makespan - start_time:.0f}s ({makespan - now:.0f}s left)"
+    )
+    if sum(incomplete.values()) < 10:
+        print(f"{list(incomplete.elements())}")
+
+
+start_time = time.time()
+projection = (start_time, projected_makespan(pending, n_workers, start_time, []))
+print(f"Projected makespan: {projection[1] - start_time:.0f}s")
 
 while len(benchmarks) < tasks:
-    # while len(to_run) > 0 and len(benchmarks) < tasks and not results.empty():
-    # Check for results
-    if not results.empty():
+    # Start what the schedule allows now
+    now = time.time()
+    for inputs in pick_benchmarks(pending, len(machines), now, running_ends(now)):
+        pending.remove(inputs)
+        needed = inputs.host_need()
+        hosts = Hosts(machines[-needed:])
+        del machines[-needed:]
+        launch_id = next(launch_ids)
+        running[launch_id] = (hosts, now + inputs.estimated_time())
+        t = threading.Thread(target=run_thread, args=(launch_id, inputs, hosts))
+        t.start()
+        threads.append(t)
+    # Wait until a benchmark finishes
+    try:
+        res = results.get(timeout=PROGRESS_INTERVAL_SEC)
+    except queue.Empty:
+        print_progress(False)
+        continue
+    refit = False
+    while True:
+        result_log.append(res, [host.ip for host in res.hosts.hosts])
+        machines.extend(host for host in res.hosts.hosts if host not in res.quarantined)
+        benchmarks.append(res.benchmark)
+        incomplete.subtract([res.benchmark.input])
+        del running[res.launch_id]
+        if res.quarantined:
+            quarantine(res.quarantined)
+        b = res.benchmark.input
+        if res.benchmark.time is not None:
+            runtime_model.add(b.proof_system, b.alg, b.net, b.parties, b.size, res.benchmark.time)
+            runtime_model.refit((b.proof_system, b.alg, b.net))
+            refit = True
         try:
-            while True:
-                res = results.get_nowait()
-                machines.extend(res.hosts.hosts)
-                benchmarks.append(res.benchmark)
-                incomplete.remove(res.benchmark.input)
-        except queue.Empty as e:
-            pass
-    # Check for runnable tasks
-    if len(to_run) > 0:
-        needed = to_run[-1].host_need()
-        if len(machines) >= needed:
-            inputs = to_run[-1]
-            to_run.pop()
-            hosts = Hosts(machines[-needed:])
-            for _ in range(needed):
-                machines.pop()
-            t = threading.Thread(target=run_thread, args=(inputs, hosts))
-            t.start()
-            threads.append(t)
-    time.sleep(0.01)
-    update_ctr += 1
-    update_ctr %= 1000
-    if update_ctr == 0:
-        print(f"{n_workers-len(machines)}/{n_workers} hosts busy, {len(benchmarks)}/{tasks} tasks done")
-        if len(incomplete) < 10:
-            print(f"{incomplete}")
+            res = results.get_nowait()
+        except queue.Empty:
+            break
+    if refit:
+        runtime_model.save(args.model)
+    pending[:] = lpt_order(pending)
+    print_progress(True)
+
+print(f"Makespan: {time.time() - start_time:.0f}s")
 
 for t in threads:
     t.join()
+result_log.close()
 
 print("Results:")
 for r in benchmarks:
     print(r)
 
-with open(args.output, 'w') as f:
-    f.write(benchmarks[0].csv_header())
-    f.write('\n')
-    for r in benchmarks:
-        if r.time is not None:
-            f.write(r.csv_line())
-            f.write('\n')
+failed = [r for r in benchmarks if r.time is None]
+if failed:
+    print(f"{len(failed)} benchmarks failed, see {args.output}{RAW_SUFFIX}. Run again with --resume to retry them")
 
 print("done")